@@ -41,6 +41,16 @@ except Exception:
     def isObjectLattice(obj):
         return False
 
+try:
+    from lattice2Subsequencer import HashableShape
+except Exception:
+    HashableShape = None # metrics will not be cached
+
+try:
+    from lattice2Interference import StencilInfo
+except Exception:
+    StencilInfo = None # collision-pass will run distToShape for every child
+
 # -------------------------- common stuff --------------------------------------------------
 
 def makeCompoundFilter(name):
@@ -79,8 +89,47 @@ class _CompoundFilter:
         
         obj.Proxy = self
         
+    def getMetrics(self, shapes, metric, stencil = None):
+        '''getMetrics(shapes, metric, stencil = None): returns list of values of metric 
+        ('Volume', 'Area', 'Length', or 'distance' to stencil) of shapes. Values are remembered, 
+        keyed by shape (and stencil), and reused on next recompute, so that changing only the 
+        thresholds doesn't recompute them.'''
+        if metric == 'distance':
+            func = lambda sh: sh.distToShape(stencil)[0]
+        elif metric == 'collision':
+            stencil_info = self.getStencilInfo(stencil)
+            func = lambda sh: stencil_info.touches(sh, DistConfusion, bb= self.getMetrics([sh], 'BoundBox')[0])
+        else:
+            func = lambda sh: getattr(sh, metric)
+        if HashableShape is None:
+            return [func(sh) for sh in shapes]
+        
+        stencil_key = HashableShape(stencil) if stencil is not None else None
+        vals = []
+        for sh in shapes:
+            key = (metric, HashableShape(sh), stencil_key)
+            val = self._oldMetrics.get(key)
+            if val is None:
+                val = func(sh)
+            self._metrics[key] = val
+            vals.append(val)
+        return vals
+
+    def getStencilInfo(self, stencil):
+        '''getStencilInfo(stencil): returns StencilInfo for stencil shape (bounding box and 
+        tessellation BVH), reused across recomputes while the stencil is unchanged.'''
+        key = HashableShape(stencil)
+        cached = getattr(self, '_stencilInfo', None)
+        if cached is None or not (cached[0] == key):
+            cached = (key, StencilInfo(stencil))
+            self._stencilInfo = cached
+        return cached[1]
 
     def execute(self,obj):
+        # metrics cache: only the values used in this recompute are kept
+        self._oldMetrics = getattr(self, '_metrics', {})
+        self._metrics = {}
+        
         #validity check
         if isObjectLattice(screen(obj.Base)):
             import lattice2Executer
@@ -118,30 +167,32 @@ class _CompoundFilter:
                         rst.append(shps[i])
         elif obj.FilterType == 'collision-pass':
             stencil = screen(obj.Stencil).Shape
-            for s in shps:
-                d = s.distToShape(stencil)
-                if bool(d[0] < DistConfusion) ^ bool(obj.Invert):
-                    rst.append(s)
-        elif obj.FilterType == 'window-volume' or obj.FilterType == 'window-area' or obj.FilterType == 'window-length' or obj.FilterType == 'window-distance':
-            vals = [0.0] * len(shps)
+            if HashableShape is not None and StencilInfo is not None:
+                # bounding boxes and BVH of stencil skip most of distToShape calls
+                flags = self.getMetrics(shps, 'collision', stencil)
+            else:
+                flags = [d < DistConfusion for d in self.getMetrics(shps, 'distance', stencil)]
             for i in range(0,len(shps)):
-                if obj.FilterType == 'window-volume':
-                    vals[i] = shps[i].Volume
-                elif obj.FilterType == 'window-area':
-                    vals[i] = shps[i].Area
-                elif obj.FilterType == 'window-length':
-                    vals[i] = shps[i].Length
-                elif obj.FilterType == 'window-distance':
-                    vals[i] = shps[i].distToShape(obj.Stencil.Shape)[0]
+                if bool(flags[i]) ^ bool(obj.Invert):
+                    rst.append(shps[i])
+        elif obj.FilterType == 'window-volume' or obj.FilterType == 'window-area' or obj.FilterType == 'window-length' or obj.FilterType == 'window-distance':
+            if obj.FilterType == 'window-volume':
+                vals = self.getMetrics(shps, 'Volume')
+            elif obj.FilterType == 'window-area':
+                vals = self.getMetrics(shps, 'Area')
+            elif obj.FilterType == 'window-length':
+                vals = self.getMetrics(shps, 'Length')
+            elif obj.FilterType == 'window-distance':
+                vals = self.getMetrics(shps, 'distance', obj.Stencil.Shape)
             
             maxval = max(vals)
             if obj.Stencil:
                 if obj.FilterType == 'window-volume':
-                    maxval = obj.Stencil.Shape.Volume
+                    maxval = self.getMetrics([obj.Stencil.Shape], 'Volume')[0]
                 elif obj.FilterType == 'window-area':
-                    maxval = obj.Stencil.Shape.Area
+                    maxval = self.getMetrics([obj.Stencil.Shape], 'Area')[0]
                 elif obj.FilterType == 'window-length':
-                    maxval = obj.Stencil.Shape.Length
+                    maxval = self.getMetrics([obj.Stencil.Shape], 'Length')[0]
             if obj.OverrideMaxVal:
                 maxval = obj.OverrideMaxVal
             
@@ -164,7 +215,10 @@ class _CompoundFilter:
             raise ValueError('Nothing passes through the filter') #Feeding empty compounds to FreeCAD seems to cause rendering issues, otherwise it would have been a good idea to output nothing.
         
         if len(rst) > 1:
-            obj.Shape = Part.makeCompound(rst)
+            sh = ShapeCopy.reuseCompound(screen(obj.Base).Shape, rst, obj.Placement)
+            if sh is None:
+                sh = Part.makeCompound(rst)
+            obj.Shape = sh
         else: # don't make compound of one shape, output it directly
             sh = rst[0]
             sh = ShapeCopy.transformCopy(sh)
@@ -173,6 +227,14 @@ class _CompoundFilter:
             
         return
         
+    def __getstate__(self):
+        return {'Type': self.Type} # metrics cache is not to be saved
+
+    def __setstate__(self,state):
+        if state:
+            self.__dict__.update(state)
+        return None
+        
         
 class _ViewProviderCompoundFilter:
     "A View Provider for the CompoundFilter object"
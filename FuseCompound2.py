@@ -28,6 +28,150 @@ __title__="FuseCompound module for FreeCAD"
 __author__ = "DeepSOIC"
 __url__ = ""
 
+try:
+    from lattice2Subsequencer import HashableShape
+except Exception:
+    HashableShape = None # fused results will not be cached
+
+# -------------------------- common stuff --------------------------------------------------
+
+def findClusters(shapes):
+    '''findClusters(shapes): groups shapes that may intersect, directly or through other 
+    shapes, by testing overlaps of their (slightly enlarged) bounding boxes. Returns list of 
+    clusters, each cluster is a sorted list of indexes into shapes.'''
+    n = len(shapes)
+    lo = []
+    hi = []
+    for sh in shapes:
+        bb = sh.BoundBox
+        margin = bb.DiagonalLength * 0.01 + DistConfusion # BoundBox can be a bit smaller than the shape
+        lo.append((bb.XMin - margin, bb.YMin - margin, bb.ZMin - margin))
+        hi.append((bb.XMax + margin, bb.YMax + margin, bb.ZMax + margin))
+    
+    # union-find
+    parent = list(range(n))
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    # sweep and prune, along the axis of largest spread
+    if n > 1:
+        axis = max(range(3), key= lambda k: max(h[k] for h in hi) - min(l[k] for l in lo))
+        active = []
+        for i in sorted(range(n), key= lambda i: lo[i][axis]):
+            active = [j for j in active if hi[j][axis] >= lo[i][axis]]
+            for j in active:
+                if all(lo[i][k] <= hi[j][k] and lo[j][k] <= hi[i][k] for k in range(3)):
+                    parent[root(i)] = root(j)
+            active.append(i)
+    
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(root(i), []).append(i)
+    return sorted(clusters.values())
+
+def fuseShapes(shps, refine):
+    '''fuseShapes(shps, refine): fuses a list of shapes in one go.'''
+    if len(shps) == 1:
+        return shps[0]
+    rst = shps[0].multiFuse(shps[1:])
+    if refine:
+        rst = rst.removeSplitter()
+    return rst
+
+def keepCached(cache, key):
+    '''keepCached(cache, key): copies entry key from old into new cache (see fuseByClusters), 
+    along with the entries of the partial results it was made of.'''
+    stack = [key]
+    while stack:
+        key = stack.pop()
+        if key in cache[1]:
+            continue
+        entry = cache[0][key]
+        cache[1][key] = entry
+        stack.extend(entry[1])
+
+def fusePartitioned(shps, indices, cache = None, leaf_size = 32):
+    '''fusePartitioned(shps, indices, cache = None, leaf_size = 32): fuses shapes shps[i] for i 
+    in indices. The shapes are split in halves by position, recursively, until there are no more 
+    than leaf_size of them in a partition. Partitions are fused, and then merged by fusing the 
+    results pairwise. Returns tuple (shape, keys): the fused shape, not refined, and cache keys 
+    of the two halves it was merged from (empty tuple if the shapes were fused in one go).
+    
+    cache: see fuseByClusters. All the partial results are cached (except the final one), so if 
+    one shape changes, only its partition and the merges above it are redone.'''
+    centers = {}
+    for i in indices:
+        c = shps[i].BoundBox.Center
+        centers[i] = (c.x, c.y, c.z)
+
+    def fuseNode(ids, is_root):
+        # returns (shape, child keys, key)
+        key = None
+        if cache is not None and not is_root:
+            key = tuple([HashableShape(shps[i]) for i in ids])
+            entry = cache[0].get(key)
+            if entry is not None:
+                keepCached(cache, key)
+                return (entry[0], entry[1], key)
+        if len(ids) <= leaf_size:
+            rst = fuseShapes([shps[i] for i in ids], False)
+            child_keys = ()
+        else:
+            axis = max(range(3), key= lambda k: max(centers[i][k] for i in ids) - min(centers[i][k] for i in ids))
+            ids_sorted = sorted(ids, key= lambda i: centers[i][axis])
+            half = len(ids_sorted) // 2
+            halves = [fuseNode(sorted(ids_sorted[0:half]), False), fuseNode(sorted(ids_sorted[half:]), False)]
+            rst = fuseShapes([h[0] for h in halves], False)
+            child_keys = tuple([h[2] for h in halves if h[2] is not None])
+        if key is not None:
+            cache[1][key] = (rst, child_keys)
+        return (rst, child_keys, key)
+    
+    (rst, child_keys, key) = fuseNode(sorted(indices), True)
+    return (rst, child_keys)
+
+def fuseByClusters(shps, refine, cache = None, leaf_size = 32):
+    '''fuseByClusters(shps, refine, cache = None, leaf_size = 32): fuses a list of shapes, by 
+    fusing independently the groups of shapes that can intersect (see findClusters). Shapes that 
+    are apart from everything are passed through untouched. Clusters of more than leaf_size 
+    shapes are fused by spatial partitions (see fusePartitioned). Returns a compound, or a single 
+    shape if everything fused into one.
+    
+    cache: optional tuple of two dicts (old, new). Fused clusters and partitions are looked up in 
+    old, keyed by tuple of HashableShape of the shapes that went into them; values are tuples 
+    (shape, keys of partial results the shape was merged from). All the results used, including 
+    partial results of the clusters taken from old, are written into new. The caller is 
+    responsible for discarding the cache if refine changes.'''
+    pieces = []
+    for cluster in findClusters(shps):
+        rst = None
+        if cache is not None:
+            key = tuple([HashableShape(shps[i]) for i in cluster])
+            entry = cache[0].get(key)
+            if entry is not None:
+                keepCached(cache, key)
+                rst = entry[0]
+        if rst is None:
+            child_keys = ()
+            if len(cluster) > leaf_size:
+                (rst, child_keys) = fusePartitioned(shps, cluster, cache, leaf_size)
+                if refine:
+                    rst = rst.removeSplitter()
+            else:
+                rst = fuseShapes([shps[i] for i in cluster], refine)
+            if cache is not None:
+                cache[1][key] = (rst, child_keys)
+        if rst.ShapeType == 'Compound':
+            pieces.extend(rst.childShapes())
+        else:
+            pieces.append(rst)
+    if len(pieces) == 1:
+        return pieces[0]
+    return Part.makeCompound(pieces)
+
 # -------------------------- document object --------------------------------------------------
 
 def makeFuseCompound(name):
@@ -47,21 +191,59 @@ class _FuseCompound:
         obj.addProperty("App::PropertyBool","Refine","FuseCompound","True = refine resulting shape. False = output as is.")
         obj.addProperty("App::PropertyInteger","recomputeQuota","FuseCompound","recompute limiter. Will decrease by one each time it recomputes. Setting to zero disables recomputes. Setting negative makes recomputes unlimited.")
         obj.recomputeQuota = -1
+        self.assureProperties(obj)
+        obj.Mode = 'Clusters'
         obj.Proxy = self
         
-
+    def assureProperties(self, obj):
+        if not hasattr(obj, "Mode"):
+            obj.addProperty("App::PropertyEnumeration","Mode","FuseCompound","All at once: fuse all children in one boolean operation. Clusters: fuse only groups of children whose bounding boxes overlap, each separately (faster for arrays where only neighbors intersect). Big groups are fused by spatial partitions, so that changing one child refuses only its partition.")
+            obj.Mode = ['All at once', 'Clusters']
+            obj.Mode = 'All at once' #for documents made before the property existed
+        
     def execute(self,obj):
+        self.assureProperties(obj)
         rst = None
         shps = screen(obj.Base).Shape.childShapes()
         if len(shps) > 1:
-            rst = shps[0].multiFuse(shps[1:])
-            if obj.Refine:
-                rst = rst.removeSplitter()
+            # Fused results are remembered, keyed by the children that went into them, so that 
+            # changing one child refuses only its cluster (in Clusters mode; in big clusters, 
+            # only its partition, plus merging). Results depend on the settings, so the cache 
+            # is dropped if they change.
+            settings = (obj.Mode, bool(obj.Refine))
+            cache = None
+            if HashableShape is not None:
+                old = getattr(self, '_fuseCache', None)
+                if old is None or not (old[0] == settings):
+                    old = (settings, {})
+                cache = (old[1], {})
+            if obj.Mode == 'Clusters':
+                rst = fuseByClusters(shps, obj.Refine, cache)
+            else:
+                if cache is not None:
+                    key = tuple([HashableShape(sh) for sh in shps])
+                    entry = cache[0].get(key)
+                    if entry is None:
+                        entry = (fuseShapes(shps, obj.Refine), ())
+                    cache[1][key] = entry
+                    rst = entry[0]
+                else:
+                    rst = fuseShapes(shps, obj.Refine)
+            if cache is not None:
+                self._fuseCache = (settings, cache[1]) # only what's in use is kept
             obj.Shape = rst
         else:
             obj.Shape = shps[0]
         return
         
+    def __getstate__(self):
+        return {'Type': self.Type} # fuse cache is not to be saved
+
+    def __setstate__(self,state):
+        if state:
+            self.__dict__.update(state)
+        return None
+        
         
 class _ViewProviderFuseCompound:
     "A View Provider for the FuseCompound object"
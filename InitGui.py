@@ -59,8 +59,17 @@ class Lattice2Workbench (Workbench):
             + Lattice2.ArrayFeatures.LinearArray.exportedCommands
             + Lattice2.ArrayFeatures.PolarArray2.exportedCommands
             + Lattice2.ArrayFeatures.ArrayFromShape.exportedCommands
+            + Lattice2.ArrayFeatures.ArrayFromLink.exportedCommands
+            + Lattice2.ArrayFeatures.VoxelFill.exportedCommands
+            + Lattice2.ArrayFeatures.SurfaceSampling.exportedCommands
+            + Lattice2.ArrayFeatures.PathSampling.exportedCommands
             + Lattice2.ArrayFeatures.Invert.exportedCommands
             + Lattice2.ArrayFeatures.JoinArrays.exportedCommands
+            + Lattice2.ArrayFeatures.RemoveDuplicates.exportedCommands
+            + Lattice2.ArrayFeatures.SetOperation.exportedCommands
+            + Lattice2.ArrayFeatures.SpatialSort.exportedCommands
+            + Lattice2.ArrayFeatures.Struts.exportedCommands
+            + Lattice2.ArrayFeatures.Statistics.exportedCommands
             + Lattice2.ArrayFeatures.ArrayFilter.exportedCommands
             + Lattice2.ArrayFeatures.ProjectArray.exportedCommands
             + Lattice2.ArrayFeatures.InterpolateGroup.exportedCommands
@@ -79,6 +88,7 @@ class Lattice2Workbench (Workbench):
             + Lattice2.CompoundFeatures.FuseCompound.exportedCommands        
             + Lattice2.CompoundFeatures.Slice.exportedCommands        
             + Lattice2.CompoundFeatures.BoundBox.exportedCommands
+            + Lattice2.CompoundFeatures.Interference.exportedCommands
             + Lattice2.CompoundFeatures.ShapeString.exportedCommands
             + Lattice2.CompoundFeatures.SeriesGroup.exportedCommands
         )
@@ -95,6 +105,7 @@ class Lattice2Workbench (Workbench):
             + Lattice2.GuiTools.Inspect.exportedCommands
             + Lattice2.GuiTools.SubstituteObject.exportedCommands
             + Lattice2.GuiTools.ViewFromPlacement.exportedCommands
+            + Lattice2.GuiTools.ExportArray.exportedCommands
         )
         self.appendToolbar('Lattice2GuiTools', cmdsGuiTools)
         self.appendMenu('Lattice2', cmdsGuiTools + Lattice2.GuiTools.ExposeLinkSub.exportedCommands)
@@ -14,4 +14,13 @@ import lattice2PopulateCopies       as PopulateCopies
 import lattice2ProjectArray         as ProjectArray    
 import lattice2Resample             as Resample        
 import lattice2ScLERP               as ScLERP
-import lattice2Mirror               as Mirror
\ No newline at end of file
+import lattice2Mirror               as Mirror
+import lattice2RemoveDuplicates     as RemoveDuplicates
+import lattice2SetOperation         as SetOperation
+import lattice2SpatialSort          as SpatialSort
+import lattice2Struts               as Struts
+import lattice2VoxelFill            as VoxelFill
+import lattice2SurfaceSampling      as SurfaceSampling
+import lattice2PathSampling         as PathSampling
+import lattice2ArrayFromLink        as ArrayFromLink
+import lattice2Statistics           as Statistics
\ No newline at end of file
@@ -9,4 +9,5 @@ import lattice2MakeCompound     as MakeCompound
 import lattice2ParaSeries       as ParaSeries
 import lattice2TopoSeries       as TopoSeries
 import lattice2SeriesGroup      as SeriesGroup
-import lattice2Slice            as Slice
\ No newline at end of file
+import lattice2Slice            as Slice
+import lattice2Interference     as Interference
\ No newline at end of file
@@ -2,4 +2,5 @@ import lattice2Inspect           as Inspect
 import lattice2RecomputeLocker   as RecomputeLocker 
 import lattice2SubstituteObject  as SubstituteObject
 import lattice2ExposeLinkSub     as ExposeLinkSub
-import lattice2ViewFromPlacement as ViewFromPlacement
\ No newline at end of file
+import lattice2ViewFromPlacement as ViewFromPlacement
+import lattice2ExportArray       as ExportArray
\ No newline at end of file
@@ -76,6 +76,10 @@ class LatticeArrayFilter(lattice2BaseFeature.LatticeFeature):
         if not lattice2BaseFeature.isObjectLattice(screen(obj.Base)):
             lattice2Executer.warning(obj,"A lattice object is expected as Base, but a generic shape was provided. It will be treated as a lattice object; results may be unexpected.")
 
+        if obj.FilterType == 'bypass':
+            if lattice2BaseFeature.passThroughLattice(obj, screen(obj.Base)):
+                return "suppress"
+
         output = [] #variable to receive the final list of placements
         leaves = LCE.AllLeaves(screen(obj.Base).Shape)
         input = [leaf.Placement for leaf in leaves]
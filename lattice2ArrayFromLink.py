@@ -0,0 +1,165 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice ArrayFromLink object: reads placements of an App::Link array or Draft array, without generating shapes."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import FreeCAD as App
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+
+# -------------------------- common stuff --------------------------------------------------
+
+def isDraftArray(obj):
+    proxy = getattr(obj, 'Proxy', None)
+    return getattr(proxy, 'Type', None) == 'Array' and hasattr(obj, 'ArrayType')
+
+def draftArrayPlacements(obj):
+    '''draftArrayPlacements(obj): computes placements of elements of a non-link Draft array from its parameters.'''
+    try:
+        from draftobjects.array import rect_placements, polar_placements, circ_placements
+    except ImportError:
+        raise ValueError("Draft array of this version of FreeCAD is not supported. Switch the array to link mode, or update FreeCAD.")
+    base_plm = screen(obj.Base).Placement
+    if obj.ArrayType == 'ortho':
+        return rect_placements(base_plm, obj.IntervalX, obj.IntervalY, obj.IntervalZ, obj.NumberX, obj.NumberY, obj.NumberZ)
+    elif obj.ArrayType == 'polar':
+        return polar_placements(base_plm, obj.Center, obj.Angle.Value if hasattr(obj.Angle, 'Value') else obj.Angle, obj.NumberPolar, obj.Axis, getattr(obj, 'IntervalAxis', None))
+    elif obj.ArrayType == 'circular':
+        return circ_placements(base_plm, obj.RadialDistance, obj.TangentialDistance, obj.Axis, obj.Center, obj.NumberCircles, obj.Symmetry)
+    else:
+        raise ValueError("Draft array type not supported: "+str(obj.ArrayType))
+
+def readArrayPlacements(obj):
+    '''readArrayPlacements(obj): returns tuple (placements, source_description, scales). 
+    Placements are in the coordinate system of the array object (i.e. obj.Placement not applied). 
+    scales is a list of scale vectors of elements, or None.'''
+    count = getattr(obj, 'ElementCount', 0)
+    if hasattr(obj, 'PlacementList') and count > 0:
+        elements = getattr(obj, 'ElementList', [])
+        if len(elements) == count:
+            # elements are shown as separate objects; their placements may have been edited directly
+            plms = [el.Placement for el in elements]
+        else:
+            plms = list(obj.PlacementList)[0:count]
+        scales = list(obj.ScaleList)[0:count] if hasattr(obj, 'ScaleList') else None
+        return (plms, 'PlacementList', scales)
+    if isDraftArray(obj):
+        return (draftArrayPlacements(obj), 'Draft array parameters', None)
+    if hasattr(obj, 'PlacementList') and len(obj.PlacementList) > 0:
+        return (list(obj.PlacementList), 'PlacementList', None)
+    if hasattr(obj, 'LinkedObject'):
+        # a plain link is an array of one
+        return ([App.Placement()], 'Link', None)
+    raise ValueError("Object {name} is neither a link array nor a Draft array.".format(name= obj.Name))
+
+# -------------------------- document object --------------------------------------------------
+
+def makeArrayFromLink(name):
+    '''makeArrayFromLink(name): makes an ArrayFromLink object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeArrayFromLink, ViewProviderArrayFromLink)
+
+class LatticeArrayFromLink(lattice2BaseFeature.LatticeFeature):
+    "The Lattice ArrayFromLink object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeArrayFromLink"
+                
+        obj.addProperty("App::PropertyLink","Object","Lattice ArrayFromLink","App::Link array, or Draft array, to read placements from.")
+        
+        obj.addProperty("App::PropertyBool","ApplyObjectPlacement","Lattice ArrayFromLink","If true, placement of the array object itself is applied to placements of elements.")
+        obj.ApplyObjectPlacement = True
+        
+        obj.addProperty("App::PropertyString","Source","Lattice ArrayFromLink","Where the placements were read from.")
+        obj.setEditorMode("Source", 1) # read-only
+
+    def derivedExecute(self,obj):
+        src = screen(obj.Object)
+        (plms, source, scales) = readArrayPlacements(src)
+        obj.Source = source
+        if scales is not None:
+            unit = App.Vector(1,1,1)
+            if any((s - unit).Length > ParaConfusion for s in scales):
+                lattice2Executer.warning(obj, "Some elements of the array are scaled. Placements can't hold scale; it is ignored.")
+        if obj.ApplyObjectPlacement:
+            arr_plm = src.Placement
+            plms = [arr_plm.multiply(plm) for plm in plms]
+        return plms
+
+
+class ViewProviderArrayFromLink(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_ArrayFromShape.svg')
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateArrayFromLink(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create ArrayFromLink")
+    FreeCADGui.addModule("lattice2ArrayFromLink")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2ArrayFromLink.makeArrayFromLink(name='"+name+"')")
+    FreeCADGui.doCommand("f.Object = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("f.Label = 'Placements of ' + f.Object.Label")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandArrayFromLink:
+    "Command to create ArrayFromLink feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_ArrayFromShape.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_ArrayFromLink","Array from link array"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_ArrayFromLink","Array from link array: read placements of an App::Link array or a Draft array, without expanding its shape.")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateArrayFromLink(name = "ArrayFromLink")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_ArrayFromLink", "Please select one object, first. The object must be a link array or a Draft array.", None))
+            mb.setWindowTitle(translate("Lattice2_ArrayFromLink","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_ArrayFromLink', _CommandArrayFromLink())
+
+exportedCommands = ['Lattice2_ArrayFromLink']
+
+# -------------------------- /Gui command --------------------------------------------------
@@ -33,6 +33,7 @@ import lattice2CompoundExplorer as LCE
 import lattice2Markers
 import lattice2Executer
 from lattice2ShapeCopy import shallowCopy
+from lattice2GeomUtils import PlacementsFuzzyCompare
 
 
 def getDefLatticeFaceColor():
@@ -350,6 +351,37 @@ def makeMoveFromTo(plmFrom, plmTo):
     from one placement to another placement'''
     return plmTo.multiply(plmFrom.inverse())
 
+def passThroughLattice(obj, base):
+    '''passThroughLattice(obj, base): fast path for lattice features whose output array is 
+    exactly the array of base (bypass and identity modes). If the markers would come out the 
+    same, the shape of base is reused by reference, with obj's Placement applied to the copy, 
+    instead of rebuilding the marker compound. Returns True if the shape was assigned (then 
+    derivedExecute should return "suppress"), or False if the placements have to be processed 
+    as usual.'''
+    
+    if not isObjectLattice(base):
+        return False
+    for prop in ["MarkerSize", "MarkerShape", "ExposePlacement", "NumElements"]:
+        if not hasattr(base, prop):
+            return False
+    if obj.ExposePlacement or base.ExposePlacement:
+        return False
+    if abs(obj.MarkerSize - base.MarkerSize) > DistConfusion or obj.MarkerShape != base.MarkerShape:
+        return False
+    sh = base.Shape
+    if sh.isNull() or sh.ShapeType != "Compound":
+        return False
+    if not PlacementsFuzzyCompare(sh.Placement, App.Placement()):
+        return False
+    
+    sh = shallowCopy(sh)
+    sh.Placement = obj.Placement
+    obj.Shape = sh
+    obj.NumElements = base.NumElements
+    if obj.isLattice == 'Auto-Off':
+        obj.isLattice = 'Auto-On'
+    return True
+
 def getPlacementsList(documentObject, context = None, suppressWarning = False):
     '''getPlacementsList(documentObject, context = None): extract list of placements 
     from an array object. Context is an object to report as context, when displaying 
@@ -69,7 +69,25 @@ def scaledBoundBox(bb, scale):
     bb2.ZMax = (bb.ZMax - cnt.z)*scale + cnt.z
     return bb2
     
+def boundBoxOfPoints(points):
+    """boundBoxOfPoints(points): returns BoundBox of a list of vectors."""
+    bb = FreeCAD.BoundBox()
+    for pnt in points:
+        bb.add(pnt)
+    return bb
+
 def getPrecisionBoundBox(shape):
+    """getPrecisionBoundBox(shape): returns a tight bounding box of shape. Uses OCC's optimal 
+    bounding box algorithm (without tolerance enlargement) if available, otherwise falls 
+    back to getPrecisionBoundBoxByDistances."""
+    if hasattr(shape, 'optimalBoundingBox'): # FreeCAD 0.19+
+        try:
+            return shape.optimalBoundingBox(True, False)
+        except Exception as err:
+            Executer.warning(None, "optimalBoundingBox failed ({err}), computing precise bounding box by distances".format(err= str(err)))
+    return getPrecisionBoundBoxByDistances(shape)
+
+def getPrecisionBoundBoxByDistances(shape):
     # First, we need a box that for sure contains the object.
     # We use imprecise bound box, scaled up twice. The scaling
     # is required, because the imprecise bound box is often a
@@ -135,11 +153,20 @@ class _BoundBox:
         obj.addProperty("App::PropertyVector",prop,"Info","Center of bounding box")
         obj.setEditorMode(prop, 1) # set read-only
         
+        self.assureProperties(obj)
+        obj.PlacementsOnly = True # default for new features. Old ones keep boxes including marker extents.
+        
         obj.Proxy = self
         
+    def assureProperties(self, obj):
+        '''Adds properties that might be missing, because of loaded project made with older version. Handles version compatibility.'''
+        # False: old features keep making the box of markers
+        LBF.assureProperty(obj, "App::PropertyBool", "PlacementsOnly", False, "BoundBox", "Applies if ShapeLink is an array of placements, used as a whole. If true, the box encloses positions of placements, taken straight from the array (fast). Extents of markers are not included, so the box of a planar array is flat. If false, the box of marker shapes is made.")
 
     def execute(self,obj):
+        self.assureProperties(obj)
         base = screen(obj.ShapeLink).Shape
+        base_is_lattice = LBF.isObjectLattice(screen(obj.ShapeLink))
         if obj.CompoundTraversal == "Use as a whole":
             baseChildren = [base]
         else:
@@ -184,6 +211,11 @@ class _BoundBox:
                 orients[i] = None
         
         from lattice2ShapeCopy import shallowCopy
+        from lattice2Subsequencer import HashableShape
+        # precise boxes of children are kept between recomputes. Keys include location, so
+        # moved children are recomputed. Only the boxes in use are kept.
+        oldcache = getattr(self, '_bbcache', {})
+        bbcache = {}
         boxes_shapes = []
         for i in range(N):
             child = baseChildren[i]
@@ -191,10 +223,24 @@ class _BoundBox:
                 child = shallowCopy(child)
                 child.Placement = orients[i].inverse().multiply(child.Placement)
 
-            if obj.Precision:
-                bb = getPrecisionBoundBox(child)
-            else:
-                bb = child.BoundBox
+            bb = None
+            if base_is_lattice and obj.CompoundTraversal == "Use as a whole" and obj.PlacementsOnly:
+                # box of marker positions, straight from placements
+                points = [leaf.Placement.Base for leaf in LCE.AllLeaves(child)]
+                if len(points) > 1:
+                    bb = boundBoxOfPoints(points)
+                    if bb.DiagonalLength < DistConfusion:
+                        bb = None # all placements coincide. Fall back to box of the marker.
+            if bb is None:
+                if obj.Precision:
+                    key = HashableShape(child)
+                    bb = oldcache.get(key)
+                    if bb is None:
+                        bb = getPrecisionBoundBox(child)
+                    bbcache[key] = bb
+                    bb = App.BoundBox(bb)
+                else:
+                    bb = child.BoundBox
                 
             bb = scaledBoundBox(bb, obj.ScaleFactor)
             bb.enlarge(obj.Padding)
@@ -221,6 +267,7 @@ class _BoundBox:
             obj.Shape = boxes_shapes[0]
         else:
             obj.Shape = Part.makeCompound(boxes_shapes)
+        self._bbcache = bbcache
 
     def __getstate__(self):
         return None
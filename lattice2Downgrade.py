@@ -24,6 +24,7 @@
 from lattice2Common import *
 import lattice2Markers as markers
 import lattice2CompoundExplorer as LCE
+import lattice2ShapeCopy as ShapeCopy
 
 import math
 
@@ -132,7 +133,10 @@ class _latticeDowngrade:
             obj.Shape = markers.getNullShapeShape(scale)
             raise ValueError('Downgrade output is null') #Feeding empty compounds to FreeCAD seems to cause rendering issues, otherwise it would have been a good idea to output nothing.
         
-        obj.Shape = Part.makeCompound(rst)
+        sh = ShapeCopy.reuseCompound(shp, rst, obj.Placement) # nothing to do, if shp is already made of the elements requested
+        if sh is None:
+            sh = Part.makeCompound(rst)
+        obj.Shape = sh
         return
         
         
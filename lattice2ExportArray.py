@@ -0,0 +1,204 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice ExportArray: writes copies of shapes at placements of an array into STL or 3MF file, without making the copies."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import struct
+import zipfile
+import tempfile
+import os
+
+
+from lattice2Common import *
+import lattice2BaseFeature
+
+# -------------------------- common stuff --------------------------------------------------
+
+class SourceMesh(object):
+    '''SourceMesh(shape, deflection): tessellation of a shape (in global coordinates, i.e. 
+    with shape's placement applied). If deflection is zero, it is chosen automatically.'''
+    
+    def __init__(self, shape, deflection = 0.0):
+        if deflection < DistConfusion:
+            deflection = max(shape.BoundBox.DiagonalLength * 0.005, DistConfusion)
+        (pts, tris) = shape.tessellate(deflection)
+        self.points = [(p.x, p.y, p.z) for p in pts]
+        self.triangles = [tuple(tri) for tri in tris]
+        
+def _matrixRows(plm):
+    m = plm.toMatrix()
+    return ((m.A11, m.A12, m.A13, m.A14), (m.A21, m.A22, m.A23, m.A24), (m.A31, m.A32, m.A33, m.A34))
+
+def _transformPoints(rows, points):
+    (r0, r1, r2) = rows
+    return [(r0[0]*x + r0[1]*y + r0[2]*z + r0[3], 
+             r1[0]*x + r1[1]*y + r1[2]*z + r1[3], 
+             r2[0]*x + r2[1]*y + r2[2]*z + r2[3]) for (x, y, z) in points]
+
+def _normal(a, b, c):
+    e1 = (b[0]-a[0], b[1]-a[1], b[2]-a[2])
+    e2 = (c[0]-a[0], c[1]-a[1], c[2]-a[2])
+    n = (e1[1]*e2[2] - e1[2]*e2[1], e1[2]*e2[0] - e1[0]*e2[2], e1[0]*e2[1] - e1[1]*e2[0])
+    l = (n[0]*n[0] + n[1]*n[1] + n[2]*n[2]) ** 0.5
+    if l < 1e-300:
+        return (0.0, 0.0, 0.0)
+    return (n[0]/l, n[1]/l, n[2]/l)
+
+def exportSTL(filename, sources, placements):
+    '''exportSTL(filename, sources, placements): writes binary STL with a copy of every SourceMesh 
+    in sources at every placement. Triangles are transformed and written one instance at a 
+    time, so memory use does not depend on the number of placements.'''
+    ntris = len(placements) * sum(len(src.triangles) for src in sources)
+    if ntris >= 2**32:
+        raise ValueError("Too many triangles for STL format ({n}).".format(n= ntris))
+    record = struct.Struct('<12fH')
+    f = open(filename, 'wb')
+    try:
+        f.write(b'Lattice2 array export'.ljust(80, b' '))
+        f.write(struct.pack('<I', ntris))
+        for plm in placements:
+            rows = _matrixRows(plm)
+            chunk = []
+            for src in sources:
+                pts = _transformPoints(rows, src.points)
+                for (i, j, k) in src.triangles:
+                    a = pts[i]
+                    b = pts[j]
+                    c = pts[k]
+                    chunk.append(record.pack(*(_normal(a, b, c) + a + b + c + (0,))))
+            f.write(b''.join(chunk))
+    finally:
+        f.close()
+
+_content_types = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>\n')
+
+_rels = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>\n')
+
+def export3MF(filename, sources, placements):
+    '''export3MF(filename, sources, placements): writes 3MF file where every SourceMesh in sources 
+    is stored once, as a resource, and every placement is a build item referencing it with 
+    a transform. The model part is streamed through a temporary file, so memory use does 
+    not depend on the number of placements.'''
+    fd, tmpname = tempfile.mkstemp(suffix= '.model')
+    os.close(fd)
+    try:
+        f = open(tmpname, 'w')
+        try:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write('<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n')
+            f.write('<resources>\n')
+            for i_src in range(len(sources)):
+                src = sources[i_src]
+                f.write('<object id="{id}" type="model"><mesh><vertices>\n'.format(id= i_src + 1))
+                f.write(''.join(['<vertex x="{0:.9g}" y="{1:.9g}" z="{2:.9g}"/>\n'.format(*p) for p in src.points]))
+                f.write('</vertices><triangles>\n')
+                f.write(''.join(['<triangle v1="{0}" v2="{1}" v3="{2}"/>\n'.format(*t) for t in src.triangles]))
+                f.write('</triangles></mesh></object>\n')
+            f.write('</resources>\n<build>\n')
+            for plm in placements:
+                (r0, r1, r2) = _matrixRows(plm)
+                # 3MF uses row-vector convention: the rotation part is transposed, translation is the last row
+                transform = ' '.join(['{0:.12g}'.format(v) for v in (r0[0], r1[0], r2[0], r0[1], r1[1], r2[1], r0[2], r1[2], r2[2], r0[3], r1[3], r2[3])])
+                f.write(''.join(['<item objectid="{id}" transform="{tr}"/>\n'.format(id= i_src + 1, tr= transform) for i_src in range(len(sources))]))
+            f.write('</build>\n</model>\n')
+        finally:
+            f.close()
+        zf = zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED)
+        try:
+            zf.writestr('[Content_Types].xml', _content_types)
+            zf.writestr('_rels/.rels', _rels)
+            zf.write(tmpname, '3D/3dmodel.model')
+        finally:
+            zf.close()
+    finally:
+        os.remove(tmpname)
+
+def exportArray(filename, shapes, placements, deflection = 0.0):
+    '''exportArray(filename, shapes, placements, deflection = 0.0): writes copies of shapes at 
+    every placement (like Populate with copies does) into a file. Format is chosen by file 
+    extension: .stl or .3mf. Each shape is tessellated once.'''
+    ext = os.path.splitext(filename)[1].lower()
+    sources = [SourceMesh(sh, deflection) for sh in shapes]
+    if ext == '.stl':
+        exportSTL(filename, sources, placements)
+    elif ext == '.3mf':
+        export3MF(filename, sources, placements)
+    else:
+        raise ValueError("File format not supported: '{ext}'. Use .stl or .3mf.".format(ext= ext))
+
+# -------------------------- Gui command --------------------------------------------------
+
+def cmdExportArray():
+    sel = FreeCADGui.Selection.getSelectionEx()
+    (lattices, shapes) = lattice2BaseFeature.splitSelection(sel)
+    if len(shapes) == 0 or len(lattices) != 1:
+        raise SelectionError("Bad selection", "Please select some shapes, and one array of placements, first.")
+    filename = QtGui.QFileDialog.getSaveFileName(None, "Export array", "", "3MF (*.3mf);;STL (*.stl)")
+    if type(filename) is tuple: # PySide returns (name, filter)
+        filename = filename[0]
+    if not filename:
+        return
+    FreeCADGui.addModule("lattice2ExportArray")
+    FreeCADGui.addModule("lattice2BaseFeature")
+    FreeCADGui.doCommand("lattice2ExportArray.exportArray({fn}, [{shapes}], lattice2BaseFeature.getPlacementsList(App.ActiveDocument.{lat}))"
+                         .format(fn= repr(filename), 
+                                 shapes= ", ".join(["App.ActiveDocument."+s.ObjectName+".Shape" for s in shapes]),
+                                 lat= lattices[0].ObjectName))
+
+class _CommandExportArray:
+    "Command to export array of copies of shapes to STL or 3MF"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_PopulateCopies_Normal.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_ExportArray","Export array to STL/3MF..."),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_ExportArray","Export array: write copies of selected shapes at every placement of selected array into STL or 3MF file, without making the copies. 3MF file stores each shape once.")}
+        
+    def Activated(self):
+        try:
+            cmdExportArray()
+        except Exception as err:
+            msgError(err)
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_ExportArray', _CommandExportArray())
+
+exportedCommands = ['Lattice2_ExportArray']
+
+# -------------------------- /Gui command --------------------------------------------------
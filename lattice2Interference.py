@@ -0,0 +1,444 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice Interference object: finds pairs of intersecting children of a compound (e.g. a populated array)."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import FreeCAD as App
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Markers
+import lattice2ShapeCopy as ShapeCopy
+from lattice2Subsequencer import HashableShape
+
+# -------------------------- common stuff --------------------------------------------------
+
+def placementMatrix(plm):
+    '''placementMatrix(plm): returns (R, t), rotation matrix as tuple of rows, and translation as tuple.'''
+    m = plm.toMatrix()
+    return (((m.A11, m.A12, m.A13), (m.A21, m.A22, m.A23), (m.A31, m.A32, m.A33)), (m.A14, m.A24, m.A34))
+
+def transformPoint(R, t, p):
+    return tuple(R[k][0]*p[0] + R[k][1]*p[1] + R[k][2]*p[2] + t[k] for k in range(3))
+
+def boxFromBounds(lo, hi):
+    '''boxFromBounds(lo, hi): returns (center, half_extents) of an axis-aligned box.'''
+    return (tuple((lo[k] + hi[k]) * 0.5 for k in range(3)), tuple((hi[k] - lo[k]) * 0.5 for k in range(3)))
+
+def obbOverlap(ca, ha, cb, R, hb, tol):
+    '''obbOverlap(ca, ha, cb, R, hb, tol): separating axis test of box A (axis-aligned, center 
+    ca, half extents ha) against box B (center cb, half extents hb, axes are columns of R). 
+    Both are in the coordinate system of A. Boxes are enlarged by tol. Returns True if boxes 
+    may overlap.'''
+    ha = (ha[0] + tol, ha[1] + tol, ha[2] + tol)
+    t = (cb[0] - ca[0], cb[1] - ca[1], cb[2] - ca[2])
+    aR = [[abs(R[i][j]) + ParaConfusion for j in range(3)] for i in range(3)]
+    for i in range(3):
+        if abs(t[i]) > ha[i] + hb[0]*aR[i][0] + hb[1]*aR[i][1] + hb[2]*aR[i][2]:
+            return False
+    for j in range(3):
+        if abs(t[0]*R[0][j] + t[1]*R[1][j] + t[2]*R[2][j]) > ha[0]*aR[0][j] + ha[1]*aR[1][j] + ha[2]*aR[2][j] + hb[j]:
+            return False
+    for i in range(3):
+        i1 = (i+1) % 3
+        i2 = (i+2) % 3
+        for j in range(3):
+            j1 = (j+1) % 3
+            j2 = (j+2) % 3
+            ra = ha[i1]*aR[i2][j] + ha[i2]*aR[i1][j]
+            rb = hb[j1]*aR[i][j2] + hb[j2]*aR[i][j1]
+            if abs(t[i2]*R[i1][j] - t[i1]*R[i2][j]) > ra + rb:
+                return False
+    return True
+
+def relativeTransform(mat_a, mat_b):
+    '''relativeTransform(mat_a, mat_b): matrices (R, t) of two instances. Returns (R, t) 
+    that maps local coordinates of b into local coordinates of a.'''
+    (Ra, ta) = mat_a
+    (Rb, tb) = mat_b
+    # inverse of a: R^T, -R^T*t
+    d = (tb[0] - ta[0], tb[1] - ta[1], tb[2] - ta[2])
+    R = tuple(tuple(Ra[0][i]*Rb[0][j] + Ra[1][i]*Rb[1][j] + Ra[2][i]*Rb[2][j] for j in range(3)) for i in range(3))
+    t = tuple(Ra[0][i]*d[0] + Ra[1][i]*d[1] + Ra[2][i]*d[2] for i in range(3))
+    return (R, t)
+
+class BVH(object):
+    '''BVH(points, triangles, leaf_size = 8): bounding volume hierarchy of axis-aligned boxes 
+    over triangles of a tessellation. Nodes are stored in list self.nodes as tuples (center, 
+    half_extents, child1, child2); child indexes are None for leaves. Root is node 0.'''
+    
+    def __init__(self, points, triangles, leaf_size = 8):
+        self.nodes = []
+        items = []
+        for tri in triangles:
+            corners = [points[i] for i in tri]
+            lo = tuple(min(c[k] for c in corners) for k in range(3))
+            hi = tuple(max(c[k] for c in corners) for k in range(3))
+            items.append((lo, hi))
+        self.leaf_size = leaf_size
+        if items:
+            self._build(items)
+        
+    def _build(self, items):
+        lo = tuple(min(it[0][k] for it in items) for k in range(3))
+        hi = tuple(max(it[1][k] for it in items) for k in range(3))
+        (c, h) = boxFromBounds(lo, hi)
+        i_node = len(self.nodes)
+        self.nodes.append(None)
+        if len(items) <= self.leaf_size:
+            self.nodes[i_node] = (c, h, None, None)
+            return i_node
+        axis = max(range(3), key= lambda k: h[k])
+        items.sort(key= lambda it: it[0][axis] + it[1][axis])
+        mid = len(items) // 2
+        ch1 = self._build(items[:mid])
+        ch2 = self._build(items[mid:])
+        self.nodes[i_node] = (c, h, ch1, ch2)
+        return i_node
+        
+    def overlaps(self, other, R, t, tol):
+        '''overlaps(other, R, t, tol): tests if any leaf box of self overlaps any leaf box of 
+        other, where other is transformed by (R, t) into coordinate system of self.'''
+        if not self.nodes or not other.nodes:
+            return False
+        stack = [(0, 0)]
+        while stack:
+            (ia, ib) = stack.pop()
+            (ca, ha, a1, a2) = self.nodes[ia]
+            (cb, hb, b1, b2) = other.nodes[ib]
+            if not obbOverlap(ca, ha, transformPoint(R, t, cb), R, hb, tol):
+                continue
+            if a1 is None and b1 is None:
+                return True
+            if b1 is None or (a1 is not None and sum(ha) >= sum(hb)):
+                stack.append((a1, ib))
+                stack.append((a2, ib))
+            else:
+                stack.append((ia, b1))
+                stack.append((ia, b2))
+        return False
+
+    def overlapsBox(self, c, h, R, tol):
+        '''overlapsBox(c, h, R, tol): tests if any leaf box of self overlaps box with center c, 
+        half extents h and axes being columns of R, given in coordinate system of self.'''
+        if not self.nodes:
+            return False
+        stack = [0]
+        while stack:
+            (ca, ha, a1, a2) = self.nodes[stack.pop()]
+            if not obbOverlap(ca, ha, c, R, h, tol):
+                continue
+            if a1 is None:
+                return True
+            stack.append(a1)
+            stack.append(a2)
+        return False
+
+def hasLooseElements(shape):
+    '''hasLooseElements(shape): tests if shape has edges or vertices that don't belong to any 
+    face. These are missing from tessellation.'''
+    faces = shape.Faces
+    if len(faces) == 0:
+        return len(shape.Vertexes) > 0
+    face_edges = set()
+    face_vertices = set()
+    for f in faces:
+        face_edges.update([HashableShape(e) for e in f.Edges])
+        face_vertices.update([HashableShape(v) for v in f.Vertexes])
+    return ( any(HashableShape(e) not in face_edges for e in shape.Edges)
+             or any(HashableShape(v) not in face_vertices for v in shape.Vertexes) )
+
+class SourceInfo(object):
+    '''SourceInfo(shape, deflection): precomputed data of a shape, in its own coordinate 
+    system (placement of shape is ignored). Shared by all instances of the shape.'''
+    
+    def __init__(self, shape, deflection):
+        bb = shape.BoundBox
+        (self.center, self.half) = boxFromBounds((bb.XMin, bb.YMin, bb.ZMin), (bb.XMax, bb.YMax, bb.ZMax))
+        self.has_solids = len(shape.Solids) > 0
+        self.has_loose = hasLooseElements(shape) # if True, bvh doesn't cover the whole shape
+        self.deflection = deflection
+        self._shape = shape
+        self._bvh = None
+        
+    @property
+    def bvh(self):
+        if self._bvh is None:
+            if len(self._shape.Faces) > 0:
+                (pts, tris) = self._shape.tessellate(self.deflection)
+                pts = [(p.x, p.y, p.z) for p in pts]
+            else:
+                (pts, tris) = ([], [])
+            self._bvh = BVH(pts, tris)
+        return self._bvh
+
+def sourceKey(shape):
+    '''sourceKey(shape): key to identify shallow copies of the same shape, regardless of placement.'''
+    sh = ShapeCopy.shallowCopy(shape)
+    sh.Placement = App.Placement()
+    return HashableShape(sh)
+
+class StencilInfo(SourceInfo):
+    '''StencilInfo(shape, deflection = None): precomputed data of a stencil shape, for quickly 
+    testing many shapes for touching it. Unlike SourceInfo, keeps track of placement of shape.'''
+    
+    def __init__(self, shape, deflection = None):
+        if not deflection:
+            deflection = max(shape.BoundBox.DiagonalLength * 0.01, DistConfusion)
+        SourceInfo.__init__(self, sourceKey(shape).Shape, deflection)
+        self.shape = shape
+        self.mat = placementMatrix(shape.Placement)
+        bb = shape.BoundBox
+        self.lo = (bb.XMin, bb.YMin, bb.ZMin)
+        self.hi = (bb.XMax, bb.YMax, bb.ZMax)
+        
+    def touches(self, shape, tolerance, bb = None):
+        '''touches(shape, tolerance, bb = None): returns True if distance from shape to the 
+        stencil is less than tolerance (including containment). Bounding boxes and the 
+        tessellation BVH of the stencil settle most cases; exact distToShape is only computed 
+        for shapes that come close to the surface of the stencil (or for all shapes near the 
+        stencil, if it has edges or vertices that don't belong to faces). bb is the BoundBox of shape, 
+        if known.'''
+        if bb is None:
+            bb = shape.BoundBox
+        # boxes may be inexact by about a deflection, so are enlarged for the tests
+        margin = tolerance + self.deflection + bb.DiagonalLength * 0.01
+        lo = (bb.XMin, bb.YMin, bb.ZMin)
+        hi = (bb.XMax, bb.YMax, bb.ZMax)
+        for k in range(3):
+            if lo[k] > self.hi[k] + margin or self.lo[k] > hi[k] + margin:
+                return False
+        
+        if self.bvh.nodes and not self.has_loose and len(shape.Vertexes) > 0:
+            (R, t) = relativeTransform(self.mat, placementMatrix(App.Placement()))
+            (c, h) = boxFromBounds(lo, hi)
+            if not self.bvh.overlapsBox(transformPoint(R, t, c), h, R, margin):
+                # the shape is away from the surface of the stencil, so it is either inside, or apart
+                return self.has_solids and self.shape.isInside(shape.Vertexes[0].Point, tolerance, True)
+        return shape.distToShape(self.shape)[0] < tolerance
+
+def findInterferences(shapes, level = 'exact', tolerance = 0.0, deflection = None, min_volume = 0.0):
+    '''findInterferences(shapes, level = 'exact', tolerance = 0.0, deflection = None, min_volume = 0.0): 
+    finds pairs of intersecting shapes. Returns list of tuples (i, j, point); i < j; point is 
+    a point inside the overlap (approximate for levels other than 'exact').
+    
+    level: 'bounding boxes' - only oriented bounding boxes are tested; 'tessellation' - 
+    overlaps of boxes are confirmed by tessellation BVH; 'exact' - in addition, Part's 
+    common is computed for each remaining pair (for solids; other shapes, and solids that 
+    don't overlap if tolerance is nonzero, are confirmed by distToShape).'''
+    
+    # shared sources
+    sources = {}
+    inst_source = []
+    inst_mat = []
+    for sh in shapes:
+        key = sourceKey(sh)
+        if key not in sources:
+            defl = deflection if deflection else max(sh.BoundBox.DiagonalLength * 0.01, DistConfusion)
+            sources[key] = SourceInfo(key.Shape, defl)
+        inst_source.append(sources[key])
+        inst_mat.append(placementMatrix(sh.Placement))
+    
+    # world-space axis-aligned boxes of oriented boxes
+    n = len(shapes)
+    lo = []
+    hi = []
+    for i in range(n):
+        src = inst_source[i]
+        (R, t) = inst_mat[i]
+        c = transformPoint(R, t, src.center)
+        h = [abs(R[k][0])*src.half[0] + abs(R[k][1])*src.half[1] + abs(R[k][2])*src.half[2] + tolerance for k in range(3)]
+        lo.append(tuple(c[k] - h[k] for k in range(3)))
+        hi.append(tuple(c[k] + h[k] for k in range(3)))
+    if n < 2:
+        return []
+    
+    # sweep and prune, along the axis of largest spread
+    axis = max(range(3), key= lambda k: max(h[k] for h in hi) - min(l[k] for l in lo))
+    order = sorted(range(n), key= lambda i: lo[i][axis])
+    active = []
+    candidates = []
+    for i in order:
+        active = [j for j in active if hi[j][axis] >= lo[i][axis]]
+        for j in active:
+            if all(lo[i][k] <= hi[j][k] and lo[j][k] <= hi[i][k] for k in range(3)):
+                (a, b) = (i, j) if i < j else (j, i)
+                (R, t) = relativeTransform(inst_mat[a], inst_mat[b])
+                sa = inst_source[a]
+                sb = inst_source[b]
+                if obbOverlap(sa.center, sa.half, transformPoint(R, t, sb.center), R, sb.half, tolerance):
+                    candidates.append((a, b, R, t))
+        active.append(i)
+    candidates.sort(key= lambda c: (c[0], c[1]))
+    
+    result = []
+    for (a, b, R, t) in candidates:
+        point = App.Vector(*[(max(lo[a][k], lo[b][k]) + min(hi[a][k], hi[b][k])) * 0.5 for k in range(3)])
+        if level == 'bounding boxes':
+            result.append((a, b, point))
+            continue
+        sa = inst_source[a]
+        sb = inst_source[b]
+        # loose edges and vertices are not tessellated, so tessellations can't rule such pairs out
+        touching = sa.has_loose or sb.has_loose or sa.bvh.overlaps(sb.bvh, R, t, tolerance)
+        if not touching and sa.has_solids and sb.has_solids:
+            # surfaces don't meet, but one solid can be inside the other
+            shA = shapes[a]
+            shB = shapes[b]
+            touching = ( shA.isInside(shB.Vertexes[0].Point, tolerance, True) 
+                         or shB.isInside(shA.Vertexes[0].Point, tolerance, True) )
+        if not touching:
+            continue
+        if level == 'tessellation':
+            result.append((a, b, point))
+            continue
+        common = None
+        if sa.has_solids and sb.has_solids:
+            common = shapes[a].common(shapes[b])
+            if common.isNull() or common.Volume <= min_volume:
+                common = None
+                if not tolerance > 0:
+                    continue
+                # solids don't overlap, but can still be closer than tolerance
+        if common is not None:
+            point = common.BoundBox.Center
+        else:
+            (dist, pairs, info) = shapes[a].distToShape(shapes[b])
+            if dist > tolerance:
+                continue
+            point = (pairs[0][0] + pairs[0][1]) * 0.5
+        result.append((a, b, point))
+    return result
+
+# -------------------------- document object --------------------------------------------------
+
+def makeInterference(name):
+    '''makeInterference(name): makes an Interference object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeInterference, ViewProviderInterference)
+
+class LatticeInterference(lattice2BaseFeature.LatticeFeature):
+    "The Lattice Interference object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeInterference"
+                
+        obj.addProperty("App::PropertyLink","Base","Lattice Interference","Compound to check, e.g. result of Populate with copies. Children of the compound are tested against each other.")
+        
+        obj.addProperty("App::PropertyEnumeration","CheckLevel","Lattice Interference","bounding boxes: report overlapping oriented bounding boxes. tessellation: confirm by tessellations of shapes. exact: confirm by computing common of shapes (slow, but precise).")
+        obj.CheckLevel = ['bounding boxes', 'tessellation', 'exact']
+        obj.CheckLevel = 'exact'
+        
+        obj.addProperty("App::PropertyLength","Tolerance","Lattice Interference","Shapes closer than this are reported as interfering. Zero means only overlapping shapes are reported.")
+        
+        obj.addProperty("App::PropertyFloat","MinVolume","Lattice Interference","exact check level: overlaps with smaller volume than this are ignored, unless Tolerance is nonzero (then, shapes closer than Tolerance are reported regardless).")
+        obj.MinVolume = DistConfusion
+        
+        obj.addProperty("App::PropertyLength","Deflection","Lattice Interference","Tessellation tolerance, used for the tessellation check level. Zero = automatic.")
+        
+        obj.addProperty("App::PropertyIntegerList","Pairs","Lattice Interference","Indexes of interfering children, flattened list of pairs: i1, j1, i2, j2, ...")
+        obj.setEditorMode("Pairs", 1) # read-only
+        
+        obj.addProperty("App::PropertyInteger","NumPairs","Lattice Interference","Number of interfering pairs found.")
+        obj.setEditorMode("NumPairs", 1) # read-only
+
+    def derivedExecute(self,obj):
+        base = screen(obj.Base)
+        if lattice2BaseFeature.isObjectLattice(base):
+            raise ValueError("Base is an array of placements. Placements have no volume; populate them with shapes first.")
+        sh = base.Shape
+        shapes = sh.childShapes() if sh.ShapeType == 'Compound' else [sh]
+        
+        found = findInterferences(shapes, obj.CheckLevel, float(obj.Tolerance), float(obj.Deflection), obj.MinVolume)
+        
+        pairs = []
+        for (i, j, point) in found:
+            pairs.extend([i, j])
+        obj.Pairs = pairs
+        obj.NumPairs = len(found)
+        
+        plms = [App.Placement(point, App.Rotation()) for (i, j, point) in found]
+        if len(plms) == 0:
+            # no interferences is the good outcome, not an error. Bypass the null-lattice error of base class.
+            obj.NumElements = 0
+            obj.Shape = lattice2Markers.getNullShapeShape(obj.MarkerSize if obj.MarkerSize > DistConfusion else 1.0)
+            return "suppress"
+        return plms
+
+
+class ViewProviderInterference(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_BoundBox_Compound.svg')
+    
+    def claimChildren(self):
+        return []
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateInterference(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create Interference")
+    FreeCADGui.addModule("lattice2Interference")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2Interference.makeInterference(name='"+name+"')")
+    FreeCADGui.doCommand("f.Base = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandInterference:
+    "Command to create Interference feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_BoundBox_Compound.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_Interference","Interference check"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_Interference","Lattice Interference: find pairs of intersecting children of a compound (e.g. of a populated array). Outputs placements at the overlaps.")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateInterference(name = "Interference")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_Interference", "Please select one object, first. The object should be a compound, e.g. result of Populate with copies.", None))
+            mb.setWindowTitle(translate("Lattice2_Interference","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_Interference', _CommandInterference())
+
+exportedCommands = ['Lattice2_Interference']
+
+# -------------------------- /Gui command --------------------------------------------------
@@ -63,6 +63,10 @@ class LatticeInvert(lattice2BaseFeature.LatticeFeature):
         base = screen(obj.Base).Shape
         if not lattice2BaseFeature.isObjectLattice(screen(obj.Base)):
             lattice2Executer.warning(obj, "Base is not a lattice, but lattice is expected. Results may be unexpected.\n")
+        if obj.TranslateMode == 'keep' and obj.OrientMode == 'keep':
+            # identity - output is the same as input
+            if lattice2BaseFeature.passThroughLattice(obj, screen(obj.Base)):
+                return "suppress"
         baseChildren = LCE.AllLeaves(base)
                         
         #cache mode comparisons, for speed
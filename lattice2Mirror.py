@@ -34,23 +34,34 @@ import FreeCAD as App
 __title__="Lattice Mirror module for FreeCAD"
 __author__ = "DeepSOIC"
 
-def mirrorShape(shape, pivotPlacement, flipX, flipY, flipZ):
-    plmM = pivotPlacement.toMatrix()
+def flipMatrix(flipX, flipY, flipZ):
+    """flipMatrix(flipX, flipY, flipZ): returns the matrix of mirroring against the origin."""
     mirrM = App.Base.Matrix()
     if flipX: mirrM.A11 = -1
     if flipY: mirrM.A22 = -1
     if flipZ: mirrM.A33 = -1
-    m = plmM.multiply(mirrM.multiply(plmM.inverse()))
+    return mirrM
+
+def mirrorMatrix(pivotPlacement, flipX, flipY, flipZ):
+    """mirrorMatrix(pivotPlacement, flipX, flipY, flipZ): returns the matrix of mirroring against pivotPlacement."""
+    plmM = pivotPlacement.toMatrix()
+    return plmM.multiply(flipMatrix(flipX, flipY, flipZ).multiply(plmM.inverse()))
+
+def canonicalMirrorMove(pivotPlacement, flipX, flipY, flipZ):
+    """canonicalMirrorMove(pivotPlacement, flipX, flipY, flipZ): returns a placement, such that 
+    mirroring against pivotPlacement is the same as mirroring against the origin followed by 
+    this placement. It is always a rigid transform, so a thing mirrored once against the origin 
+    can be turned into its mirror against any pivot by placing it."""
+    m = mirrorMatrix(pivotPlacement, flipX, flipY, flipZ)
+    return App.Placement(m.multiply(flipMatrix(flipX, flipY, flipZ)))
+
+def mirrorShape(shape, pivotPlacement, flipX, flipY, flipZ):
+    m = mirrorMatrix(pivotPlacement, flipX, flipY, flipZ)
     return ShapeCopy.transformShape(shape, m)
 
 def mirrorPlacement(placement, pivotPlacement, flipX, flipY, flipZ):
     """mirrorPlacement(placement, pivotPlacement, flipX, flipY, flipZ): mirrors a placement. Y axis of placement is adjusted to keep the placement's CS right-handed."""
-    plmM = pivotPlacement.toMatrix()
-    mirrM = App.Base.Matrix()
-    if flipX: mirrM.A11 = -1
-    if flipY: mirrM.A22 = -1
-    if flipZ: mirrM.A33 = -1
-    m = plmM.multiply(mirrM.multiply(plmM.inverse()))
+    m = mirrorMatrix(pivotPlacement, flipX, flipY, flipZ)
     
     OX = App.Vector(1,0,0)
     OZ = App.Vector(0,0,1)
@@ -150,6 +161,15 @@ class LatticeMirror(LBF.LatticeFeature):
         # collect objects to be mirrored
         loop = False
         whole = obj.ObjectTraversal == 'Use whole'
+        
+        # no flips = identity transform. Pass the object through, if it is not repeated.
+        if not (flipX or flipY or flipZ) and whole and len(pivots) == 1:
+            if base_is_lattice:
+                if LBF.passThroughLattice(obj, obj.Object):
+                    return "suppress"
+            else:
+                obj.Shape = ShapeCopy.transformCopy_Smart(obj.Object.Shape, obj.Placement)
+                return None
         children = []
         if base_is_lattice:
             children = LBF.getPlacementsList(obj.Object)
@@ -177,18 +197,27 @@ class LatticeMirror(LBF.LatticeFeature):
             n = len(pivots)
         
         # actual mirroring!
+        # Each child is mirrored only once, against the origin (this is where geometry gets 
+        # copied). Mirrors against the pivots are then made by moving that rigidly.
+        origin = App.Placement()
+        canonical = {} #child index -> child mirrored against origin
         result = []
         for i in range(n):
-            piv = pivots[i]
-            ichild = i % len(children)
-            if base_is_lattice:
-                if whole:
-                    for plm in children:
-                        result.append(mirrorPlacement(plm, piv, flipX, flipY, flipZ))
-                else:
-                    result.append(mirrorPlacement(children[ichild], piv, flipX, flipY, flipZ))
+            move = canonicalMirrorMove(pivots[i], flipX, flipY, flipZ)
+            if base_is_lattice and whole:
+                ichildren = range(len(children))
             else:
-                result.append(mirrorShape(children[ichild], piv, flipX, flipY, flipZ))
+                ichildren = [i % len(children)]
+            for ichild in ichildren:
+                if ichild not in canonical:
+                    if base_is_lattice:
+                        canonical[ichild] = mirrorPlacement(children[ichild], origin, flipX, flipY, flipZ)
+                    else:
+                        canonical[ichild] = mirrorShape(children[ichild], origin, flipX, flipY, flipZ)
+                if base_is_lattice:
+                    result.append(move.multiply(canonical[ichild]))
+                else:
+                    result.append(ShapeCopy.shallowCopy(canonical[ichild], move))
         
         # write out the result
         if base_is_lattice:
@@ -0,0 +1,355 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice PathSampling object: distributes placements along an edge or wire."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+import bisect
+
+import FreeCAD as App
+import Part
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2CompoundExplorer as LCE
+import lattice2GeomUtils as Utils
+
+# -------------------------- common stuff --------------------------------------------------
+
+def pathEdges(lnk):
+    '''pathEdges(lnk): resolves a LinkSub into a list of edges, in order of path, oriented 
+    along the path. Returns tuple (edges, is_closed).'''
+    if lnk is None:
+        raise ValueError("Path is not linked.")
+    obj, subs = lnk
+    subs = [sub for sub in subs if sub]
+    if len(subs) == 0:
+        shapes = LCE.AllLeaves(screen(obj).Shape)
+    else:
+        shapes = [screen(obj).Shape.getElement(sub) for sub in subs]
+    if len(shapes) == 1 and shapes[0].ShapeType == 'Wire':
+        wire = shapes[0]
+    else:
+        edges = []
+        for sh in shapes:
+            edges.extend(sh.Edges)
+        if len(edges) == 0:
+            raise ValueError("Path has no edges.")
+        if len(edges) == 1:
+            return (edges, edges[0].isClosed())
+        try:
+            wire = Part.Wire(Part.__sortEdges__(edges))
+        except Exception:
+            raise ValueError("Edges of path do not form a single chain.")
+    return (wire.OrderedEdges, wire.isClosed())
+
+def curveParameter(edge, pnt):
+    '''curveParameter(edge, pnt): parameter of a point lying on an edge, brought into the range of the edge.'''
+    crv = edge.Curve
+    u = crv.parameter(pnt)
+    if crv.isPeriodic():
+        per = crv.period()
+        u1 = edge.FirstParameter
+        while u < u1 - ParaConfusion:
+            u += per
+        while u > u1 + per - ParaConfusion:
+            u -= per
+    return u
+
+def anyPerpendicular(vec):
+    return Utils.makeOrientationFromLocalAxesUni("X", XAx= vec).multVec(App.Vector(0,1,0))
+
+class PathSampler(object):
+    '''PathSampler(edges, is_closed): samples points along a chain of edges, measuring 
+    arc length across edge boundaries. Edges must be ordered and oriented along the path.'''
+    
+    def __init__(self, edges, is_closed):
+        self.edges = [e for e in edges if not e.Degenerated]
+        if len(self.edges) == 0:
+            raise ValueError("Path has no edges.")
+        self.is_closed = is_closed
+        self.starts = [] # arc length along path at start of each edge
+        total = 0.0
+        for e in self.edges:
+            self.starts.append(total)
+            total += e.Length
+        self.length = total
+        
+    def _sampleEdge(self, i_edge, lengths):
+        '''_sampleEdge(i_edge, lengths): lengths is a sorted list of arc lengths from start of 
+        edge. Points equally spaced by arc length are computed in one discretize call. 
+        Returns list of (point, i_edge, u).'''
+        edge = self.edges[i_edge]
+        rev = edge.Orientation == 'Reversed'
+        le = edge.Length
+        # arc length as measured along curve parametrization, which may be opposite to path direction
+        nat = [min(max(le - s if rev else s, 0.0), le) for s in lengths]
+        if rev:
+            nat.reverse()
+        ua = edge.getParameterByLength(nat[0])
+        if len(nat) == 1:
+            pts = [edge.valueAt(ua)]
+            params = [ua]
+        else:
+            ub = edge.getParameterByLength(nat[-1])
+            pts = edge.discretize(Number= len(nat), First= ua, Last= ub)
+            try:
+                params = [curveParameter(edge, p) for p in pts]
+            except Exception:
+                #curve does not support projection; fall back to measuring arc length for each point
+                params = [edge.getParameterByLength(s) for s in nat]
+                pts = [edge.valueAt(u) for u in params]
+        result = [(pts[i], i_edge, params[i]) for i in range(len(pts))]
+        if rev:
+            result.reverse()
+        return result
+        
+    def sampleAtLengths(self, lengths):
+        '''sampleAtLengths(lengths): lengths is a sorted list of arc lengths along the path. 
+        Lengths that are equally spaced within an edge are computed in a batch. Returns 
+        list of (point, i_edge, u).'''
+        groups = [] # list of (i_edge, [local lengths])
+        for s in lengths:
+            i_edge = min(max(bisect.bisect_right(self.starts, s) - 1, 0), len(self.edges) - 1)
+            if len(groups) == 0 or groups[-1][0] != i_edge:
+                groups.append((i_edge, []))
+            groups[-1][1].append(s - self.starts[i_edge])
+        result = []
+        for (i_edge, local) in groups:
+            result.extend(self._sampleEdge(i_edge, local))
+        return result
+        
+    def sampleByCount(self, n):
+        if n < 1:
+            raise ValueError("Count must be positive.")
+        if n == 1:
+            return self.sampleAtLengths([0.0])
+        step = self.length / n if self.is_closed else self.length / (n - 1)
+        return self.sampleAtLengths([step * i for i in range(n)])
+    
+    def sampleByDistance(self, step):
+        if step < DistConfusion:
+            raise ValueError("Distance must be positive.")
+        n = int(math.floor(self.length / step + ParaConfusion)) + 1
+        if self.is_closed and step * (n - 1) > self.length - DistConfusion:
+            n -= 1 #last point coincides with first
+        return self.sampleAtLengths([step * i for i in range(n)])
+        
+    def sampleByDeflection(self, deflection):
+        if deflection < DistConfusion:
+            raise ValueError("Deflection must be positive.")
+        result = []
+        for i_edge in range(len(self.edges)):
+            edge = self.edges[i_edge]
+            pts = edge.discretize(Deflection= deflection)
+            try:
+                params = [curveParameter(edge, p) for p in pts]
+            except Exception:
+                params = [edge.Curve.parameter(p) for p in pts] # let it fail with a meaningful message
+            samples = [(pts[i], i_edge, params[i]) for i in range(len(pts))]
+            if edge.Orientation == 'Reversed':
+                samples.reverse()
+            if len(result) > 0 and (result[-1][0] - samples[0][0]).Length < DistConfusion:
+                samples.pop(0) # vertex shared with previous edge
+            result.extend(samples)
+        if self.is_closed and len(result) > 1 and (result[-1][0] - result[0][0]).Length < DistConfusion:
+            result.pop()
+        return result
+        
+    def tangent(self, i_edge, u):
+        edge = self.edges[i_edge]
+        t = edge.tangentAt(u)
+        if edge.Orientation == 'Reversed':
+            t = t * (-1.0)
+        return t
+        
+    def normal(self, i_edge, u):
+        '''normal(i_edge, u): principal normal (towards center of curvature), or None if undefined.'''
+        try:
+            n = self.edges[i_edge].normalAt(u)
+        except Exception:
+            return None # straight piece, or inflection point
+        if n.Length < ParaConfusion:
+            return None
+        return n
+
+def frenetNormals(tangents, normals):
+    '''frenetNormals(tangents, normals): fills in normals that are None (straight spots) by 
+    carrying over neighbouring normals. Returns new list.'''
+    result = list(normals)
+    known = [i for i in range(len(result)) if result[i] is not None]
+    if len(known) == 0:
+        return [anyPerpendicular(t) for t in tangents]
+    prev = result[known[0]]
+    for i in range(len(result)):
+        if result[i] is None:
+            result[i] = prev
+        else:
+            prev = result[i]
+    return result
+
+def rotationMinimizingNormals(points, tangents, first_normal):
+    '''rotationMinimizingNormals(points, tangents, first_normal): propagates a normal along 
+    the path with double reflection method (Wang, Juttler, Zheng, Liu 2008), so it twists 
+    as little as possible.'''
+    r = first_normal
+    result = [r]
+    for i in range(len(points) - 1):
+        v1 = points[i+1] - points[i]
+        c1 = v1.dot(v1)
+        if c1 < DistConfusion**2:
+            result.append(r)
+            continue
+        rL = r - v1 * (2.0 / c1 * v1.dot(r))
+        tL = tangents[i] - v1 * (2.0 / c1 * v1.dot(tangents[i]))
+        v2 = tangents[i+1] - tL
+        c2 = v2.dot(v2)
+        if c2 > ParaConfusion**2:
+            r = rL - v2 * (2.0 / c2 * v2.dot(rL))
+        else:
+            r = rL
+        result.append(r)
+    return result
+
+# -------------------------- document object --------------------------------------------------
+
+def makePathSampling(name):
+    '''makePathSampling(name): makes a PathSampling object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticePathSampling, ViewProviderPathSampling)
+
+class LatticePathSampling(lattice2BaseFeature.LatticeFeature):
+    "The Lattice PathSampling object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticePathSampling"
+                
+        obj.addProperty("App::PropertyLinkSub","Path","Lattice PathSampling","Edge, wire, or a set of edges forming a chain, to place placements along.")
+        
+        obj.addProperty("App::PropertyEnumeration","SamplingMode","Lattice PathSampling","count: Count placements equally spaced by arc length. distance: placements spaced by Distance. deflection: placements spaced so that polyline through them deviates from path by no more than Deflection.")
+        obj.SamplingMode = ['count', 'distance', 'deflection']
+        obj.SamplingMode = 'count'
+        
+        obj.addProperty("App::PropertyInteger","Count","Lattice PathSampling","Number of placements, for 'count' mode. For closed paths, the last placement is not made, as it would coincide with the first.")
+        obj.Count = 10
+        
+        obj.addProperty("App::PropertyLength","Distance","Lattice PathSampling","Arc length between placements, for 'distance' mode.")
+        obj.Distance = 1.0
+        
+        obj.addProperty("App::PropertyLength","Deflection","Lattice PathSampling","Max deviation of path from a polyline through the placements, for 'deflection' mode.")
+        obj.Deflection = 0.1
+        
+        obj.addProperty("App::PropertyEnumeration","OrientMode","Lattice PathSampling","Orientation of placements. X is along tangent. Frenet: Y along principal normal, flips at inflection points. Rotation minimizing: Y twists as little as possible.")
+        obj.OrientMode = ['None', 'Frenet', 'Rotation minimizing']
+        obj.OrientMode = 'Rotation minimizing'
+        
+        obj.addProperty("App::PropertyBool","Reverse","Lattice PathSampling","Walk the path in opposite direction.")
+
+    def derivedExecute(self,obj):
+        (edges, is_closed) = pathEdges(obj.Path)
+        if obj.Reverse:
+            edges = [e.reversed() for e in reversed(edges)]
+        sampler = PathSampler(edges, is_closed)
+        
+        if obj.SamplingMode == 'count':
+            samples = sampler.sampleByCount(obj.Count)
+        elif obj.SamplingMode == 'distance':
+            samples = sampler.sampleByDistance(float(obj.Distance))
+        elif obj.SamplingMode == 'deflection':
+            samples = sampler.sampleByDeflection(float(obj.Deflection))
+        else:
+            raise ValueError("Sampling mode not implemented: "+obj.SamplingMode)
+            
+        points = [s[0] for s in samples]
+        if obj.OrientMode == 'None':
+            return [App.Placement(p, App.Rotation()) for p in points]
+        
+        tangents = [sampler.tangent(i_edge, u) for (p, i_edge, u) in samples]
+        if obj.OrientMode == 'Frenet':
+            normals = frenetNormals(tangents, [sampler.normal(i_edge, u) for (p, i_edge, u) in samples])
+        elif obj.OrientMode == 'Rotation minimizing':
+            first_normal = sampler.normal(samples[0][1], samples[0][2])
+            if first_normal is None:
+                first_normal = anyPerpendicular(tangents[0])
+            normals = rotationMinimizingNormals(points, tangents, first_normal)
+        else:
+            raise ValueError("Orientation mode not implemented: "+obj.OrientMode)
+        return [App.Placement(points[i], Utils.makeOrientationFromLocalAxesUni("XY", XAx= tangents[i], YAx= normals[i])) for i in range(len(points))]
+
+
+class ViewProviderPathSampling(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_LinearArray.svg')
+    
+    def claimChildren(self):
+        return []
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreatePathSampling(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create PathSampling")
+    FreeCADGui.addModule("lattice2PathSampling")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2PathSampling.makePathSampling(name='"+name+"')")
+    FreeCADGui.doCommand("f.Path = (App.ActiveDocument."+sel[0].ObjectName+", "+repr(list(sel[0].SubElementNames))+")")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandPathSampling:
+    "Command to create PathSampling feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_LinearArray.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_PathSampling","Array along path"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_PathSampling","Lattice PathSampling: placements along an edge or wire, by count, distance or deflection. Select the edge, the wire, or a chain of edges.")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreatePathSampling(name = "PathSampling")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_PathSampling", "Please select one object, or edges of one object, first.", None))
+            mb.setWindowTitle(translate("Lattice2_PathSampling","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_PathSampling', _CommandPathSampling())
+
+exportedCommands = ['Lattice2_PathSampling']
+
+# -------------------------- /Gui command --------------------------------------------------
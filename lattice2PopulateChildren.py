@@ -34,7 +34,7 @@ from lattice2Common import *
 import lattice2BaseFeature
 import lattice2CompoundExplorer as LCE
 import lattice2Executer
-from lattice2PopulateCopies import DereferenceArray, throwBody
+from lattice2PopulateCopies import DereferenceArray, throwBody, hiddenLinkType, setLinkOutputs, checkShapeConsumers, updateMeshView, companionsOnChanged, companionsOnDelete
 import lattice2ShapeCopy as ShapeCopy
 
 # -------------------------- document object --------------------------------------------------
@@ -70,6 +70,63 @@ class LatticePopulateChildren(lattice2BaseFeature.LatticeFeature):
         # properties that can be missing on objects made with earlier version of Lattice2
         if self.assureProperty(obj, "App::PropertyEnumeration","Copying", ShapeCopy.copy_types, "Lattice PopulateChildren", "Sets, what method to use for copying shapes."):
             self.Copying = ShapeCopy.copy_types[0]
+        self.assureProperty(obj, "App::PropertyEnumeration", "OutputMode", ["Shape", "Link array", "Mesh"], "Lattice PopulateChildren", "Shape: copies are combined into a compound. Link array: App::Link arrays are made instead (one per child), which display the instances without copying geometry; requires Object to be a compound of objects, such as Part Compound. Mesh: a single mesh object is made, by tessellating each child once. In Link array and Mesh modes, the compound is made too, unless MakeShape is false.")
+        self.assureProperty(obj, "App::PropertyBool", "MakeShape", True, "Lattice PopulateChildren", "Link array and Mesh output modes: if false, the compound of copies is not made, and shape of this object is empty. Saves time, if nothing else uses this object.")
+        if self.assureProperty(obj, hiddenLinkType(obj, "App::PropertyLinkList"), "LinkArrays", [], "Lattice PopulateChildren", "Link arrays made by Link array output mode."):
+            obj.setEditorMode("LinkArrays", 1) # read-only
+        if self.assureProperty(obj, hiddenLinkType(obj, "App::PropertyLink"), "MeshObject", None, "Lattice PopulateChildren", "Mesh made by Mesh output mode."):
+            obj.setEditorMode("MeshObject", 1) # read-only
+        self.assureProperty(obj, "App::PropertyLength", "MeshDeflection", 0.0, "Lattice PopulateChildren", "Mesh output mode: tessellation tolerance. Zero = automatic.")
+        self.assureProperty(obj, "App::PropertyAngle", "MeshCreaseAngle", 0.0, "Lattice PopulateChildren", "Mesh output mode: edges with angle between normals of faces below this are shaded smooth. Zero = flat shading.")
+
+    def companionsNeeded(self, obj):
+        '''companionsNeeded(obj): returns (list of objects to make link arrays of, is mesh object needed), for current OutputMode.'''
+        targets = []
+        if obj.OutputMode == "Link array" and screen(obj.Object) is not None:
+            targets = [screen(child) for child in getattr(screen(obj.Object), 'Links', [])]
+        return (targets, obj.OutputMode == "Mesh")
+
+    def onChanged(self, obj, prop):
+        lattice2BaseFeature.LatticeFeature.onChanged(self, obj, prop)
+        if prop in ('OutputMode', 'Object'):
+            companionsOnChanged(obj)
+        elif prop == 'MeshCreaseAngle' and hasattr(obj, 'MeshObject') and not 'Restore' in obj.State:
+            updateMeshView(obj)
+
+    def getObjectShapes(self, obj):
+        '''getObjectShapes(obj): returns list of child shapes of Object, to be populated.'''
+        if obj.ObjectTraversal == "Direct children only":
+            return screen(obj.Object).Shape.childShapes()
+        elif obj.ObjectTraversal == "Recursive":
+            return LCE.AllLeaves(screen(obj.Object).Shape)
+        else:
+            raise ValueError("Traversal mode not implemented: "+obj.ObjectTraversal)
+
+    def getInstances(self, obj, numChildren):
+        '''getInstances(obj, numChildren): returns (placements, instances). instances is a list 
+        of (child index, placement), pairing placements with children in sequence.'''
+        placements = lattice2BaseFeature.getPlacementsList(screen(obj.PlacementsTo), obj)
+        placements = DereferenceArray(obj, placements, screen(obj.PlacementsFrom), obj.Referencing)
+        instances = []
+        iChild = 0
+        for plm in placements:
+            if iChild == numChildren:
+                if obj.LoopObjectSequence:
+                    iChild = 0
+                else:
+                    break
+            instances.append((iChild, plm))
+            iChild += 1
+        return (placements, instances)
+
+    def getMeshInstances(self, obj):
+        '''getMeshInstances(obj): returns list of (shape, placement) to make mesh of, for Mesh 
+        output mode. No copies are made. Called by mesh object when it is recomputed.'''
+        if lattice2BaseFeature.isObjectLattice(screen(obj.Object)):
+            return []
+        objectShapes = self.getObjectShapes(obj)
+        (placements, instances) = self.getInstances(obj, len(objectShapes))
+        return [(objectShapes[ic], plm) for (ic, plm) in instances]
 
     def derivedExecute(self,obj):
         
@@ -77,56 +134,61 @@ class LatticePopulateChildren(lattice2BaseFeature.LatticeFeature):
         
         outputIsLattice = lattice2BaseFeature.isObjectLattice(screen(obj.Object))
         
-        if not lattice2BaseFeature.isObjectLattice(screen(obj.Object)):
-            if obj.ObjectTraversal == "Direct children only":
-                objectShapes = screen(obj.Object).Shape.childShapes()
-                if screen(obj.Object).Shape.ShapeType != "Compound":
-                    lattice2Executer.warning(obj,"shape supplied as object is not a compound. It is going to be downgraded one level down (e.g, if it is a wire, the edges are going to be enumerated as children).")
-            elif obj.ObjectTraversal == "Recursive":
-                objectShapes = LCE.AllLeaves(screen(obj.Object).Shape)
-            else:
-                raise ValueError("Traversal mode not implemented: "+obj.ObjectTraversal)
+        if not outputIsLattice:
+            objectShapes = self.getObjectShapes(obj)
+            if obj.ObjectTraversal == "Direct children only" and screen(obj.Object).Shape.ShapeType != "Compound":
+                lattice2Executer.warning(obj,"shape supplied as object is not a compound. It is going to be downgraded one level down (e.g, if it is a wire, the edges are going to be enumerated as children).")
         else:
             objectPlms = lattice2BaseFeature.getPlacementsList(screen(obj.Object), obj)
-        placements = lattice2BaseFeature.getPlacementsList(screen(obj.PlacementsTo), obj)
-
         
-        # Precompute referencing
-        placements = DereferenceArray(obj, placements, screen(obj.PlacementsFrom), obj.Referencing)
+        numChildren = len(objectPlms) if outputIsLattice else len(objectShapes) 
+        (placements, instances) = self.getInstances(obj, numChildren) # list of (child index, placement)
                 
         # initialize output containers and loop variables
         outputShapes = [] #output list of shapes
         outputPlms = [] #list of placements
-        iChild = 0
-        numChildren = len(objectPlms) if outputIsLattice else len(objectShapes) 
         copy_method_index = ShapeCopy.getCopyTypeIndex(obj.Copying)
+        needShape = obj.OutputMode == "Shape" or outputIsLattice or obj.MakeShape
         
         # the essence
-        for iPlm in range(len(placements)):
-            if iChild == numChildren:
-                if obj.LoopObjectSequence:
-                    iChild = 0
-                else:
-                    break
-            
-            plm = placements[iPlm]
-             
+        for (iChild, plm) in instances:
             if outputIsLattice:
                 objectPlm = objectPlms[iChild]
                 outputPlms.append(plm.multiply(objectPlm))
-            else:
+            elif needShape:
                 outputShape = ShapeCopy.copyShape(objectShapes[iChild], copy_method_index, plm)
                 # outputShape.Placement = plm.multiply(outputShape.Placement) #now done by shape copy routine
                 outputShapes.append(outputShape)
             
-            iChild += 1
-            
         if len(placements) > numChildren and not obj.LoopObjectSequence:
             lattice2Executer.warning(obj,"There are fewer children to populate, than placements to be populated (%1, %2). Extra placements will be dropped.".replace("%1", str(numChildren)).replace("%2",str(len(placements))))
             
         if len(placements) < numChildren:
             lattice2Executer.warning(obj,"There are more children to populate, than placements to be populated (%1, %2). Extra children will be dropped.".replace("%1", str(numChildren)).replace("%2",str(len(placements))))
             
+        if obj.OutputMode == "Mesh" and outputIsLattice:
+            lattice2Executer.warning(obj, "Mesh output mode is not applicable to placements. Ignored.")
+            
+        if obj.OutputMode == "Link array" and not outputIsLattice:
+            compound = screen(obj.Object)
+            childObjects = getattr(compound, 'Links', None)
+            if obj.ObjectTraversal != "Direct children only" or childObjects is None or len(childObjects) != numChildren:
+                raise ValueError("Link array output mode requires Object to be a compound of objects (such as Part Compound), traversed as direct children only.")
+            # copies are made of child shapes within the compound, so placement of the compound applies to them
+            compoundPlm = compound.Placement
+            groups = [([], None) for ic in range(numChildren)] # per child: (placements, scales)
+            for (ic, plm) in instances:
+                groups[ic][0].append(plm.multiply(compoundPlm))
+            setLinkOutputs(obj, groups)
+        elif obj.OutputMode == "Link array":
+            lattice2Executer.warning(obj, "Link array output mode is not applicable to placements. Ignored.")
+            setLinkOutputs(obj, [([], None) for child in getattr(screen(obj.Object), 'Links', [])])
+
+        if not needShape:
+            checkShapeConsumers(obj)
+            obj.Shape = Part.makeCompound([])
+            return None
+
         if outputIsLattice:
             return outputPlms
         else:
@@ -157,8 +219,15 @@ class ViewProviderLatticePopulateChildren(lattice2BaseFeature.ViewProviderLattic
         children = [screen(self.Object.Object), screen(self.Object.PlacementsTo)]
         if self.Object.Referencing == "Use PlacementsFrom":
             children.append(screen(self.Object.PlacementsFrom))
+        children.extend(getattr(self.Object, "LinkArrays", []))
+        if getattr(self.Object, "MeshObject", None) is not None:
+            children.append(self.Object.MeshObject)
         return children
 
+    def onDelete(self, feature, subelements): # subelements is a tuple of strings
+        companionsOnDelete(self.Object)
+        return lattice2BaseFeature.ViewProviderLatticeFeature.onDelete(self, feature, subelements)
+
 # -------------------------- /document object --------------------------------------------------
 
 # -------------------------- Gui command --------------------------------------------------
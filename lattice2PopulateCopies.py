@@ -35,6 +35,7 @@ import lattice2BaseFeature
 import lattice2CompoundExplorer as LCE
 import lattice2Executer
 import lattice2ShapeCopy as ShapeCopy
+from lattice2Subsequencer import HashableShape
 
 # ---------------------------shared code--------------------------------------
 def DereferenceArray(obj,placements, lnkFrom, refmode):
@@ -68,7 +69,264 @@ def DereferenceArray(obj,placements, lnkFrom, refmode):
     
     return [plm.multiply(plmDeref) for plm in placements]
 
-    
+def getAttributeColumn(obj, lattice, propname, n):
+    '''getAttributeColumn(obj, lattice, propname, n): reads a per-instance attribute list 
+    from property propname of obj, or of lattice if obj's is empty. Returns a list of n values, 
+    or None if the attribute is not specified. A single value is applied to all instances.'''
+    values = list(getattr(obj, propname))
+    if len(values) == 0 and lattice is not None and hasattr(lattice, propname):
+        values = list(getattr(lattice, propname))
+    if len(values) == 0:
+        return None
+    if len(values) == 1:
+        return values * n
+    if len(values) != n:
+        raise ValueError("Length of {prop} ({num}) doesn't match the number of placements ({n}). It must be either equal, or one.".format(prop= propname, num= len(values), n= n))
+    return values
+
+def isDocumentBusy(doc):
+    '''isDocumentBusy(doc): tests if doc is being restored, recomputed, or is undoing/redoing. 
+    Document objects shouldn't be added or removed at such times.'''
+    return any(getattr(doc, attr, False) for attr in ('Restoring', 'Recomputing', 'Transacting'))
+
+def hiddenLinkType(obj, proptype):
+    '''hiddenLinkType(obj, proptype): returns hidden variant of link property type (e.g. 
+    App::PropertyLinkListHidden for App::PropertyLinkList), if supported. Hidden links don't 
+    make obj depend on linked objects, so companions computed from obj can be linked back.'''
+    if proptype + "Hidden" in obj.supportedProperties():
+        return proptype + "Hidden"
+    return proptype
+
+# output properties of populate feature, that link arrays are bound to by expressions. 
+# (name prefix, property type, property of App::Link). Link array number is appended to the name.
+link_outputs = [
+    ("LinkCount", "App::PropertyInteger", "ElementCount"),
+    ("LinkPlacements", "App::PropertyPlacementList", "PlacementList"),
+    ("LinkScales", "App::PropertyVectorList", "ScaleList"),
+    ("LinkVisibilities", "App::PropertyBoolList", "VisibilityList"),
+]
+
+def assureLinkArrays(obj, targets):
+    '''assureLinkArrays(obj, targets): creates or deletes App::Link arrays owned by feature obj 
+    (listed in its LinkArrays property), so that there is one array per object in targets, 
+    and links them to the targets. The arrays are bound by expressions to output properties 
+    of obj (LinkCount0, LinkPlacements0, and so on), which are filled by execute. Must not 
+    be called from execute, as objects can't be added or removed during recompute.'''
+    links = [lnk for lnk in obj.LinkArrays if lnk is not None]
+    doc = obj.Document
+    while len(links) < len(targets):
+        try:
+            lnk = doc.addObject('App::Link', obj.Name + '_Links')
+        except Exception:
+            raise ValueError("Link array output requires App::Link, which is available in FreeCAD 0.19 and later.")
+        lnk.Label = obj.Label + ' links'
+        lnk.ShowElement = False # don't make a document object per instance
+        lnk.LinkTransform = True # placement of linked object is applied on top of instance placement, like copies do
+        links.append(lnk)
+    for lnk in links[len(targets):]:
+        doc.removeObject(lnk.Name)
+    links = links[0:len(targets)]
+    if len(obj.LinkArrays) != len(links) or any(lnk is not old for (lnk, old) in zip(links, obj.LinkArrays)):
+        obj.LinkArrays = links
+    for i in range(len(links)):
+        lnk = links[i]
+        for (prefix, proptype, linkprop) in link_outputs:
+            propname = prefix + str(i)
+            if lattice2BaseFeature.assureProperty(obj, proptype, propname, None, "Lattice Link arrays", "Output for {linkprop} of link array {i}, bound by expression.".format(linkprop= linkprop, i= i)):
+                obj.setEditorMode(propname, 2) # hidden
+            lnk.setExpression(linkprop, obj.Name + '.' + propname)
+        if lnk.LinkedObject is not targets[i]:
+            lnk.LinkedObject = targets[i]
+    # outputs of deleted arrays
+    i = len(links)
+    while hasattr(obj, link_outputs[0][0] + str(i)):
+        for (prefix, proptype, linkprop) in link_outputs:
+            obj.removeProperty(prefix + str(i))
+        i += 1
+
+def assureMeshObject(obj, present):
+    '''assureMeshObject(obj, present): creates or deletes mesh object owned by feature obj 
+    (linked by its MeshObject property). The mesh object computes from obj (see PopulateMesh). 
+    Must not be called from execute.'''
+    meshobj = obj.MeshObject
+    if present and meshobj is None:
+        meshobj = obj.Document.addObject('Mesh::FeaturePython', obj.Name + '_Mesh')
+        PopulateMesh(meshobj)
+        meshobj.Source = obj
+        meshobj.Label = obj.Label + ' mesh'
+        obj.MeshObject = meshobj
+        updateMeshView(obj)
+    elif not present and meshobj is not None:
+        obj.MeshObject = None
+        obj.Document.removeObject(meshobj.Name)
+
+def scaledLinkPlacement(plm, scale, objectPlm):
+    '''scaledLinkPlacement(plm, scale, objectPlm): returns placement of a link array element, 
+    that displays the object like a scaled copy put at plm. A link array applies element scale 
+    on top of placement of the linked object (plm*scale*objectPlm), while the copy is scaled in 
+    the object's own coordinate system (plm*objectPlm*scale, see lattice2ShapeCopy.scaledCopy). 
+    Offsetting the element makes up for the difference, unless the scale is non-uniform and 
+    the object is rotated.'''
+    uniform = abs(scale.x - scale.y) < ParaConfusion and abs(scale.x - scale.z) < ParaConfusion
+    if not uniform and objectPlm.Rotation.Angle > ParaConfusion:
+        raise ValueError("Non-uniform Scales can't be displayed by link arrays, if the object is rotated. Use Shape output mode, or remove rotation from placement of the object.")
+    t = objectPlm.Base
+    return plm.multiply(App.Placement(t - App.Vector(t.x*scale.x, t.y*scale.y, t.z*scale.z), App.Rotation()))
+
+def companionsStale(obj):
+    '''companionsStale(obj): tests if link arrays and mesh object of a populate feature don't 
+    match its OutputMode and linked objects.'''
+    (targets, needMesh) = obj.Proxy.companionsNeeded(obj)
+    linked = [lnk.LinkedObject for lnk in obj.LinkArrays if lnk is not None]
+    if len(linked) != len(targets) or any(lo is not t for (lo, t) in zip(linked, targets)):
+        return True
+    return (obj.MeshObject is not None) != needMesh
+
+def updateCompanionObjects(obj):
+    '''updateCompanionObjects(obj): creates or deletes link arrays and mesh object of a populate 
+    feature, as required by its OutputMode. Called automatically when OutputMode or linked 
+    objects change (see companionsOnChanged).'''
+    (targets, needMesh) = obj.Proxy.companionsNeeded(obj)
+    assureLinkArrays(obj, targets)
+    assureMeshObject(obj, needMesh)
+
+def removeCompanionObjects(obj):
+    '''removeCompanionObjects(obj): deletes link arrays and mesh object of a populate feature.'''
+    assureLinkArrays(obj, [])
+    assureMeshObject(obj, False)
+
+def setLinkOutputs(obj, groups):
+    '''setLinkOutputs(obj, groups): fills output properties of feature obj, that its link arrays 
+    are bound to. To be called from execute. groups is a list of tuples (placements, scales), 
+    one per link array; scales can be None. An empty group makes a single hidden element, as 
+    a link array with no elements would display the linked object as is.'''
+    numLinks = len([lnk for lnk in obj.LinkArrays if lnk is not None])
+    if numLinks != len(groups):
+        lattice2Executer.warning(obj, "Link arrays are out of date: {num} needed, but there are {exist}. Set OutputMode again to update them, then recompute.".format(num= len(groups), exist= numLinks))
+    for i in range(min(numLinks, len(groups))):
+        (plms, scales) = groups[i]
+        visibilities = [True] * len(plms)
+        if len(plms) == 0:
+            plms = [App.Placement()]
+            visibilities = [False]
+            scales = None
+        if scales is None:
+            scales = [App.Vector(1,1,1)] * len(plms)
+        setattr(obj, "LinkCount" + str(i), len(plms))
+        setattr(obj, "LinkPlacements" + str(i), plms)
+        setattr(obj, "LinkScales" + str(i), scales)
+        setattr(obj, "LinkVisibilities" + str(i), visibilities)
+
+def companionsOnChanged(obj):
+    '''companionsOnChanged(obj): to be called from onChanged of a populate feature, when a 
+    property that affects the set of companion objects (link arrays, mesh) has changed.'''
+    if not hasattr(obj, 'MeshObject') or isDocumentBusy(obj.Document) or 'Restore' in obj.State:
+        return
+    if getattr(obj.Proxy, '_updatingCompanions', False):
+        return
+    obj.Proxy._updatingCompanions = True
+    try:
+        if companionsStale(obj):
+            updateCompanionObjects(obj)
+    except Exception as err:
+        App.Console.PrintError("{obj}: failed to update link arrays/mesh object: {err}\n".format(obj= obj.Label, err= str(err)))
+    finally:
+        obj.Proxy._updatingCompanions = False
+
+def companionsOnDelete(obj):
+    '''companionsOnDelete(obj): to be called by view provider of a populate feature, when the 
+    feature is deleted. Deletes link arrays and mesh object.'''
+    try:
+        if hasattr(obj, 'MeshObject'):
+            removeCompanionObjects(obj)
+    except Exception as err:
+        # don't prevent deletion if something goes wrong
+        App.Console.PrintError("Error in onDelete: " + str(err))
+
+class CompanionsObserver(object):
+    '''Document observer, that updates link arrays of populate features when children of a 
+    compound they use change (e.g., an object is added to Part Compound used by PopulateChildren).'''
+    def slotChangedObject(self, obj, prop):
+        if prop != 'Links' or isDocumentBusy(obj.Document):
+            return
+        for feature in obj.InList:
+            if hasattr(getattr(feature, 'Proxy', None), 'companionsNeeded'):
+                companionsOnChanged(feature)
+
+if hasattr(App, 'addDocumentObserver'):
+    App.addDocumentObserver(CompanionsObserver())
+
+def hasShapeConsumers(obj):
+    '''hasShapeConsumers(obj): tests if any other object, except own link arrays and mesh 
+    object, depends on obj (and may need its shape).'''
+    companions = set([lnk.Name for lnk in obj.LinkArrays if lnk is not None])
+    if obj.MeshObject is not None:
+        companions.add(obj.MeshObject.Name)
+    return any(dep.Name not in companions for dep in obj.InList)
+
+def checkShapeConsumers(obj):
+    '''checkShapeConsumers(obj): warns, if shape is not made (MakeShape is off) while other 
+    objects use this one.'''
+    if hasShapeConsumers(obj):
+        lattice2Executer.warning(obj, "MakeShape is off, but other objects use this one. They get an empty shape. Set MakeShape to true to fix.")
+
+def bakeMesh(instances, deflection):
+    '''bakeMesh(instances, deflection): makes a single Mesh out of located copies of shapes. 
+    instances is a list of tuples (shape, placement). Each distinct shape object is tessellated 
+    once; the copies are made by transforming the mesh. If deflection is zero, it is chosen 
+    automatically per shape.'''
+    import Mesh
+    sourceMeshes = {} # id(shape) -> (shape, mesh). Shape is kept referenced, so that id stays unique.
+    parts = []
+    for (shape, plm) in instances:
+        rec = sourceMeshes.get(id(shape))
+        if rec is None:
+            defl = deflection if deflection > DistConfusion else max(shape.BoundBox.DiagonalLength * 0.005, DistConfusion)
+            rec = (shape, Mesh.Mesh(shape.tessellate(defl)))
+            sourceMeshes[id(shape)] = rec
+        m = rec[1].copy()
+        m.transform(plm.toMatrix())
+        parts.append(m)
+    if len(parts) == 0:
+        return Mesh.Mesh()
+    # merge pairwise, so that merging doesn't get quadratic on huge counts
+    while len(parts) > 1:
+        merged = []
+        for i in range(0, len(parts), 2):
+            m = parts[i]
+            if i + 1 < len(parts):
+                m.addMesh(parts[i+1])
+            merged.append(m)
+        parts = merged
+    return parts[0]
+
+def updateMeshView(obj):
+    '''updateMeshView(obj): applies MeshCreaseAngle of populate feature obj to its mesh object.'''
+    meshobj = obj.MeshObject
+    if meshobj is not None and App.GuiUp and hasattr(meshobj.ViewObject, 'CreaseAngle'):
+        meshobj.ViewObject.CreaseAngle = float(obj.MeshCreaseAngle)
+
+class PopulateMesh(object):
+    '''Proxy of the mesh object made by Mesh output mode of populate features. The mesh is baked 
+    from instances provided by Source feature (getMeshInstances method of its proxy). It is 
+    recomputed after Source, so Source never has to write to it.'''
+    def __init__(self, obj):
+        self.Type = "PopulateMesh"
+        obj.addProperty("App::PropertyLink", "Source", "Lattice Mesh", "Populate feature this mesh is made of.")
+        obj.setEditorMode("Source", 1) # read-only
+        obj.Proxy = self
+
+    def execute(self, obj):
+        src = obj.Source
+        if src is None:
+            return
+        obj.Mesh = bakeMesh(src.Proxy.getMeshInstances(src), float(src.MeshDeflection))
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self,state):
+        return None
 
 # -------------------------- document object --------------------------------------------------
 
@@ -103,7 +361,81 @@ class LatticePopulateCopies(lattice2BaseFeature.LatticeFeature):
             setattr(obj,propname,"always") # this is to match the old behavior. This is not the default setting for new features.
         if self.assureProperty(obj, "App::PropertyEnumeration","Copying", ShapeCopy.copy_types, "Lattice PopulateChildren", "Sets, what method to use for copying shapes."):
             self.Copying = ShapeCopy.copy_types[0]
-
+        self.assureProperty(obj, "App::PropertyEnumeration", "OutputMode", ["Shape", "Link array", "Mesh"], "Lattice PopulateCopies", "Shape: copies are combined into a compound. Link array: App::Link arrays are made (one per object and variant), which display the instances without copying geometry. Mesh: a single mesh object is made, by tessellating the object once. In Link array and Mesh modes, the compound is made too, unless MakeShape is false.")
+        self.assureProperty(obj, "App::PropertyBool", "MakeShape", True, "Lattice PopulateCopies", "Link array and Mesh output modes: if false, the compound of copies is not made, and shape of this object is empty. Saves time, if nothing else uses this object.")
+        if self.assureProperty(obj, hiddenLinkType(obj, "App::PropertyLinkList"), "LinkArrays", [], "Lattice PopulateCopies", "Link arrays made by Link array output mode."):
+            obj.setEditorMode("LinkArrays", 1) # read-only
+        if self.assureProperty(obj, hiddenLinkType(obj, "App::PropertyLink"), "MeshObject", None, "Lattice PopulateCopies", "Mesh made by Mesh output mode."):
+            obj.setEditorMode("MeshObject", 1) # read-only
+        self.assureProperty(obj, "App::PropertyLength", "MeshDeflection", 0.0, "Lattice PopulateCopies", "Mesh output mode: tessellation tolerance. Zero = automatic.")
+        self.assureProperty(obj, "App::PropertyAngle", "MeshCreaseAngle", 0.0, "Lattice PopulateCopies", "Mesh output mode: edges with angle between normals of faces below this are shaded smooth. Zero = flat shading.")
+        group = "Lattice PopulateCopies Attributes"
+        self.assureProperty(obj, "App::PropertyVectorList", "Scales", [], group, "Per-instance scale factors along X, Y, Z, applied to the object in its own coordinate system. One vector applies to all instances. If empty, Scales property of PlacementsTo object is used, if it has one.")
+        self.assureProperty(obj, "App::PropertyLinkList", "Variants", [], group, "Alternative objects to copy, selected per instance by VariantIndexes.")
+        self.assureProperty(obj, "App::PropertyIntegerList", "VariantIndexes", [], group, "Per-instance object to copy: 0 = Object, 1 = first of Variants, and so on. If empty, VariantIndexes property of PlacementsTo object is used, if it has one.")
+        self.assureProperty(obj, "App::PropertyColorList", "Palette", [], group, "Colors to pick from by ColorIndexes.")
+        self.assureProperty(obj, "App::PropertyIntegerList", "ColorIndexes", [], group, "Per-instance index of color in Palette. If empty, ColorIndexes property of PlacementsTo object is used, if it has one.")
+        if self.assureProperty(obj, "App::PropertyColorList", "FaceColors", [], group, "Colors of faces of the result, computed from ColorIndexes."):
+            obj.setEditorMode("FaceColors", 2) # hidden
+
+
+    def companionsNeeded(self, obj):
+        '''companionsNeeded(obj): returns (list of objects to make link arrays of, is mesh object needed), for current OutputMode.'''
+        targets = []
+        if obj.OutputMode == "Link array":
+            targets = [screen(obj.Object)] + [screen(v) for v in obj.Variants]
+        return (targets, obj.OutputMode == "Mesh")
+
+    def onChanged(self, obj, prop):
+        lattice2BaseFeature.LatticeFeature.onChanged(self, obj, prop)
+        if prop in ('OutputMode', 'Object', 'Variants'):
+            companionsOnChanged(obj)
+        elif prop == 'MeshCreaseAngle' and hasattr(obj, 'MeshObject') and not 'Restore' in obj.State:
+            updateMeshView(obj)
+
+    def getCaches(self, sources, copy_method_index):
+        '''getCaches(sources, copy_method_index): returns (source_cache, instance_cache) dicts 
+        kept from previous recompute. If source shapes or copy method have changed, the 
+        caches are reset. The caches are not saved with the document.'''
+        keys = [HashableShape(sh) for sh in sources]
+        cache = getattr(self, '_cache', None)
+        if cache is None or cache[0] != copy_method_index or cache[1] != keys:
+            cache = [copy_method_index, keys, {}, {}]
+            self._cache = cache
+        return (cache[2], cache[3])
+
+    def getSource(self, sources, sourceCache, variants, scales, i):
+        '''getSource(sources, sourceCache, variants, scales, i): returns (key, shape), the shape 
+        to be copied for instance i: the object or a variant, scaled if needed. Each distinct 
+        source is made once, and kept in sourceCache by key.'''
+        key = (0, None)
+        if variants or scales:
+            key = (variants[i] if variants else 0, (scales[i].x, scales[i].y, scales[i].z) if scales else None)
+            if key[1] is not None and (scales[i] - App.Vector(1,1,1)).Length < ParaConfusion:
+                key = (key[0], None)
+        src = sourceCache.get(key)
+        if src is None:
+            if key[0] < 0 or key[0] >= len(sources):
+                raise ValueError("Variant index {i} is out of range (there are {num} variants).".format(i= key[0], num= len(sources) - 1))
+            src = sources[key[0]]
+            if key[1] is not None:
+                src = ShapeCopy.scaledCopy(src, App.Vector(*key[1]))
+            sourceCache[key] = src
+        return (key, src)
+
+    def getMeshInstances(self, obj):
+        '''getMeshInstances(obj): returns list of (shape, placement) to make mesh of, for Mesh 
+        output mode. No copies are made. Called by mesh object when it is recomputed.'''
+        if lattice2BaseFeature.isObjectLattice(screen(obj.Object)):
+            return []
+        placements = lattice2BaseFeature.getPlacementsList(screen(obj.PlacementsTo), obj)
+        placements = DereferenceArray(obj, placements, screen(obj.PlacementsFrom), obj.Referencing)
+        n = len(placements)
+        scales = getAttributeColumn(obj, screen(obj.PlacementsTo), 'Scales', n)
+        variants = getAttributeColumn(obj, screen(obj.PlacementsTo), 'VariantIndexes', n)
+        sources = [screen(obj.Object).Shape] + [screen(v).Shape for v in obj.Variants]
+        (sourceCache, prevInstances) = self.getCaches(sources, ShapeCopy.getCopyTypeIndex(obj.Copying))
+        return [(self.getSource(sources, sourceCache, variants, scales, i)[1], placements[i]) for i in range(n)]
 
     def derivedExecute(self,obj):
         self.assureProperties(obj)
@@ -120,26 +452,103 @@ class LatticePopulateCopies(lattice2BaseFeature.LatticeFeature):
         
         placements = DereferenceArray(obj, placements, screen(obj.PlacementsFrom), obj.Referencing)
         
+        # per-instance attributes
+        n = len(placements)
+        scales = getAttributeColumn(obj, screen(obj.PlacementsTo), 'Scales', n)
+        variants = getAttributeColumn(obj, screen(obj.PlacementsTo), 'VariantIndexes', n)
+        colors = getAttributeColumn(obj, screen(obj.PlacementsTo), 'ColorIndexes', n)
+        if outputIsLattice and (scales or variants or colors):
+            lattice2Executer.warning(obj, "Per-instance attributes (scales, variants, colors) can't be applied to placements, they are ignored.")
+        sources = [objectShape] + [screen(v).Shape for v in obj.Variants]
+        
+        if obj.OutputMode == "Mesh" and outputIsLattice:
+            lattice2Executer.warning(obj, "Mesh output mode is not applicable to placements. Ignored.")
+        needShape = obj.OutputMode == "Shape" or outputIsLattice or obj.MakeShape
+        
+        # link array output
+        if obj.OutputMode == "Link array" and not outputIsLattice:
+            if colors:
+                lattice2Executer.warning(obj, "Per-instance colors are not supported by Link array output mode, they are ignored.")
+            groups = [([], [] if scales else None) for src in sources] # per variant: (placements, scales)
+            for i in range(n):
+                iVariant = variants[i] if variants else 0
+                if iVariant < 0 or iVariant >= len(sources):
+                    raise ValueError("Variant index {i} is out of range (there are {num} variants).".format(i= iVariant, num= len(sources) - 1))
+                (plms, scls) = groups[iVariant]
+                if scales:
+                    plms.append(scaledLinkPlacement(placements[i], scales[i], sources[iVariant].Placement))
+                    scls.append(scales[i])
+                else:
+                    plms.append(placements[i])
+            setLinkOutputs(obj, groups)
+        elif obj.OutputMode == "Link array":
+            lattice2Executer.warning(obj, "Link array output mode is not applicable to placements. Ignored.")
+            setLinkOutputs(obj, [([], None) for src in sources])
+        
+        if not needShape:
+            # link arrays and mesh object compute from properties, copies aren't needed
+            checkShapeConsumers(obj)
+            obj.FaceColors = []
+            obj.Shape = Part.makeCompound([])
+            return None
+        
         # initialize output containers and loop variables
         outputShapes = [] #output list of shapes
         outputPlms = [] #list of placements
         copy_method_index = ShapeCopy.getCopyTypeIndex(obj.Copying)
+        # caches, kept from previous recompute if sources are unchanged
+        (sourceCache, prevInstances) = self.getCaches(sources, copy_method_index) # sourceCache: (variant index, scale) -> source shape. Each distinct source is transformed once, and copied for the rest.
+        instanceCache = {} # instance index -> (source key, placement key, copied shape), for reuse on next recompute
+        rigid_move_ok = copy_method_index != ShapeCopy.copy_types.index("Transformed deep copy") # transformed copies have placement baked in, they can't be moved
+        instanceKeys = [] # key into sourceCache for every output shape
 
         
         # the essence
-        for plm in placements:
+        for i in range(n):
+            plm = placements[i]
 
             if outputIsLattice:
                 for objectPlm in objectPlms:
                     outputPlms.append(plm.multiply(objectPlm))
             else:
-                outputShape = ShapeCopy.copyShape(objectShape, copy_method_index, plm)
+                (key, src) = self.getSource(sources, sourceCache, variants, scales, i)
+                instanceKeys.append(key)
+                plmKey = (plm.Base.x, plm.Base.y, plm.Base.z) + tuple(plm.Rotation.Q)
+                outputShape = None
+                prev = prevInstances.get(i)
+                if prev is not None and prev[0] == key:
+                    if prev[1] == plmKey:
+                        outputShape = prev[2]
+                    elif rigid_move_ok:
+                        # same source, moved: re-place the previous copy
+                        outputShape = ShapeCopy.shallowCopy(prev[2])
+                        outputShape.Placement = plm.multiply(src.Placement)
+                if outputShape is None:
+                    outputShape = ShapeCopy.copyShape(src, copy_method_index, plm)
+                instanceCache[i] = (key, plmKey, outputShape)
                 #outputShape.Placement = plm.multiply(outputShape.Placement) # now handled by copyShape
                 outputShapes.append(outputShape)
             
+        self._cache[3] = instanceCache # only the copies in use are kept
+            
         if outputIsLattice:
+            obj.FaceColors = []
             return outputPlms
         else:
+            # face colors. The view provider applies them when the shape is set.
+            faceColors = []
+            if colors:
+                palette = obj.Palette
+                if len(palette) == 0:
+                    raise ValueError("ColorIndexes are specified, but Palette is empty.")
+                faceCounts = {}
+                for i in range(len(outputShapes)):
+                    key = instanceKeys[i]
+                    if key not in faceCounts:
+                        faceCounts[key] = len(sourceCache[key].Faces)
+                    faceColors.extend([palette[colors[i] % len(palette)]] * faceCounts[key])
+            obj.FaceColors = faceColors
+            
             # Output shape or compound (complex logic involving OutputCompounding property)
             #first, autosettle the OutputCompounding.
             if obj.OutputCompounding == "(autosettle)":
@@ -180,8 +589,24 @@ class ViewProviderLatticePopulateCopies(lattice2BaseFeature.ViewProviderLatticeF
         children = [screen(self.Object.Object), screen(self.Object.PlacementsTo)]
         if self.Object.Referencing == "Use PlacementsFrom":
             children.append(screen(self.Object.PlacementsFrom))
+        children.extend(getattr(self.Object, "LinkArrays", []))
+        if getattr(self.Object, "MeshObject", None) is not None:
+            children.append(self.Object.MeshObject)
         return children
 
+    def updateData(self, obj, prop):
+        if prop == 'Shape' and hasattr(obj, 'FaceColors'):
+            if len(obj.FaceColors) > 0:
+                if len(obj.FaceColors) == len(obj.Shape.Faces):
+                    self.ViewObject.DiffuseColor = obj.FaceColors
+            elif len(self.ViewObject.DiffuseColor) > 1:
+                # colors were cleared; go back to uniform color
+                self.ViewObject.DiffuseColor = [self.ViewObject.ShapeColor]
+
+    def onDelete(self, feature, subelements): # subelements is a tuple of strings
+        companionsOnDelete(self.Object)
+        return lattice2BaseFeature.ViewProviderLatticeFeature.onDelete(self, feature, subelements)
+
 # -------------------------- /document object --------------------------------------------------
 
 # -------------------------- Gui command --------------------------------------------------
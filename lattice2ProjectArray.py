@@ -21,6 +21,8 @@
 #*                                                                         *
 #***************************************************************************
 
+import math
+
 import FreeCAD as App
 import Part
 
@@ -29,6 +31,8 @@ import lattice2BaseFeature
 import lattice2CompoundExplorer as LCE
 import lattice2Executer
 import lattice2GeomUtils as Utils
+import lattice2SpatialHash as SH
+from lattice2Subsequencer import HashableShape
 
 __title__="Lattice ProjectArray module for FreeCAD"
 __author__ = "DeepSOIC"
@@ -37,6 +41,177 @@ __url__ = ""
 
 # -------------------------- common stuff --------------------------------------------------
 
+class ToolProjector(object):
+    """ToolProjector(shape, deflection): precomputed data for fast projection of many points 
+    onto a shape. The shape is tessellated once, tessellation points are put into a spatial 
+    hash. To project a point, nearby tessellation points are used to pick candidate faces (or 
+    edges, if the shape has no faces), and the point is projected onto the exact geometry of 
+    candidates only. Results are in the same form as infos of distToShape.
+    
+    source: the shape to check with isUpToDate, if it is not shape itself (e.g. if shape was 
+    made out of source)."""
+    
+    def __init__(self, shape, deflection, source = None):
+        self.shape = shape
+        self.source = source if source is not None else shape
+        self.deflection = deflection
+        self.faces = shape.Faces
+        self.edges = shape.Edges
+        self.vertexes = shape.Vertexes
+        
+        edge_index = {}
+        for i in range(len(self.edges)):
+            edge_index.setdefault(HashableShape(self.edges[i]), i)
+        
+        points = [] # tessellation points, as tuples
+        owners = [] # (topo, index) of the element each point belongs to
+        pieces = [] # triangles and segments of tessellation, as tuples (owner, size, points)
+        if len(self.faces) > 0:
+            self.face_edges = [] # for each face, list of indexes into self.edges
+            for i in range(len(self.faces)):
+                face = self.faces[i]
+                (pts, tris) = face.tessellate(deflection)
+                pts = [SH.vecTuple(p) for p in pts]
+                for tri in tris:
+                    corners = [pts[j] for j in tri]
+                    size = math.sqrt(max([SH.dist2(corners[j], corners[j-1]) for j in range(3)]))
+                    pieces.append((('Face', i), size, corners))
+                # boundaries of faces with no triangles, and seam regions, are covered by edge discretization
+                for edge in face.Edges:
+                    if edge.Degenerated:
+                        continue
+                    pts.extend([SH.vecTuple(p) for p in edge.discretize(Deflection= deflection)])
+                points.extend(pts)
+                owners.extend([('Face', i)] * len(pts))
+                self.face_edges.append([edge_index[HashableShape(edge)] for edge in face.Edges])
+        if len(self.edges) > 0:
+            # edges that are not bounding any face (all edges, if there are no faces)
+            face_bound = set()
+            if len(self.faces) > 0:
+                for ids in self.face_edges:
+                    face_bound.update(ids)
+            for i in range(len(self.edges)):
+                if i in face_bound or self.edges[i].Degenerated:
+                    continue
+                pts = [SH.vecTuple(p) for p in self.edges[i].discretize(Deflection= deflection)]
+                for j in range(1, len(pts)):
+                    pieces.append((('Edge', i), math.sqrt(SH.dist2(pts[j], pts[j-1])), [pts[j-1], pts[j]]))
+                points.extend(pts)
+                owners.extend([('Edge', i)] * len(pts))
+        if len(self.edges) == 0:
+            for i in range(len(self.vertexes)):
+                points.append(SH.vecTuple(self.vertexes[i].Point))
+                owners.append(('Vertex', i))
+        if len(points) == 0:
+            raise ValueError("Tool shape has nothing to project onto.")
+        
+        # A nearest point found in the hash is in the vicinity of the true projection, off by 
+        # up to the size of the triangle (segment) the projection falls onto. Typical pieces 
+        # are covered by querying the hash with extra radius of self.max_seg. The few pieces that 
+        # are much bigger (e.g. big planar faces) are kept in a list with their bounding boxes, 
+        # so that they don't inflate the radius for everything.
+        sizes = sorted([piece[1] for piece in pieces])
+        self.max_seg = 2.0 * sizes[int(len(sizes) * 0.9)] if sizes else 0.0
+        self.big_pieces = [] # tuples (owner, box_min, box_max)
+        for (owner, size, corners) in pieces:
+            if size > self.max_seg:
+                self.big_pieces.append((owner,
+                                        tuple([min([c[k] for c in corners]) for k in range(3)]),
+                                        tuple([max([c[k] for c in corners]) for k in range(3)])))
+        
+        self.grid = SH.SpatialHash(SH.autoCellSize(points))
+        for i in range(len(points)):
+            self.grid.add(points[i], owners[i])
+            
+    def isUpToDate(self, source, deflection):
+        return source.isSame(self.source) and deflection == self.deflection
+        
+    def _projectExact(self, pnt):
+        """fallback for elements whose geometry can't be projected onto directly: full distToShape on the whole shape"""
+        (dist, gaps, infos) = Part.Vertex(pnt).distToShape(self.shape)
+        (dummy, dummy, dummy, el_topo, el_index, el_params) = infos[0]
+        return (dist, gaps[0][1], el_topo, el_index, el_params)
+        
+    def _projectOnEdge(self, pnt, i_edge):
+        edge = self.edges[i_edge]
+        if edge.Degenerated:
+            prj = edge.Vertexes[0].Point
+            return ((prj - pnt).Length, prj, 'Edge', i_edge, edge.FirstParameter)
+        u1 = edge.FirstParameter
+        u2 = edge.LastParameter
+        try:
+            crv = edge.Curve
+            u = crv.parameter(pnt)
+        except Exception:
+            return self._projectExact(pnt)
+        if crv.isPeriodic():
+            per = crv.period()
+            while u < u1 - ParaConfusion:
+                u += per
+            while u > u1 + per - ParaConfusion:
+                u -= per
+        if u < u1 or u > u2:
+            # the foot is off the edge - the nearest point is an end of the edge
+            d1 = (edge.valueAt(u1) - pnt).Length
+            d2 = (edge.valueAt(u2) - pnt).Length
+            u = u1 if d1 < d2 else u2
+        prj = edge.valueAt(u)
+        return ((prj - pnt).Length, prj, 'Edge', i_edge, u)
+        
+    def _projectOnFace(self, pnt, i_face):
+        face = self.faces[i_face]
+        try:
+            (u,v) = face.Surface.parameter(pnt)
+        except Exception:
+            return self._projectExact(pnt)
+        if face.isPartOfDomain(u,v):
+            prj = face.valueAt(u,v)
+            return ((prj - pnt).Length, prj, 'Face', i_face, (u,v))
+        # the foot is outside of face boundary - the nearest point is on boundary
+        best = None
+        for i_edge in self.face_edges[i_face]:
+            sol = self._projectOnEdge(pnt, i_edge)
+            if best is None or sol[0] < best[0]:
+                best = sol
+        return best
+        
+    def project(self, pnt):
+        """project(pnt): returns tuple (dist, projected_point, element_type, element_index, element_params)"""
+        tpl = SH.vecTuple(pnt)
+        (seed, dummy) = self.grid.nearest(tpl)
+        # the projection is no farther than the seed; it is on a triangle (segment) that is 
+        # within the deflection from the true surface
+        reach = math.sqrt(SH.dist2(seed, tpl)) + self.deflection
+        candidates = set([rec[1] for rec in self.grid.query(tpl, reach + self.max_seg)])
+        for (owner, lo, hi) in self.big_pieces:
+            if owner in candidates:
+                continue
+            # squared distance from the point to bounding box of the piece
+            d2 = 0.0
+            for k in range(3):
+                d = max(lo[k] - tpl[k], 0.0, tpl[k] - hi[k])
+                d2 += d*d
+            if d2 <= reach*reach:
+                candidates.add(owner)
+        best = None
+        for (topo, index) in candidates:
+            if topo == 'Face':
+                sol = self._projectOnFace(pnt, index)
+            elif topo == 'Edge':
+                sol = self._projectOnEdge(pnt, index)
+            else:
+                prj = self.vertexes[index].Point
+                sol = ((prj - pnt).Length, prj, 'Vertex', index, None)
+            if best is None or sol[0] < best[0]:
+                best = sol
+        return best
+
+
+def latticeToPoints(shape):
+    '''latticeToPoints(shape): makes a compound of vertices at positions of placements of lattice shape.'''
+    leaves = LCE.AllLeaves(shape)
+    return Part.makeCompound([Part.Vertex(leaf.Placement.Base) for leaf in leaves])
+
 def makeProjectArray(name):
     '''makeProjectArray(name): makes a Lattice ProjectArray object.'''
     return lattice2BaseFeature.makeLatticeFeature(name, LatticeProjectArray, ViewProviderProjectArray)
@@ -64,19 +239,32 @@ class LatticeProjectArray(lattice2BaseFeature.LatticeFeature):
         
         obj.addProperty("App::PropertyEnumeration","Multisolution","Lattice ProjectArray","Specify the way of dealing with multiple solutions of projection")
         obj.Multisolution = ['use first','use all']
-                
+        
+        self.assureProperties(obj)
+        obj.Algorithm = 'batched'
+        
+    def assureProperties(self, obj):
+        '''Adds properties that might be missing, because of loaded project made with older version. Handles version compatibility.'''
+        if self.assureProperty(obj, "App::PropertyEnumeration","Algorithm", ['distToShape', 'batched'], "Lattice ProjectArray", 
+                               "distToShape: full extrema search on Tool for every placement. batched: Tool is tessellated once (and cached "
+                               "while it is unchanged), the tessellation is used to pick candidate faces/edges, then placement is projected onto them. "
+                               "Multisolution = 'use all' always uses distToShape."):
+            obj.Algorithm = 'distToShape' # this is to match the old behavior. This is not the default setting for new features.
+        self.assureProperty(obj, "App::PropertyLength","Deflection", 0.0, "Lattice ProjectArray", 
+                            "Tessellation tolerance for batched algorithm. Only affects the speed. Zero = automatic.")
 
     def derivedExecute(self,obj):
+        self.assureProperties(obj)
+        
         #validity check
         if not lattice2BaseFeature.isObjectLattice(screen(obj.Base)):
             lattice2Executer.warning(obj,"A lattice object is expected as Base, but a generic shape was provided. It will be treated as a lattice object; results may be unexpected.")
         
-        toolShape = screen(obj.Tool).Shape
-        if lattice2BaseFeature.isObjectLattice(screen(obj.Tool)):
+        toolSource = screen(obj.Tool).Shape # the shape tool projector cache is checked against
+        toolShape = toolSource
+        toolIsLattice = lattice2BaseFeature.isObjectLattice(screen(obj.Tool))
+        if toolIsLattice:
             lattice2Executer.warning(obj,"A lattice object was provided as Tool. It will be converted into points; orientations will be ignored.")
-            leaves = LCE.AllLeaves(toolShape)
-            points = [Part.Vertex(leaf.Placement.Base) for leaf in leaves]
-            toolShape = Part.makeCompound(points)
 
         leaves = LCE.AllLeaves(screen(obj.Base).Shape)
         input = [leaf.Placement for leaf in leaves]
@@ -97,14 +285,36 @@ class LatticeProjectArray(lattice2BaseFeature.LatticeFeature):
         
         isMultiSol = obj.Multisolution == 'use all'
         
+        projector = None
+        if obj.Algorithm == 'batched' and not isMultiSol:
+            deflection = float(obj.Deflection)
+            if deflection < DistConfusion:
+                deflection = toolSource.BoundBox.DiagonalLength * 0.01
+            projector = getattr(self, '_projector', None)
+            if projector is None or not projector.isUpToDate(toolSource, deflection):
+                if toolIsLattice:
+                    toolShape = latticeToPoints(toolSource)
+                projector = ToolProjector(toolShape, deflection, source= toolSource)
+                self._projector = projector
+            toolShape = projector.shape
+        else:
+            self._projector = None
+            if toolIsLattice:
+                toolShape = latticeToPoints(toolSource)
+        
         for plm in input:
-            v = Part.Vertex(plm.Base)
-            projection = v.distToShape(toolShape)
-            (dist, gaps, infos) = projection
-            for iSol in range(0,len(gaps)):
-                (posKeep, posPrj) = gaps[iSol]
-                (dummy, dummy, dummy, el_topo, el_index, el_params) = infos[iSol]
-
+            if projector is not None:
+                (dist, posPrj, el_topo, el_index, el_params) = projector.project(plm.Base)
+                solutions = [(plm.Base, posPrj, el_topo, el_index, el_params)]
+            else:
+                v = Part.Vertex(plm.Base)
+                (dist, gaps, infos) = v.distToShape(toolShape)
+                solutions = []
+                for iSol in range(0,len(gaps)):
+                    (posKeep, posPrj) = gaps[iSol]
+                    (dummy, dummy, dummy, el_topo, el_index, el_params) = infos[iSol]
+                    solutions.append((posKeep, posPrj, el_topo, el_index, el_params))
+            for (posKeep, posPrj, el_topo, el_index, el_params) in solutions:
                 # Fetch all possible parameters (some may not be required, depending on modes)
                 normal = posKeep - posPrj
                 if normal.Length < DistConfusion:
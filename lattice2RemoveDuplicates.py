@@ -0,0 +1,159 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice RemoveDuplicates object: removes or merges coincident placements of an array."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+
+import FreeCAD as App
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+import lattice2SpatialHash as SH
+
+# -------------------------- document object --------------------------------------------------
+
+def makeRemoveDuplicates(name):
+    '''makeRemoveDuplicates(name): makes a RemoveDuplicates object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeRemoveDuplicates, ViewProviderRemoveDuplicates)
+
+class LatticeRemoveDuplicates(lattice2BaseFeature.LatticeFeature):
+    "The Lattice RemoveDuplicates object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeRemoveDuplicates"
+                
+        obj.addProperty("App::PropertyLink","Base","Lattice RemoveDuplicates","Lattice, the array of placements to remove duplicates from.")
+        
+        obj.addProperty("App::PropertyLength","Tolerance","Lattice RemoveDuplicates","Placements closer to each other than this distance are considered coincident. Zero means Precision::Confusion.")
+        obj.Tolerance = 0.0
+        
+        obj.addProperty("App::PropertyBool","CompareOrientation","Lattice RemoveDuplicates","If true, placements must also have equal orientations to be considered duplicates.")
+        obj.CompareOrientation = True
+        
+        obj.addProperty("App::PropertyAngle","AngularTolerance","Lattice RemoveDuplicates","Orientations differing by less than this angle are considered equal. Zero means Precision::Angular.")
+        obj.AngularTolerance = 0.0
+        
+        obj.addProperty("App::PropertyEnumeration","MergeMode","Lattice RemoveDuplicates","What to do with a group of coincident placements. 'keep first': output the first placement of the group. 'average': output average position of the group, with orientation of the first placement.")
+        obj.MergeMode = ['keep first', 'average']
+        obj.MergeMode = 'keep first'
+        
+        obj.addProperty("App::PropertyInteger","NumMerged","Lattice RemoveDuplicates","Info: number of placements that were found to be duplicates and removed.")
+        obj.setEditorMode("NumMerged", 1) # set read-only
+
+    def derivedExecute(self,obj):
+        if not lattice2BaseFeature.isObjectLattice(screen(obj.Base)):
+            lattice2Executer.warning(obj, "Base is not a lattice, but lattice is expected. Results may be unexpected.\n")
+        input = lattice2BaseFeature.getPlacementsList(screen(obj.Base), obj, suppressWarning= True)
+        
+        points = [SH.vecTuple(plm.Base) for plm in input]
+        quats = None
+        if obj.CompareOrientation:
+            quats = [plm.Rotation.Q for plm in input]
+        (reps, owners) = SH.groupCoincident(points, 
+                                            tolerance= float(obj.Tolerance), 
+                                            quats= quats, 
+                                            angular_tolerance= math.radians(float(obj.AngularTolerance)))
+        
+        if obj.MergeMode == 'keep first':
+            output = [input[i] for i in reps]
+        elif obj.MergeMode == 'average':
+            sums = [[0.0, 0.0, 0.0] for i in reps]
+            counts = [0] * len(reps)
+            for i in range(len(points)):
+                s = sums[owners[i]]
+                p = points[i]
+                s[0] += p[0]; s[1] += p[1]; s[2] += p[2]
+                counts[owners[i]] += 1
+            output = []
+            for i_group in range(len(reps)):
+                s = sums[i_group]
+                n = float(counts[i_group])
+                output.append(App.Placement(App.Vector(s[0]/n, s[1]/n, s[2]/n), input[reps[i_group]].Rotation))
+        else:
+            raise ValueError("Merge mode not implemented: "+obj.MergeMode)
+        
+        obj.NumMerged = len(input) - len(output)
+        return output
+
+
+class ViewProviderRemoveDuplicates(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_ArrayFilter.svg')
+    
+    def claimChildren(self):
+        return [screen(self.Object.Base)]
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateRemoveDuplicates(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create RemoveDuplicates")
+    FreeCADGui.addModule("lattice2RemoveDuplicates")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2RemoveDuplicates.makeRemoveDuplicates(name='"+name+"')")
+    FreeCADGui.doCommand("f.Base = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("for child in f.ViewObject.Proxy.claimChildren():\n"+
+                         "    child.ViewObject.hide()")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandRemoveDuplicates:
+    "Command to create RemoveDuplicates feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_ArrayFilter.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_RemoveDuplicates","Remove duplicates"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_RemoveDuplicates","Lattice RemoveDuplicates: remove or merge coincident placements of an array.")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateRemoveDuplicates(name = "RemoveDuplicates")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_RemoveDuplicates", "Please select one object, first. The object must be a lattice object (array of placements).", None))
+            mb.setWindowTitle(translate("Lattice2_RemoveDuplicates","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_RemoveDuplicates', _CommandRemoveDuplicates())
+
+exportedCommands = ['Lattice2_RemoveDuplicates']
+
+# -------------------------- /Gui command --------------------------------------------------
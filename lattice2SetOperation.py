@@ -0,0 +1,199 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice SetOperation object: union, intersection or difference of arrays of placements"
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+
+import FreeCAD as App
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+import lattice2SpatialHash as SH
+
+# -------------------------- document object --------------------------------------------------
+
+def makeSetOperation(name):
+    '''makeSetOperation(name): makes a SetOperation object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeSetOperation, ViewProviderSetOperation)
+
+class LatticeSetOperation(lattice2BaseFeature.LatticeFeature):
+    "The Lattice SetOperation object"
+        
+    def derivedInit(self,obj):
+        self.Type = "LatticeSetOperation"
+        
+        obj.addProperty("App::PropertyLinkList","Links","Lattice SetOperation","Arrays to operate on. First array is the one other arrays are compared against.")
+        
+        obj.addProperty("App::PropertyEnumeration","Operation","Lattice SetOperation","union: all distinct placements of all arrays. intersection: placements of first array that are present in all other arrays. difference: placements of first array that are not present in any of other arrays.")
+        obj.Operation = ['union', 'intersection', 'difference']
+        obj.Operation = 'difference'
+        
+        obj.addProperty("App::PropertyLength","Tolerance","Lattice SetOperation","Placements closer to each other than this distance are considered equal. Zero means Precision::Confusion.")
+        obj.Tolerance = 0.0
+        
+        obj.addProperty("App::PropertyBool","CompareOrientation","Lattice SetOperation","If true, placements must also have equal orientations to be considered equal.")
+        obj.CompareOrientation = False
+        
+        obj.addProperty("App::PropertyAngle","AngularTolerance","Lattice SetOperation","Orientations differing by less than this angle are considered equal. Zero means Precision::Angular.")
+        obj.AngularTolerance = 0.0
+
+    def derivedExecute(self,obj):
+        #validity check
+        nonLattices = []
+        for link in obj.Links:
+            if not lattice2BaseFeature.isObjectLattice(screen(link)):
+                nonLattices.append(link.Label)
+        if len(nonLattices) > 0:
+            lattice2Executer.warning(obj, "Only lattice objects are expected to be linked as arrays in SetOperation. There are "
+                                    +str(len(nonLattices))+" objects which are not lattice objects. Results may be unexpected.")
+        if len(obj.Links) == 0:
+            raise ValueError("No arrays linked.")
+        
+        #extract placements
+        listlistPlms = [lattice2BaseFeature.getPlacementsList(screen(link), obj, suppressWarning= True) for link in obj.Links]
+        tol = float(obj.Tolerance)
+        angtol = math.radians(float(obj.AngularTolerance))
+        useRot = obj.CompareOrientation
+        
+        #processing
+        output = [] #list of placements
+        if obj.Operation == 'union':
+            allPlms = []
+            for plms in listlistPlms:
+                allPlms.extend(plms)
+            points = [SH.vecTuple(plm.Base) for plm in allPlms]
+            quats = [plm.Rotation.Q for plm in allPlms] if useRot else None
+            (reps, owners) = SH.groupCoincident(points, tol, quats, angtol)
+            output = [allPlms[i] for i in reps]
+        elif obj.Operation == 'intersection' or obj.Operation == 'difference':
+            sets = []
+            for plms in listlistPlms[1:]:
+                points = [SH.vecTuple(plm.Base) for plm in plms]
+                quats = [plm.Rotation.Q for plm in plms] if useRot else None
+                sets.append(SH.PointSet(points, tol, quats, angtol))
+            isIntersection = obj.Operation == 'intersection'
+            for plm in listlistPlms[0]:
+                pnt = SH.vecTuple(plm.Base)
+                q = plm.Rotation.Q if useRot else None
+                if isIntersection:
+                    keep = all([s.contains(pnt, q) for s in sets])
+                else:
+                    keep = not any([s.contains(pnt, q) for s in sets])
+                if keep:
+                    output.append(plm)
+        else:
+            raise ValueError("Operation not implemented: "+obj.Operation)
+        return output
+
+class ViewProviderSetOperation(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_JoinArrays.svg')
+
+    def claimChildren(self):
+        return self.Object.Links
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateSetOperation(name, operation):
+    sel = FreeCADGui.Selection.getSelection()
+    FreeCAD.ActiveDocument.openTransaction("Create SetOperation")
+    FreeCADGui.addModule("lattice2SetOperation")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2SetOperation.makeSetOperation(name='"+name+"')")
+    FreeCADGui.doCommand("f.Operation = "+repr(operation))
+    FreeCADGui.doCommand("f.Links = []")
+    for s in sel:
+        FreeCADGui.doCommand("f.Links = f.Links + [App.ActiveDocument."+s.Name+"]")
+    
+    FreeCADGui.doCommand("for child in f.ViewObject.Proxy.claimChildren():\n"+
+                         "    child.ViewObject.hide()")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandSetOperation:
+    "Command to create SetOperation feature"
+    
+    def __init__(self, operation):
+        self.operation = operation
+        
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_JoinArrays.svg"),
+                'MenuText': "Array set operation: " + self.operation,
+                'Accel': "",
+                'ToolTip': {'union': "Array union: all distinct placements of selected arrays.",
+                            'intersection': "Array intersection: placements of first array that are present in all other selected arrays.",
+                            'difference': "Array difference: placements of first array that are not present in other selected arrays."}[self.operation]}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) > 1 :
+            CreateSetOperation(name = "SetOperation", operation= self.operation)
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_SetOperation", "Please select at least two lattice objects. Placements of first selected array will be compared against placements of the rest of arrays.", None))
+            mb.setWindowTitle(translate("Lattice2_SetOperation","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+
+_listOfSubCommands = []
+for op in ['union', 'intersection', 'difference']:
+    cmdName = 'Lattice2_SetOperation_' + op
+    if FreeCAD.GuiUp:
+        FreeCADGui.addCommand(cmdName, _CommandSetOperation(op))
+    _listOfSubCommands.append(cmdName)
+
+class GroupCommandSetOperation:
+    def GetCommands(self):
+        global _listOfSubCommands
+        return tuple(_listOfSubCommands) # a tuple of command names that you want to group
+
+    def GetDefaultCommand(self): # return the index of the tuple of the default command. This method is optional and when not implemented '0' is used  
+        return 0
+
+    def GetResources(self):
+        return { 'MenuText': 'Array set operation:', 
+                 'ToolTip': 'Array set operation: union, intersection or difference of arrays of placements.'}
+        
+    def IsActive(self): # optional
+        return bool(App.ActiveDocument)
+        
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_SetOperation_GroupCommand',GroupCommandSetOperation())
+
+exportedCommands = ['Lattice2_SetOperation_GroupCommand']
+
+# -------------------------- /Gui command --------------------------------------------------
@@ -105,7 +105,31 @@ def transformCopy_Smart(shape, feature_placement):
     sh.Placement = feature_placement
     return sh
 
+
+def reuseCompound(compound, children, feature_placement):
+    """reuseCompound(compound, children, feature_placement): fast path for pass-through 
+    features. If children are exactly the direct children of compound (same count, order, and 
+    isSame), a compound made of them would just repeat compound, so a shallow copy of compound 
+    with feature_placement assigned is returned instead. Returns None if the compound can't be 
+    reused, and the caller should build the compound as usual."""
     
+    if compound.isNull() or compound.ShapeType != "Compound":
+        return None
+    if not PlacementsFuzzyCompare(compound.Placement, FreeCAD.Placement()):
+        # children of a placed compound have the placement baked into their locations, 
+        # and it would be lost when feature_placement is assigned.
+        return None
+    own_children = compound.childShapes()
+    if len(own_children) != len(children):
+        return None
+    for (ch1, ch2) in zip(own_children, children):
+        if not ch1.isSame(ch2):
+            return None
+    sh = shallowCopy(compound)
+    sh.Placement = feature_placement
+    return sh
+
+
 copy_types = ["Shallow copy", "Deep copy", "Transformed deep copy"]
 copy_functions = [shallowCopy, deepCopy, transformCopy]
 
@@ -132,6 +156,24 @@ def transformShape(shape, extra_placement):
         # extra_placement is a Matrix
         return transformCopy(shape, extra_placement)
     
+def scaledCopy(shape, scale):
+    """scaledCopy(shape, scale): returns a copy of shape scaled in its own coordinate system 
+    (i.e. about the origin of shape.Placement). scale is a Vector of factors along X, Y, Z. 
+    Uniform scaling keeps the geometry exact; non-uniform scaling converts curved geometry 
+    to b-splines. The placement of the returned shape equals that of the original."""
+    
+    plm = shape.Placement
+    sh = shallowCopy(shape)
+    sh.Placement = FreeCAD.Placement()
+    if abs(scale.x - scale.y) < 1e-12 and abs(scale.x - scale.z) < 1e-12:
+        sh = sh.copy()
+        sh.scale(scale.x)
+    else:
+        m = FreeCAD.Matrix()
+        m.scale(scale)
+        sh = sh.transformGeometry(m)
+    sh.Placement = plm
+    return sh
 
 class NonPlacementMatrixError(ValueError):
     pass
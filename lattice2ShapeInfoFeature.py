@@ -28,8 +28,11 @@ __doc__ = "Shape info feature is for getting info on a shape and exposing it in
 from lattice2Common import *
 import lattice2BaseFeature as LBF
 import lattice2CompoundExplorer as LCE
+from lattice2Subsequencer import HashableShape
 import FreeCAD as App
 
+from fnmatch import fnmatchcase
+
 # -------------------------- feature --------------------------------------------------
 
 def makeShapeInfoFeature(name):
@@ -47,35 +50,70 @@ class ShapeInfoFeature:
         self.Type = "ShapeInfoFeature"
         obj.addProperty("App::PropertyLink","Object","Lattice ShapeInfo","Object to be analyzed")
         
+        self.assureProperties(obj)
+        obj.Attributes = ["ShapeVolume", "ShapeArea", "ShapeLength", "ShapeCenterOfMass", "ShapePlacement", "Face*", "Edge*", "NumberOfPlacements", "Placement?", "Placements", "PlacementsCenter", "PlacementsBoundMin", "PlacementsBoundMax"]
+        
         obj.Proxy = self
         
+    def assureProperties(self, selfobj):
+        # ["*"] is the default for documents made before the property existed, so they keep exposing everything
+        LBF.assureProperty(selfobj, "App::PropertyStringList","Attributes",["*"],"Lattice ShapeInfo","Names of info properties to compute. Wildcards (*, ?) are allowed. Use * to expose everything (slow on big shapes).")
 
     def execute(self,selfobj):
+        self.assureProperties(selfobj)
+        self.patterns = list(selfobj.Attributes)
         
         self.updatedProperties = set()
         try:
             if LBF.isObjectLattice(screen(selfobj.Object)):
                 plms = LBF.getPlacementsList(screen(selfobj.Object))
-                self.assignProp(selfobj,"App::PropertyInteger","NumberOfPlacements",len(plms))
+                if self.isWanted("NumberOfPlacements"):
+                    self.assignProp(selfobj,"App::PropertyInteger","NumberOfPlacements",len(plms))
                 for i in range(    min(  len(plms), 10  )    ):
-                    self.assignProp(selfobj,"App::PropertyPlacement","Placement"+str(i),plms[i])
+                    if self.isWanted("Placement"+str(i)):
+                        self.assignProp(selfobj,"App::PropertyPlacement","Placement"+str(i),plms[i])
+                # whole-array data, for expressions like Placements[42]
+                if self.isWanted("Placements"):
+                    self.assignProp(selfobj,"App::PropertyPlacementList","Placements",plms)
+                stats = [propname for propname in ("PlacementsCenter", "PlacementsBoundMin", "PlacementsBoundMax") if self.isWanted(propname)]
+                if len(plms) > 0 and len(stats) > 0:
+                    bb = App.BoundBox()
+                    center = App.Vector()
+                    for plm in plms:
+                        bb.add(plm.Base)
+                        center += plm.Base
+                    values = {"PlacementsCenter": center * (1.0/len(plms)),
+                              "PlacementsBoundMin": App.Vector(bb.XMin, bb.YMin, bb.ZMin),
+                              "PlacementsBoundMax": App.Vector(bb.XMax, bb.YMax, bb.ZMax)}
+                    for propname in stats:
+                        self.assignProp(selfobj,"App::PropertyVector",propname,values[propname])
             else:
                 sh = screen(selfobj.Object).Shape
+                # values extracted from the shape are reused until the shape changes
+                key = HashableShape(sh)
+                cache = getattr(self, '_cache', None)
+                if cache is None or not (cache[0] == key):
+                    cache = (key, {})
+                    self._cache = cache
+                self.values = cache[1]
                 
                 self.assignProp(selfobj,"App::PropertyString","ShapeType", sh.ShapeType)
                 
                 if sh.ShapeType == "Compound" or sh.ShapeType == "CompSolid" or sh.ShapeType == "Shell" or sh.ShapeType == "Wire":
                     self.assignProp(selfobj,"App::PropertyInteger",sh.ShapeType+"NumChildren",len(sh.childShapes(False,False)))
                 if sh.ShapeType == "Compound":
-                    max_depth = 0
-                    num_leaves = 0
-                    last_leaf = None
-                    for (child, msg, it) in LCE.CompoundExplorer(sh):
-                        if it.curDepth() > max_depth:
-                            max_depth = it.curDepth()
-                        if msg == LCE.CompoundExplorer.MSG_LEAF:
-                            last_leaf = child
-                            num_leaves += 1
+                    if "CompoundExplorer" not in self.values:
+                        max_depth = 0
+                        num_leaves = 0
+                        last_leaf = None
+                        for (child, msg, it) in LCE.CompoundExplorer(sh):
+                            if it.curDepth() > max_depth:
+                                max_depth = it.curDepth()
+                            if msg == LCE.CompoundExplorer.MSG_LEAF:
+                                last_leaf = child
+                                num_leaves += 1
+                        self.values["CompoundExplorer"] = (max_depth, num_leaves, last_leaf)
+                    (max_depth, num_leaves, last_leaf) = self.values["CompoundExplorer"]
                     self.assignProp(selfobj,"App::PropertyInteger","CompoundNestingDepth", max_depth)
                     self.assignProp(selfobj,"App::PropertyInteger","CompoundNumLeaves", num_leaves)
                     if num_leaves == 1:
@@ -146,16 +184,32 @@ class ShapeInfoFeature:
         setattr(selfobj,propname,propvalue)
         self.updatedProperties.add(propname)
         
+    def isWanted(self, propname):
+        for pattern in self.patterns:
+            if fnmatchcase(propname, pattern):
+                return True
+        return False
+        
     def transplant_all_attributes(self, selfobj, source, prefix, withdraw_set = set()):
         for attrname in dir(source):
             if attrname in withdraw_set: continue
             if attrname[0]=="_": continue
-            try:
-                attr = getattr(source,attrname)
-            except Exception:
-                continue
-            if callable(attr): continue
             propname = prefix+attrname[0].upper()+attrname[1:]
+            # only evaluate the attributes asked for; some (Volume, Solids...) are expensive
+            if not (self.isWanted(propname) or self.isWanted(propname+"Count")): continue
+            key = (prefix, attrname)
+            if key in self.values:
+                attr = self.values[key]
+            else:
+                try:
+                    attr = getattr(source,attrname)
+                except Exception:
+                    attr = None
+                if type(attr) is list:
+                    attr = [None]*len(attr) # only the count is used; don't keep the elements
+                self.values[key] = attr
+            if attr is None: continue
+            if callable(attr): continue
             if type(attr) is int:
                 self.assignProp(selfobj,"App::PropertyInteger",propname,attr)
             if type(attr) is float:
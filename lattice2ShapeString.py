@@ -27,6 +27,7 @@ import lattice2BaseFeature
 import lattice2Executer
 import lattice2CompoundExplorer as LCE
 from lattice2BoundBox import getPrecisionBoundBox #needed for alignment
+from lattice2ShapeCopy import shallowCopy
 
 import FreeCAD as App
 import Part
@@ -37,11 +38,52 @@ __author__ = "DeepSOIC"
 __url__ = ""
 
 
+class LRUCache(object):
+    "Dictionary of limited size. When full, least recently used items are dropped."
+    def __init__(self, maxsize):
+        from collections import OrderedDict
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+    
+    def get(self, key, default = None):
+        if key not in self.items:
+            return default
+        value = self.items.pop(key)
+        self.items[key] = value #move to the end (most recent)
+        return value
+    
+    def put(self, key, value):
+        self.items.pop(key, None)
+        self.items[key] = value
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last= False)
+    
+    def clear(self):
+        self.items.clear()
+
+# cache of generated strings, shared by all LatticeShapeString features.
+# key: (font path, font file modification time, tuple of Draft ShapeString property values, string)
+# value: [shape, bound box, precision bound box] (boxes are computed on demand)
+string_cache = LRUCache(4000)
+
+_found_fonts = {} #(font_file_name, document file name, current dir) -> full path
+
 def findFont(font_file_name):
     '''checks for existence of the file in a few locations and returns the full path of the first one found'''
     
     import os
 
+    key = (font_file_name, App.ActiveDocument.FileName, os.path.abspath(os.curdir))
+    path = _found_fonts.get(key)
+    if path is not None and os.path.exists(path):
+        return path
+    path = _findFont(font_file_name)
+    _found_fonts[key] = path
+    return path
+
+def _findFont(font_file_name):
+    import os
+
     if os.path.isabs(font_file_name):
         if not os.path.exists(font_file_name):
             raise ValueError("Font file not found: " + font_file_name )
@@ -169,23 +211,36 @@ class LatticeShapeString:
         self.foolObj.FontFile = findFont(obj.FontFile)
         obj.FullPathToFont = self.foolObj.FontFile
         
+        import os
+        font_key = (self.foolObj.FontFile, os.path.getmtime(self.foolObj.FontFile))
+        font_key += (tuple([str(getattr(self.foolObj, propname)) for (proptype, propname, group, hint) in self.foolObj.properties
+                            if propname not in ("String", "FontFile")]),)
+        
         shapes = []
         for i in range(  0 ,  min(len(plms),len(obj.Strings))  ):
             if len(obj.Strings[i]) > 0:
-                #generate shapestring using Draft
-                self.foolObj.String = obj.Strings[i]
-                self.foolObj.Shape = None
-                self.draft_shape_string.execute(self.foolObj)
-                shape = self.foolObj.Shape
+                key = font_key + (obj.Strings[i],)
+                cached = string_cache.get(key)
+                if cached is None:
+                    #generate shapestring using Draft
+                    self.foolObj.String = obj.Strings[i]
+                    self.foolObj.Shape = None
+                    self.draft_shape_string.execute(self.foolObj)
+                    cached = [self.foolObj.Shape, None, None]
+                    string_cache.put(key, cached)
+                shape = shallowCopy(cached[0]) # identical strings share geometry
                 
                 #calculate alignment point
                 if obj.XAlign == 'None' and obj.YAlign == 'None':
                     pass #need not calculate boundbox
                 else:
-                    if obj.AlignPrecisionBoundBox:
-                        bb = getPrecisionBoundBox(shape)
-                    else:
-                        bb = shape.BoundBox
+                    ibb = 2 if obj.AlignPrecisionBoundBox else 1
+                    if cached[ibb] is None:
+                        if obj.AlignPrecisionBoundBox:
+                            cached[ibb] = getPrecisionBoundBox(shape)
+                        else:
+                            cached[ibb] = shape.BoundBox
+                    bb = cached[ibb]
 
                 alignPnt = App.Vector()
                 
@@ -209,7 +264,7 @@ class LatticeShapeString:
                 #Apply placement from array
                 shape.Placement = plms[i].multiply(shape.Placement)
                 
-                shapes.append(shape.copy())
+                shapes.append(shape)
         
         if len(shapes) == 0:
             scale = 1.0
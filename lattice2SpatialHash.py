@@ -0,0 +1,339 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Spatial hashing routines for Lattice workbench for FreeCAD"
+__author__ = "DeepSOIC"
+__url__ = ""
+__doc__ = "Utility module: bucketing of points into a uniform grid, for fast proximity queries on big arrays of placements"
+
+import math
+
+from lattice2Common import DistConfusion, ParaConfusion
+
+def vecTuple(v):
+    '''vecTuple(v): converts App.Vector into a tuple of 3 floats. Tuples are much faster to do arithmetic on in Python.'''
+    return (v.x, v.y, v.z)
+
+def cellKey(pnt, cellsize):
+    '''cellKey(pnt, cellsize): returns the key of the grid cell the point falls into. pnt is a tuple of 3 floats.'''
+    return (int(math.floor(pnt[0]/cellsize)), int(math.floor(pnt[1]/cellsize)), int(math.floor(pnt[2]/cellsize)))
+
+def dist2(p1, p2):
+    '''dist2(p1, p2): squared distance between two points (tuples)'''
+    dx = p1[0]-p2[0]
+    dy = p1[1]-p2[1]
+    dz = p1[2]-p2[2]
+    return dx*dx + dy*dy + dz*dz
+
+def rotationGap(q1, q2):
+    '''rotationGap(q1, q2): returns approximate angle (radians) between two rotations given by quaternions. 
+    Sign of quaternions does not matter.'''
+    dot = q1[0]*q2[0] + q1[1]*q2[1] + q1[2]*q2[2] + q1[3]*q2[3]
+    sgn = -1.0 if dot < 0 else 1.0
+    d = 0.0
+    for i in range(4):
+        c = q1[i] - sgn*q2[i]
+        d += c*c
+    # |q1-q2| = 2*sin(angle/4), that is close to angle/2 for small angles
+    return 2.0 * math.sqrt(d)
+
+
+def autoCellSize(points, points_per_cell = 1.0):
+    '''autoCellSize(points, points_per_cell = 1.0): guesses grid cell size to have about 
+    points_per_cell points per cell, for points evenly spread over their bounding box.'''
+    n = len(points)
+    if n == 0:
+        return 1.0
+    mins = [min([p[i] for p in points]) for i in range(3)]
+    maxs = [max([p[i] for p in points]) for i in range(3)]
+    volume = 1.0
+    for i in range(3):
+        volume *= max(maxs[i] - mins[i], DistConfusion)
+    cellsize = max((volume * points_per_cell / n) ** (1.0/3.0), DistConfusion)
+    # flat and linear arrays: don't let cells be much smaller than the spacing along the biggest extent
+    cellsize = max(cellsize, max([maxs[i] - mins[i] for i in range(3)]) * points_per_cell / n)
+    return cellsize
+
+class SpatialHash(object):
+    '''SpatialHash(cellsize): a dictionary of grid cells, each holding a list of (point, item) 
+    tuples. Points are tuples of 3 floats. Lookups of items near a point visit only a few 
+    cells, so building the hash and querying it for every point is O(N) for reasonably 
+    distributed points.'''
+    
+    def __init__(self, cellsize):
+        if cellsize < DistConfusion:
+            cellsize = DistConfusion
+        self.cellsize = float(cellsize)
+        self.cells = {}
+        
+    def key(self, pnt):
+        return cellKey(pnt, self.cellsize)
+        
+    def add(self, pnt, item):
+        key = self.key(pnt)
+        bucket = self.cells.get(key)
+        if bucket is None:
+            bucket = []
+            self.cells[key] = bucket
+        bucket.append((pnt, item))
+        
+    def itemsNear(self, pnt, reach = 1):
+        '''itemsNear(pnt, reach = 1): generator of (point, item) tuples from cells around the cell of pnt. 
+        reach is the number of cells to look at in each direction.'''
+        kx, ky, kz = self.key(pnt)
+        cells = self.cells
+        for ix in range(kx-reach, kx+reach+1):
+            for iy in range(ky-reach, ky+reach+1):
+                for iz in range(kz-reach, kz+reach+1):
+                    bucket = cells.get((ix,iy,iz))
+                    if bucket is not None:
+                        for rec in bucket:
+                            yield rec
+                            
+    def query(self, pnt, radius):
+        '''query(pnt, radius): returns list of (point, item) tuples for all points within radius of pnt.'''
+        reach = max(1, int(math.ceil(radius / self.cellsize)))
+        r2 = radius*radius
+        if (2*reach+1)**3 > len(self.cells):
+            # the search cube is bigger than what there is; scan all points
+            recs = (rec for bucket in self.cells.values() for rec in bucket)
+        else:
+            recs = self.itemsNear(pnt, reach)
+        return [rec for rec in recs if dist2(rec[0], pnt) <= r2]
+        
+    def nearest(self, pnt):
+        '''nearest(pnt): returns the (point, item) tuple nearest to pnt, or None if the hash is empty.'''
+        best = None
+        best_d2 = None
+        reach = 1
+        while True:
+            if (2*reach+1)**3 > len(self.cells):
+                # the search cube is bigger than what there is; scan all points
+                for bucket in self.cells.values():
+                    for rec in bucket:
+                        d2 = dist2(rec[0], pnt)
+                        if best is None or d2 < best_d2:
+                            best, best_d2 = rec, d2
+                return best
+            for rec in self.itemsNear(pnt, reach):
+                d2 = dist2(rec[0], pnt)
+                if best is None or d2 < best_d2:
+                    best, best_d2 = rec, d2
+            # the found point is guaranteed nearest only if it is within the fully-searched radius
+            if best is not None and best_d2 <= (reach * self.cellsize)**2:
+                return best
+            reach += 1 if best is None else max(1, int(math.ceil(math.sqrt(best_d2) / self.cellsize)) - reach)
+            
+    def kNearest(self, pnt, k, skip = None):
+        '''kNearest(pnt, k, skip = None): returns list of up to k tuples (squared_distance, (point, item)), 
+        sorted by distance. Records whose item is skip are ignored.'''
+        reach = 1
+        while True:
+            full = (2*reach+1)**3 > len(self.cells)
+            if full:
+                # the search cube is bigger than what there is; scan all points
+                recs = [rec for bucket in self.cells.values() for rec in bucket]
+            else:
+                recs = self.itemsNear(pnt, reach)
+            cand = [(dist2(rec[0], pnt), rec) for rec in recs if rec[1] != skip]
+            cand.sort(key= lambda c: c[0])
+            if full:
+                return cand[:k]
+            # found points are guaranteed nearest only if they are within the fully-searched radius
+            if len(cand) >= k and cand[k-1][0] <= (reach * self.cellsize)**2:
+                return cand[:k]
+            if len(cand) >= k:
+                reach = max(reach + 1, int(math.ceil(math.sqrt(cand[k-1][0]) / self.cellsize)))
+            else:
+                reach *= 2
+            
+    def remove(self, pnt, item):
+        '''remove(pnt, item): removes an item that was added with point pnt.'''
+        key = self.key(pnt)
+        bucket = self.cells[key]
+        for j in range(len(bucket)):
+            if bucket[j][1] == item:
+                del bucket[j]
+                break
+        if len(bucket) == 0:
+            del self.cells[key]
+        
+    def __len__(self):
+        return sum([len(bucket) for bucket in self.cells.values()])
+        
+
+def _sanitizeTolerances(tolerance, angular_tolerance):
+    if tolerance < DistConfusion:
+        tolerance = DistConfusion
+    if angular_tolerance is None or angular_tolerance < ParaConfusion:
+        angular_tolerance = ParaConfusion
+    return (tolerance, angular_tolerance)
+
+def groupCoincident(points, tolerance, quats = None, angular_tolerance = None):
+    '''groupCoincident(points, tolerance, quats = None, angular_tolerance = None): finds 
+    coincident points (and rotations, if quats are given). 
+    
+    points: list of tuples of 3 floats.
+    tolerance: distance within which points are considered coincident.
+    quats: list of quaternions (4-tuples), or None to ignore rotations.
+    angular_tolerance: max angle between rotations (radians) to consider them equal.
+    
+    Returns tuple (representatives, owners). representatives is a list of indexes of 
+    points that start a group (first occurrence). owners is a list, one item per input 
+    point, containing index into representatives list.'''
+    
+    (tolerance, angular_tolerance) = _sanitizeTolerances(tolerance, angular_tolerance)
+    grid = SpatialHash(tolerance)
+    t2 = tolerance*tolerance
+    representatives = []
+    owners = []
+    for i in range(len(points)):
+        pnt = points[i]
+        owner = None
+        for (pnt_rep, i_group) in grid.itemsNear(pnt):
+            if dist2(pnt, pnt_rep) > t2:
+                continue
+            if quats is not None:
+                if rotationGap(quats[i], quats[representatives[i_group]]) > angular_tolerance:
+                    continue
+            if owner is None or i_group < owner:
+                owner = i_group
+        if owner is None:
+            owner = len(representatives)
+            representatives.append(i)
+            grid.add(pnt, owner)
+        owners.append(owner)
+    return (representatives, owners)
+
+
+class PointSet(object):
+    '''PointSet(points, tolerance, quats = None, angular_tolerance = None): a set of points 
+    (and, optionally, rotations) for fast fuzzy membership tests. Arguments are as in 
+    groupCoincident. If quats are given, rotations must be supplied to contains() as well.'''
+    
+    def __init__(self, points, tolerance, quats = None, angular_tolerance = None):
+        (self.tolerance, self.angular_tolerance) = _sanitizeTolerances(tolerance, angular_tolerance)
+        self.quats = quats
+        self.grid = SpatialHash(self.tolerance)
+        for i in range(len(points)):
+            self.grid.add(points[i], i)
+            
+    def contains(self, pnt, quat = None):
+        '''contains(pnt, quat = None): returns True if the set has a point coincident with pnt 
+        (and a rotation equal to quat, if the set was made with rotations).'''
+        t2 = self.tolerance * self.tolerance
+        for (pnt_other, i) in self.grid.itemsNear(pnt):
+            if dist2(pnt, pnt_other) > t2:
+                continue
+            if self.quats is not None:
+                if rotationGap(quat, self.quats[i]) > self.angular_tolerance:
+                    continue
+            return True
+        return False
+
+
+# -------------------------- space-filling curves --------------------------------------------------
+
+def quantizePoints(points, bits):
+    '''quantizePoints(points, bits): converts points into integer coordinates in range 0..2**bits-1, 
+    fitting the bounding box of points. Scaling is uniform, to preserve proportions. Returns list of 3-tuples of ints.'''
+    if len(points) == 0:
+        return []
+    mins = [min([p[i] for p in points]) for i in range(3)]
+    maxs = [max([p[i] for p in points]) for i in range(3)]
+    extent = max([maxs[i] - mins[i] for i in range(3)])
+    top = (1 << bits) - 1
+    scale = top / extent   if extent > DistConfusion else   0.0
+    return [tuple([min(top, int((p[i] - mins[i]) * scale)) for i in range(3)]) for p in points]
+
+def _interleave(X, bits):
+    key = 0
+    for b in range(bits-1, -1, -1):
+        for c in X:
+            key = (key << 1) | ((c >> b) & 1)
+    return key
+
+def mortonKey(coords, bits):
+    '''mortonKey(coords, bits): position of integer point coords along Z-order (Morton) curve.'''
+    return _interleave(coords, bits)
+    
+def hilbertKey(coords, bits):
+    '''hilbertKey(coords, bits): position of integer point coords along Hilbert curve. 
+    Based on J. Skilling, "Programming the Hilbert curve" (AxesToTranspose).'''
+    X = list(coords)
+    n = len(X)
+    M = 1 << (bits-1)
+    # inverse undo
+    Q = M
+    while Q > 1:
+        P = Q - 1
+        for i in range(n):
+            if X[i] & Q:
+                X[0] ^= P
+            else:
+                t = (X[0] ^ X[i]) & P
+                X[0] ^= t
+                X[i] ^= t
+        Q >>= 1
+    # Gray encode
+    for i in range(1, n):
+        X[i] ^= X[i-1]
+    t = 0
+    Q = M
+    while Q > 1:
+        if X[n-1] & Q:
+            t ^= Q - 1
+        Q >>= 1
+    for i in range(n):
+        X[i] ^= t
+    return _interleave(X, bits)
+
+def curveOrder(points, curve = 'Hilbert', bits = 10):
+    '''curveOrder(points, curve = 'Hilbert', bits = 10): returns list of indexes of points, 
+    sorted along a space-filling curve ('Hilbert' or 'Morton'). bits sets the resolution of 
+    the curve (2**bits cells along the longest side of bounding box).'''
+    keyfunc = {'Hilbert': hilbertKey, 'Morton': mortonKey}[curve]
+    ipoints = quantizePoints(points, bits)
+    keys = [keyfunc(ip, bits) for ip in ipoints]
+    return sorted(range(len(points)), key= lambda i: keys[i])
+
+def nearestNeighbourTour(points, start = 0):
+    '''nearestNeighbourTour(points, start = 0): greedy path through all points, always 
+    going to the nearest unvisited point. Returns list of indexes of points.'''
+    n = len(points)
+    if n == 0:
+        return []
+    cellsize = autoCellSize(points)
+    grid = SpatialHash(cellsize)
+    for i in range(n):
+        grid.add(points[i], i)
+    
+    order = [start]
+    grid.remove(points[start], start)
+    cur = points[start]
+    while len(order) < n:
+        (pnt, best) = grid.nearest(cur)
+        order.append(best)
+        grid.remove(pnt, best)
+        cur = pnt
+    return order
@@ -0,0 +1,140 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice SpatialSort object: reorders placements of an array so that neighbouring indexes are close in space."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+import lattice2SpatialHash as SH
+
+# -------------------------- document object --------------------------------------------------
+
+def makeSpatialSort(name):
+    '''makeSpatialSort(name): makes a SpatialSort object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeSpatialSort, ViewProviderSpatialSort)
+
+class LatticeSpatialSort(lattice2BaseFeature.LatticeFeature):
+    "The Lattice SpatialSort object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeSpatialSort"
+                
+        obj.addProperty("App::PropertyLink","Base","Lattice SpatialSort","Lattice, the array of placements to be reordered.")
+        
+        obj.addProperty("App::PropertyEnumeration","SortMode","Lattice SpatialSort","Hilbert, Morton: sort along a space-filling curve. Nearest neighbour: greedy path, always stepping to the nearest remaining placement.")
+        obj.SortMode = ['Hilbert', 'Morton', 'Nearest neighbour']
+        obj.SortMode = 'Hilbert'
+        
+        obj.addProperty("App::PropertyInteger","Resolution","Lattice SpatialSort","Space-filling curve resolution, in bits per axis. The curve has 2**Resolution cells along the longest side of bounding box of the array.")
+        obj.Resolution = 10
+        
+        obj.addProperty("App::PropertyBool","Reverse","Lattice SpatialSort","Reverse the resulting order.")
+        
+        obj.addProperty("App::PropertyBool","OutputPermutation","Lattice SpatialSort","If true, Permutation property is filled with the indexes of placements of Base, in output order.")
+        obj.addProperty("App::PropertyIntegerList","Permutation","Lattice SpatialSort","Info: indexes of Base placements, in the order they are output (filled only if OutputPermutation is true).")
+        obj.setEditorMode("Permutation", 1) # set read-only
+
+    def derivedExecute(self,obj):
+        if not lattice2BaseFeature.isObjectLattice(screen(obj.Base)):
+            lattice2Executer.warning(obj, "Base is not a lattice, but lattice is expected. Results may be unexpected.\n")
+        input = lattice2BaseFeature.getPlacementsList(screen(obj.Base), obj, suppressWarning= True)
+        points = [SH.vecTuple(plm.Base) for plm in input]
+        
+        if obj.SortMode == 'Hilbert' or obj.SortMode == 'Morton':
+            if obj.Resolution < 1 or obj.Resolution > 20:
+                raise ValueError("Resolution must be in range 1..20, got "+str(obj.Resolution))
+            order = SH.curveOrder(points, obj.SortMode, obj.Resolution)
+        elif obj.SortMode == 'Nearest neighbour':
+            order = SH.nearestNeighbourTour(points)
+        else:
+            raise ValueError("Sort mode not implemented: "+obj.SortMode)
+        if obj.Reverse:
+            order.reverse()
+        
+        if obj.OutputPermutation:
+            obj.Permutation = order
+        elif len(obj.Permutation) > 0:
+            obj.Permutation = []
+        return [input[i] for i in order]
+
+
+class ViewProviderSpatialSort(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_Resample.svg')
+    
+    def claimChildren(self):
+        return [screen(self.Object.Base)]
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateSpatialSort(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create SpatialSort")
+    FreeCADGui.addModule("lattice2SpatialSort")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2SpatialSort.makeSpatialSort(name='"+name+"')")
+    FreeCADGui.doCommand("f.Base = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("for child in f.ViewObject.Proxy.claimChildren():\n"+
+                         "    child.ViewObject.hide()")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandSpatialSort:
+    "Command to create SpatialSort feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_Resample.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_SpatialSort","Spatial sort"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_SpatialSort","Lattice SpatialSort: reorder placements along a Hilbert/Morton curve or a nearest-neighbour path, so that neighbouring placements are close in space.")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateSpatialSort(name = "SpatialSort")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_SpatialSort", "Please select one object, first. The object must be a lattice object (array of placements).", None))
+            mb.setWindowTitle(translate("Lattice2_SpatialSort","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_SpatialSort', _CommandSpatialSort())
+
+exportedCommands = ['Lattice2_SpatialSort']
+
+# -------------------------- /Gui command --------------------------------------------------
@@ -0,0 +1,239 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice Statistics object: computes aggregate properties of an array of placements."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+
+import FreeCAD as App
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2GeomUtils as Utils
+import lattice2SpatialHash as SH
+
+# -------------------------- common stuff --------------------------------------------------
+
+def symmetricEigen3(m):
+    '''symmetricEigen3(m): eigen decomposition of symmetric 3x3 matrix (list of rows), by 
+    Jacobi rotations. Returns (values, vectors), vectors are tuples, sorted by value, descending.'''
+    a = [list(row) for row in m]
+    v = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    for sweep in range(50):
+        off = a[0][1]**2 + a[0][2]**2 + a[1][2]**2
+        if off < 1e-30 * (a[0][0]**2 + a[1][1]**2 + a[2][2]**2 + 1e-300):
+            break
+        for (p, q) in ((0,1), (0,2), (1,2)):
+            if abs(a[p][q]) < 1e-300:
+                continue
+            theta = (a[q][q] - a[p][p]) / (2.0 * a[p][q])
+            t = (1.0 if theta >= 0 else -1.0) / (abs(theta) + math.sqrt(theta*theta + 1.0))
+            c = 1.0 / math.sqrt(t*t + 1.0)
+            s = t * c
+            for k in range(3):
+                akp = a[k][p]
+                akq = a[k][q]
+                a[k][p] = c*akp - s*akq
+                a[k][q] = s*akp + c*akq
+            for k in range(3):
+                apk = a[p][k]
+                aqk = a[q][k]
+                a[p][k] = c*apk - s*aqk
+                a[q][k] = s*apk + c*aqk
+            for k in range(3):
+                vkp = v[k][p]
+                vkq = v[k][q]
+                v[k][p] = c*vkp - s*vkq
+                v[k][q] = s*vkp + c*vkq
+    order = sorted(range(3), key= lambda i: -a[i][i])
+    return ([a[i][i] for i in order], [(v[0][i], v[1][i], v[2][i]) for i in order])
+
+def computeStatistics(placements):
+    '''computeStatistics(placements): returns a dict of statistics of an array of placements. 
+    Keys: Count, Centroid, BoundMin, BoundMax, PrincipalAxes (placement), PrincipalSpread 
+    (standard deviations along principal axes), MinSpacing, MaxSpacing, MeanSpacing (nearest 
+    neighbour distances), MeanRotation, RotationSpread and RotationSpreadRMS (angles from 
+    mean rotation, degrees).'''
+    n = len(placements)
+    if n == 0:
+        raise ValueError("Array is empty")
+    points = [SH.vecTuple(plm.Base) for plm in placements]
+    
+    # first pass: sums for centroid, covariance and bounds
+    sx = sy = sz = 0.0
+    sxx = syy = szz = sxy = sxz = syz = 0.0
+    for (x, y, z) in points:
+        sx += x; sy += y; sz += z
+        sxx += x*x; syy += y*y; szz += z*z
+        sxy += x*y; sxz += x*z; syz += y*z
+    c = (sx/n, sy/n, sz/n)
+    cov = [[sxx/n - c[0]*c[0], sxy/n - c[0]*c[1], sxz/n - c[0]*c[2]],
+           [sxy/n - c[0]*c[1], syy/n - c[1]*c[1], syz/n - c[1]*c[2]],
+           [sxz/n - c[0]*c[2], syz/n - c[1]*c[2], szz/n - c[2]*c[2]]]
+    (values, vectors) = symmetricEigen3(cov)
+    bmin = tuple(min(p[k] for p in points) for k in range(3))
+    bmax = tuple(max(p[k] for p in points) for k in range(3))
+    
+    res = {}
+    res['Count'] = n
+    res['Centroid'] = App.Vector(*c)
+    res['BoundMin'] = App.Vector(*bmin)
+    res['BoundMax'] = App.Vector(*bmax)
+    ori = Utils.makeOrientationFromLocalAxesUni("XY", XAx= App.Vector(*vectors[0]), YAx= App.Vector(*vectors[1]))
+    res['PrincipalAxes'] = App.Placement(App.Vector(*c), ori)
+    res['PrincipalSpread'] = App.Vector(*[math.sqrt(max(val, 0.0)) for val in values])
+    
+    # nearest neighbour spacing
+    if n > 1:
+        grid = SH.SpatialHash(SH.autoCellSize(points))
+        for i in range(n):
+            grid.add(points[i], i)
+        spacings = [math.sqrt(grid.kNearest(points[i], 1, skip= i)[0][0]) for i in range(n)]
+        res['MinSpacing'] = min(spacings)
+        res['MaxSpacing'] = max(spacings)
+        res['MeanSpacing'] = sum(spacings) / n
+    else:
+        res['MinSpacing'] = res['MaxSpacing'] = res['MeanSpacing'] = 0.0
+    
+    # rotations: mean of quaternions, signs aligned to the running mean
+    quats = [plm.Rotation.Q for plm in placements]
+    mean = quats[0]
+    for iteration in range(2):
+        acc = [0.0, 0.0, 0.0, 0.0]
+        for q in quats:
+            sgn = 1.0 if sum(q[k]*mean[k] for k in range(4)) >= 0 else -1.0
+            for k in range(4):
+                acc[k] += sgn * q[k]
+        norm = math.sqrt(sum(v*v for v in acc))
+        if norm < ParaConfusion:
+            break # rotations cancel out; keep previous estimate
+        mean = tuple(v / norm for v in acc)
+    angles = [2.0 * math.acos(min(1.0, abs(sum(q[k]*mean[k] for k in range(4))))) for q in quats]
+    res['MeanRotation'] = App.Rotation(*mean)
+    res['RotationSpread'] = math.degrees(max(angles))
+    res['RotationSpreadRMS'] = math.degrees(math.sqrt(sum(a*a for a in angles) / n))
+    return res
+
+# -------------------------- document object --------------------------------------------------
+
+def makeStatistics(name):
+    '''makeStatistics(name): makes a Statistics object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeStatistics, ViewProviderStatistics)
+
+class LatticeStatistics(lattice2BaseFeature.LatticeFeature):
+    "The Lattice Statistics object"
+    
+    _results = [
+        ("App::PropertyInteger", "Count", "Number of placements."),
+        ("App::PropertyVector", "Centroid", "Average position of placements."),
+        ("App::PropertyVector", "BoundMin", "Minimum corner of bounding box of positions."),
+        ("App::PropertyVector", "BoundMax", "Maximum corner of bounding box of positions."),
+        ("App::PropertyPlacement", "PrincipalAxes", "Centroid, and principal axes of the point cloud (X is the direction of largest spread)."),
+        ("App::PropertyVector", "PrincipalSpread", "Standard deviations of positions along principal axes."),
+        ("App::PropertyLength", "MinSpacing", "Smallest distance from a placement to its nearest neighbour."),
+        ("App::PropertyLength", "MaxSpacing", "Largest distance from a placement to its nearest neighbour."),
+        ("App::PropertyLength", "MeanSpacing", "Average distance from a placement to its nearest neighbour."),
+        ("App::PropertyPlacement", "MeanRotation", "Average orientation of placements (in Rotation of this placement)."),
+        ("App::PropertyAngle", "RotationSpread", "Largest angle between a placement's orientation and the average orientation."),
+        ("App::PropertyAngle", "RotationSpreadRMS", "Root-mean-square angle between orientations of placements and the average orientation."),
+    ]
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeStatistics"
+                
+        obj.addProperty("App::PropertyLink","Base","Lattice Statistics","Array of placements to analyze.")
+        
+        for (proptype, propname, tooltip) in self._results:
+            obj.addProperty(proptype, propname, "Lattice Statistics", tooltip)
+            obj.setEditorMode(propname, 1) # read-only
+            
+        obj.ExposePlacement = True
+
+    def derivedExecute(self,obj):
+        plms = lattice2BaseFeature.getPlacementsList(screen(obj.Base), obj)
+        stats = computeStatistics(plms)
+        for (proptype, propname, tooltip) in self._results:
+            val = stats[propname]
+            if propname == 'MeanRotation':
+                val = App.Placement(App.Vector(), val)
+            setattr(obj, propname, val)
+        # the output is a single placement, at centroid, aligned to principal axes
+        return [stats['PrincipalAxes']]
+
+
+class ViewProviderStatistics(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_ShapeInfoFeature.svg')
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateStatistics(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create Statistics")
+    FreeCADGui.addModule("lattice2Statistics")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2Statistics.makeStatistics(name='"+name+"')")
+    FreeCADGui.doCommand("f.Base = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("f.Label = 'Statistics of ' + f.Base.Label")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandStatistics:
+    "Command to create Statistics feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_ShapeInfoFeature.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_Statistics","Array statistics"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_Statistics","Array statistics: compute count, centroid, extents, principal axes, spacing and rotation spread of an array of placements.")}
+        
+    def Activated(self):
+        sel = FreeCADGui.Selection.getSelection()
+        if len(sel) == 1 and lattice2BaseFeature.isObjectLattice(sel[0]):
+            CreateStatistics(name = "Statistics")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_Statistics", "Please select one array of placements, first.", None))
+            mb.setWindowTitle(translate("Lattice2_Statistics","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_Statistics', _CommandStatistics())
+
+exportedCommands = ['Lattice2_Statistics']
+
+# -------------------------- /Gui command --------------------------------------------------
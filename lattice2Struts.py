@@ -0,0 +1,202 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice Struts object: connects placements of an array to their nearest neighbours."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+
+import FreeCAD as App
+import Part
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+import lattice2GeomUtils as Utils
+import lattice2SpatialHash as SH
+
+# -------------------------- document object --------------------------------------------------
+
+def findConnections(points, mode, k = 4, radius = 1.0):
+    '''findConnections(points, mode, k = 4, radius = 1.0): returns list of tuples (i, j) of 
+    indexes of points to connect, i < j, without duplicates, in order of first appearance.
+    mode: 'k nearest' - connect each point to k nearest other points; 'within radius' - 
+    connect all pairs of points closer than radius.'''
+    connections = []
+    known = set()
+    def addConnection(i, j):
+        c = (i, j) if i < j else (j, i)
+        if c not in known:
+            known.add(c)
+            connections.append(c)
+    
+    if mode == 'k nearest':
+        grid = SH.SpatialHash(SH.autoCellSize(points))
+        for i in range(len(points)):
+            grid.add(points[i], i)
+        for i in range(len(points)):
+            for (d2, (pnt, j)) in grid.kNearest(points[i], k, skip= i):
+                if d2 > DistConfusion**2:
+                    addConnection(i, j)
+    elif mode == 'within radius':
+        grid = SH.SpatialHash(radius)
+        for i in range(len(points)):
+            # test against points added so far; this finds every pair once.
+            for (pnt, j) in grid.query(points[i], radius):
+                if SH.dist2(pnt, points[i]) > DistConfusion**2:
+                    addConnection(j, i)
+            grid.add(points[i], i)
+    else:
+        raise ValueError("Connection mode not implemented: " + mode)
+    return connections
+    
+def makeStruts(name):
+    '''makeStruts(name): makes a Struts object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeStruts, ViewProviderStruts)
+
+class LatticeStruts(lattice2BaseFeature.LatticeFeature):
+    "The Lattice Struts object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeStruts"
+                
+        obj.addProperty("App::PropertyLink","Base","Lattice Struts","Lattice, the array of placements (nodes) to be connected.")
+        
+        obj.addProperty("App::PropertyEnumeration","ConnectMode","Lattice Struts","k nearest: connect each node to K nearest nodes. within radius: connect all nodes closer to each other than Radius.")
+        obj.ConnectMode = ['k nearest', 'within radius']
+        obj.ConnectMode = 'k nearest'
+        
+        obj.addProperty("App::PropertyInteger","K","Lattice Struts","Number of nearest neighbours to connect each node to (for 'k nearest' mode).")
+        obj.K = 4
+        
+        obj.addProperty("App::PropertyLength","Radius","Lattice Struts","Max. length of a strut (for 'within radius' mode).")
+        obj.Radius = 1.0
+        
+        obj.addProperty("App::PropertyEnumeration","OutputMode","Lattice Struts","struts lattice: a placement at the middle of each strut, with Z axis along the strut. edges: compound of line segments.")
+        obj.OutputMode = ['struts lattice', 'edges']
+        obj.OutputMode = 'struts lattice'
+        
+        obj.addProperty("App::PropertyFloatList","Lengths","Lattice Struts","Info: lengths of struts, in output order.")
+        obj.setEditorMode("Lengths", 1) # set read-only
+        
+        obj.addProperty("App::PropertyIntegerList","Connections","Lattice Struts","Info: indexes of nodes connected by struts, two per strut, in output order.")
+        obj.setEditorMode("Connections", 1) # set read-only
+
+    def derivedExecute(self,obj):
+        if not lattice2BaseFeature.isObjectLattice(screen(obj.Base)):
+            lattice2Executer.warning(obj, "Base is not a lattice, but lattice is expected. Results may be unexpected.\n")
+        nodes = lattice2BaseFeature.getPlacementsList(screen(obj.Base), obj, suppressWarning= True)
+        points = [SH.vecTuple(plm.Base) for plm in nodes]
+        
+        if obj.ConnectMode == 'k nearest' and obj.K < 1:
+            raise ValueError("K must be positive.")
+        if obj.ConnectMode == 'within radius' and obj.Radius < DistConfusion:
+            raise ValueError("Radius must be positive.")
+        connections = findConnections(points, obj.ConnectMode, k= obj.K, radius= float(obj.Radius))
+        
+        flat = []
+        lengths = []
+        for (i, j) in connections:
+            flat.extend([i, j])
+            lengths.append(math.sqrt(SH.dist2(points[i], points[j])))
+        obj.Connections = flat
+        obj.Lengths = lengths
+        
+        if obj.OutputMode == 'struts lattice':
+            output = []
+            for (i, j) in connections:
+                p1 = nodes[i].Base
+                p2 = nodes[j].Base
+                ori = Utils.makeOrientationFromLocalAxesUni("ZX", ZAx= p2 - p1)
+                output.append(App.Placement((p1 + p2)*0.5, ori))
+            return output
+        elif obj.OutputMode == 'edges':
+            if len(connections) == 0:
+                raise ValueError("No struts were made.")
+            edges = [Part.makeLine(nodes[i].Base, nodes[j].Base) for (i, j) in connections]
+            sh = Part.makeCompound(edges)
+            sh.Placement = obj.Placement
+            obj.Shape = sh
+            return None
+        else:
+            raise ValueError("Output mode not implemented: "+obj.OutputMode)
+
+
+class ViewProviderStruts(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_LinearArray.svg')
+    
+    def claimChildren(self):
+        return [screen(self.Object.Base)]
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateStruts(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create Struts")
+    FreeCADGui.addModule("lattice2Struts")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2Struts.makeStruts(name='"+name+"')")
+    FreeCADGui.doCommand("f.Base = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("for child in f.ViewObject.Proxy.claimChildren():\n"+
+                         "    child.ViewObject.hide()")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandStruts:
+    "Command to create Struts feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_LinearArray.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_Struts","Struts"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_Struts","Lattice Struts: connect placements of an array to their nearest neighbours, making placements for struts (or edges).")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateStruts(name = "Struts")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_Struts", "Please select one object, first. The object must be a lattice object (array of placements).", None))
+            mb.setWindowTitle(translate("Lattice2_Struts","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_Struts', _CommandStruts())
+
+exportedCommands = ['Lattice2_Struts']
+
+# -------------------------- /Gui command --------------------------------------------------
@@ -0,0 +1,249 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice SurfaceSampling object: distributes placements over faces of a shape."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+import random
+import bisect
+
+import FreeCAD as App
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+import lattice2GeomUtils as Utils
+import lattice2SpatialHash as SH
+
+# -------------------------- common stuff --------------------------------------------------
+
+class SurfaceSampler(object):
+    '''SurfaceSampler(shape, deflection): tessellates faces of shape, and picks random points 
+    on the tessellation with probability proportional to area.'''
+    
+    def __init__(self, shape, deflection):
+        self.faces = shape.Faces
+        self.tris = [] # (a, b, c, face_index), corners are tuples
+        self.cumulative_area = []
+        total = 0.0
+        for i_face in range(len(self.faces)):
+            (pts, tris) = self.faces[i_face].tessellate(deflection)
+            pts = [SH.vecTuple(p) for p in pts]
+            for tri in tris:
+                (a, b, c) = [pts[i] for i in tri]
+                n = self.triNormal(a, b, c)
+                area = 0.5 * math.sqrt(n[0]*n[0] + n[1]*n[1] + n[2]*n[2])
+                if area < DistConfusion**2:
+                    continue
+                total += area
+                self.tris.append((a, b, c, i_face))
+                self.cumulative_area.append(total)
+        if len(self.tris) == 0:
+            raise ValueError("Shape has no faces to sample.")
+        self.area = total
+        
+    @staticmethod
+    def triNormal(a, b, c):
+        e1 = (b[0]-a[0], b[1]-a[1], b[2]-a[2])
+        e2 = (c[0]-a[0], c[1]-a[1], c[2]-a[2])
+        return (e1[1]*e2[2] - e1[2]*e2[1], e1[2]*e2[0] - e1[0]*e2[2], e1[0]*e2[1] - e1[1]*e2[0])
+        
+    def sample(self, rnd):
+        '''sample(rnd): returns (point, i_tri) of a uniformly random point on tessellation. rnd is random.Random.'''
+        i_tri = bisect.bisect_left(self.cumulative_area, rnd.random() * self.area)
+        i_tri = min(i_tri, len(self.tris) - 1)
+        (a, b, c, i_face) = self.tris[i_tri]
+        r1 = math.sqrt(rnd.random())
+        r2 = rnd.random()
+        wa = 1.0 - r1
+        wb = r1 * (1.0 - r2)
+        wc = r1 * r2
+        return ((wa*a[0] + wb*b[0] + wc*c[0], wa*a[1] + wb*b[1] + wc*c[1], wa*a[2] + wb*b[2] + wc*c[2]), i_tri)
+        
+    def makePlacement(self, pnt, i_tri, snap):
+        '''makePlacement(pnt, i_tri, snap): makes a placement at a sampled point, Z along surface normal, 
+        X along U direction of the face. If snap is True, the point is moved onto the exact surface.'''
+        (a, b, c, i_face) = self.tris[i_tri]
+        face = self.faces[i_face]
+        pos = App.Vector(*pnt)
+        normal = None
+        tangU = None
+        if snap:
+            try:
+                (u,v) = face.Surface.parameter(pos)
+                if face.isPartOfDomain(u,v):
+                    pos = face.valueAt(u,v)
+                    normal = face.normalAt(u,v)
+                    tangU = face.tangentAt(u,v)[0]
+            except Exception:
+                pass # degenerate point on surface, or something. Just use the tessellation.
+        if normal is None:
+            normal = App.Vector(*self.triNormal(a, b, c))
+        if tangU is not None:
+            return App.Placement(pos, Utils.makeOrientationFromLocalAxesUni("ZX", ZAx= normal, XAx= tangU))
+        return App.Placement(pos, Utils.makeOrientationFromLocalAxesUni("Z", ZAx= normal))
+
+# -------------------------- document object --------------------------------------------------
+
+def makeSurfaceSampling(name):
+    '''makeSurfaceSampling(name): makes a SurfaceSampling object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeSurfaceSampling, ViewProviderSurfaceSampling)
+
+class LatticeSurfaceSampling(lattice2BaseFeature.LatticeFeature):
+    "The Lattice SurfaceSampling object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeSurfaceSampling"
+                
+        obj.addProperty("App::PropertyLink","ShapeLink","Lattice SurfaceSampling","Shape whose faces are to be covered with placements.")
+        
+        obj.addProperty("App::PropertyEnumeration","SamplingMode","Lattice SurfaceSampling","random: uniformly random points (area-weighted). Poisson disk: random points no closer to each other than MinDistance.")
+        obj.SamplingMode = ['random', 'Poisson disk']
+        obj.SamplingMode = 'Poisson disk'
+        
+        obj.addProperty("App::PropertyInteger","Count","Lattice SurfaceSampling","Number of placements to make. In Poisson disk mode, fewer placements can be made if the surface runs out of room; zero means as many as fit.")
+        obj.Count = 100
+        
+        obj.addProperty("App::PropertyLength","MinDistance","Lattice SurfaceSampling","Minimum distance between placements, for Poisson disk mode.")
+        obj.MinDistance = 1.0
+        
+        obj.addProperty("App::PropertyInteger","Seed","Lattice SurfaceSampling","Seed of random number generator. Same seed gives same result.")
+        obj.Seed = 0
+        
+        obj.addProperty("App::PropertyInteger","MaxAttempts","Lattice SurfaceSampling","Poisson disk mode: stop after this number of consecutive rejected candidate points.")
+        obj.MaxAttempts = 1000
+        
+        obj.addProperty("App::PropertyBool","SnapToSurface","Lattice SurfaceSampling","Move placements from tessellation onto the exact surface, and use exact normals.")
+        obj.SnapToSurface = True
+        
+        obj.addProperty("App::PropertyLength","Deflection","Lattice SurfaceSampling","Tessellation tolerance. Zero = automatic.")
+        obj.Deflection = 0.0
+
+    def derivedExecute(self,obj):
+        if lattice2BaseFeature.isObjectLattice(screen(obj.ShapeLink)):
+            lattice2Executer.warning(obj,"ShapeLink points to a placement/array of placements. A shape with faces is expected.")
+        shape = screen(obj.ShapeLink).Shape
+        
+        deflection = float(obj.Deflection)
+        if deflection < DistConfusion:
+            deflection = shape.BoundBox.DiagonalLength * 0.005
+        sampler = SurfaceSampler(shape, deflection)
+        rnd = random.Random(obj.Seed)
+        
+        snap = obj.SnapToSurface
+        placements = []
+        if obj.SamplingMode == 'random':
+            if obj.Count < 1:
+                raise ValueError("Count must be positive.")
+            for i in range(obj.Count):
+                (pnt, i_tri) = sampler.sample(rnd)
+                placements.append(sampler.makePlacement(pnt, i_tri, snap))
+        elif obj.SamplingMode == 'Poisson disk':
+            mindist = float(obj.MinDistance)
+            if mindist < DistConfusion:
+                raise ValueError("MinDistance must be positive.")
+            if obj.Count < 1 and obj.MaxAttempts < 1:
+                raise ValueError("Count or MaxAttempts must be positive, otherwise sampling never stops.")
+            grid = SH.SpatialHash(mindist)
+            md2 = mindist**2
+            fails = 0
+            while (obj.Count < 1 or len(placements) < obj.Count) and (obj.MaxAttempts < 1 or fails < obj.MaxAttempts):
+                (pnt, i_tri) = sampler.sample(rnd)
+                # distances are checked after snapping, as snapping moves points
+                plm = sampler.makePlacement(pnt, i_tri, snap)
+                pnt = SH.vecTuple(plm.Base)
+                too_close = False
+                for (other, dummy) in grid.itemsNear(pnt):
+                    if SH.dist2(pnt, other) < md2:
+                        too_close = True
+                        break
+                if too_close:
+                    fails += 1
+                    continue
+                fails = 0
+                grid.add(pnt, None)
+                placements.append(plm)
+        else:
+            raise ValueError("Sampling mode not implemented: "+obj.SamplingMode)
+        
+        return placements
+
+
+class ViewProviderSurfaceSampling(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_ArrayFromShape.svg')
+    
+    def claimChildren(self):
+        return [screen(self.Object.ShapeLink)]
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateSurfaceSampling(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create SurfaceSampling")
+    FreeCADGui.addModule("lattice2SurfaceSampling")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2SurfaceSampling.makeSurfaceSampling(name='"+name+"')")
+    FreeCADGui.doCommand("f.ShapeLink = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("f.MinDistance = (f.ShapeLink.Shape.Area / f.Count) ** 0.5 * 0.7")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandSurfaceSampling:
+    "Command to create SurfaceSampling feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_ArrayFromShape.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_SurfaceSampling","Scatter on surface"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_SurfaceSampling","Lattice SurfaceSampling: scatter placements over faces of a shape, aligned to the surface normal (random or Poisson-disk).")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateSurfaceSampling(name = "SurfaceSampling")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_SurfaceSampling", "Please select one object, first. The object must be a shape with faces.", None))
+            mb.setWindowTitle(translate("Lattice2_SurfaceSampling","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_SurfaceSampling', _CommandSurfaceSampling())
+
+exportedCommands = ['Lattice2_SurfaceSampling']
+
+# -------------------------- /Gui command --------------------------------------------------
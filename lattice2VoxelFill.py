@@ -0,0 +1,330 @@
+#***************************************************************************
+#*                                                                         *
+#*   Copyright (c) 2019 - Victor Titov (DeepSOIC)                          *
+#*                                               <vv.titov@gmail.com>      *  
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   This program is distributed in the hope that it will be useful,       *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Library General Public License for more details.                  *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with this program; if not, write to the Free Software   *
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#***************************************************************************
+
+__title__="Lattice VoxelFill object: fills the inside of a solid with a regular lattice of placements."
+__author__ = "DeepSOIC"
+__url__ = ""
+
+import math
+
+import FreeCAD as App
+import Part
+
+from lattice2Common import *
+import lattice2BaseFeature
+import lattice2Executer
+import lattice2SpatialHash as SH
+
+# -------------------------- common stuff --------------------------------------------------
+
+def makeRows(packing, spacing, bbox):
+    '''makeRows(packing, spacing, bbox): returns list of grid rows covering bbox. Rows are 
+    parallel to X axis. Each row is a tuple (y, z, x_offset); points of the row are at 
+    x = x_offset + i*spacing. Grid is anchored to global origin, so it doesn't jump as 
+    the shape is edited.
+    packing: 'cubic', 'body-centered cubic', or 'hexagonal close-packed'.'''
+    s = spacing
+    rows = []
+    def irange(vmin, vmax, step, offset = 0.0):
+        return range(int(math.floor((vmin - offset)/step)), int(math.ceil((vmax - offset)/step)) + 1)
+    if packing == 'cubic':
+        for k in irange(bbox.ZMin, bbox.ZMax, s):
+            for j in irange(bbox.YMin, bbox.YMax, s):
+                rows.append((j*s, k*s, 0.0))
+    elif packing == 'body-centered cubic':
+        for sub in (0.0, 0.5*s):
+            for k in irange(bbox.ZMin, bbox.ZMax, s, sub):
+                for j in irange(bbox.YMin, bbox.YMax, s, sub):
+                    rows.append((j*s + sub, k*s + sub, sub))
+    elif packing == 'hexagonal close-packed':
+        # s is distance between neighbour points. Layers are ABAB-stacked triangular grids.
+        dy = s * math.sqrt(3.0) / 2.0
+        dz = s * math.sqrt(2.0/3.0)
+        for k in irange(bbox.ZMin, bbox.ZMax, dz):
+            layer_y = (s * math.sqrt(3.0) / 6.0)   if k % 2 else   0.0
+            layer_x = 0.5*s   if k % 2 else   0.0
+            for j in irange(bbox.YMin, bbox.YMax, dy, layer_y):
+                row_x = layer_x + (0.5*s   if j % 2 else   0.0)
+                rows.append((j*dy + layer_y, k*dz, row_x))
+    else:
+        raise ValueError("Packing not implemented: " + packing)
+    return rows
+
+
+class RayCaster(object):
+    '''RayCaster(shape, deflection): tessellates shape and finds crossings of rays parallel 
+    to X axis with the tessellation. Triangles are bucketed by their YZ bounding box, so a 
+    ray only tests triangles that it can possibly hit.'''
+    
+    def __init__(self, shape, deflection, cellsize):
+        (points, tris) = shape.tessellate(deflection)
+        self.deflection = deflection
+        self.cellsize = cellsize
+        self.points = [SH.vecTuple(p) for p in points]
+        self.tris = []
+        self.cells = {}
+        for tri in tris:
+            (a, b, c) = [self.points[i] for i in tri]
+            # 2d (y,z) setup for barycentric coordinates
+            e1y = b[1]-a[1]; e1z = b[2]-a[2]
+            e2y = c[1]-a[1]; e2z = c[2]-a[2]
+            det = e1y*e2z - e2y*e1z
+            # normal's x component, relative to normal length: how steep the ray hits the triangle
+            e1x = b[0]-a[0]; e2x = c[0]-a[0]
+            nx = det
+            ny = e1z*e2x - e1x*e2z
+            nz = e1x*e2y - e1y*e2x
+            nlen = math.sqrt(nx*nx + ny*ny + nz*nz)
+            if nlen < DistConfusion**2 or abs(det) < nlen * ParaConfusion:
+                continue # degenerate, or parallel to rays
+            # uncertainty of crossing x, caused by distance between tessellation and true surface
+            band = min(deflection * nlen / abs(det), max(abs(e1x), abs(e2x), abs(e1x - e2x)) + deflection)
+            i_tri = len(self.tris)
+            self.tris.append((a, e1x, e1y, e1z, e2x, e2y, e2z, det, band))
+            ymin = min(a[1], b[1], c[1]); ymax = max(a[1], b[1], c[1])
+            zmin = min(a[2], b[2], c[2]); zmax = max(a[2], b[2], c[2])
+            for iy in range(int(math.floor(ymin/cellsize)), int(math.floor(ymax/cellsize)) + 1):
+                for iz in range(int(math.floor(zmin/cellsize)), int(math.floor(zmax/cellsize)) + 1):
+                    self.cells.setdefault((iy, iz), []).append(i_tri)
+                    
+    def crossings(self, y, z):
+        '''crossings(y, z): returns sorted list of (x, band) of crossings of the ray with the 
+        tessellation. band is the uncertainty of x.'''
+        result = []
+        for i_tri in self.cells.get((int(math.floor(y/self.cellsize)), int(math.floor(z/self.cellsize))), []):
+            (a, e1x, e1y, e1z, e2x, e2y, e2z, det, band) = self.tris[i_tri]
+            py = y - a[1]; pz = z - a[2]
+            u = (py*e2z - e2y*pz) / det
+            if u < 0.0 or u > 1.0:
+                continue
+            v = (e1y*pz - py*e1z) / det
+            if v < 0.0 or u + v > 1.0:
+                continue
+            result.append((a[0] + u*e1x + v*e2x, band, det > 0))
+        result.sort()
+        # a ray through an edge of tessellation hits both triangles sharing the edge. Such 
+        # crossings are at the same x, and the surface is crossed in the same direction. 
+        # Keep only one of them.
+        filtered = []
+        for cr in result:
+            if len(filtered) > 0 and abs(cr[0] - filtered[-1][0]) < DistConfusion and cr[2] == filtered[-1][2]:
+                continue
+            filtered.append(cr)
+        return [(x, band) for (x, band, direction) in filtered]
+
+
+class BoundaryDistance(object):
+    '''BoundaryDistance(raycaster, step): estimates distance from points to the surface of 
+    a tessellated shape, using a spatial hash of points sampled on the triangles with the given 
+    step. Estimates come with guaranteed bounds; callers can run an exact test when the 
+    bounds are not conclusive.'''
+    
+    def __init__(self, raycaster, step):
+        pts = raycaster.points
+        samples = []
+        cover = 0.0 # max distance from a point on tessellation to the nearest sample
+        for (a, e1x, e1y, e1z, e2x, e2y, e2z, det, band) in raycaster.tris:
+            longest = math.sqrt(max(e1x*e1x + e1y*e1y + e1z*e1z,  e2x*e2x + e2y*e2y + e2z*e2z,  
+                                    (e1x-e2x)**2 + (e1y-e2y)**2 + (e1z-e2z)**2))
+            n = max(1, int(math.ceil(longest / step)))
+            cover = max(cover, longest / n)
+            for i in range(n+1):
+                for j in range(n+1-i):
+                    u = float(i)/n; v = float(j)/n
+                    samples.append((a[0] + u*e1x + v*e2x, a[1] + u*e1y + v*e2y, a[2] + u*e1z + v*e2z))
+        samples.extend(pts)
+        self.cover = cover + raycaster.deflection
+        self.grid = SH.SpatialHash(max(step, DistConfusion))
+        for p in samples:
+            self.grid.add(p, None)
+            
+    def bounds(self, pnt, limit):
+        '''bounds(pnt, limit): returns (lower, upper) bounds of distance from pnt to true surface. 
+        Only distances up to limit are of interest: if the surface is farther than that, 
+        (limit, None) is returned without looking for the nearest sample.'''
+        d2 = None
+        for (sample, dummy) in self.grid.query(pnt, limit + self.cover):
+            d2_s = SH.dist2(sample, pnt)
+            if d2 is None or d2_s < d2:
+                d2 = d2_s
+        if d2 is None:
+            return (limit, None)
+        d = math.sqrt(d2)
+        return (d - self.cover, d + self.cover)
+        
+# -------------------------- document object --------------------------------------------------
+
+def makeVoxelFill(name):
+    '''makeVoxelFill(name): makes a VoxelFill object.'''
+    return lattice2BaseFeature.makeLatticeFeature(name, LatticeVoxelFill, ViewProviderVoxelFill)
+
+class LatticeVoxelFill(lattice2BaseFeature.LatticeFeature):
+    "The Lattice VoxelFill object"
+    
+    def derivedInit(self,obj):
+        self.Type = "LatticeVoxelFill"
+                
+        obj.addProperty("App::PropertyLink","ShapeLink","Lattice VoxelFill","Solid to be filled with placements.")
+        
+        obj.addProperty("App::PropertyEnumeration","Packing","Lattice VoxelFill","Type of the lattice.")
+        obj.Packing = ['cubic', 'body-centered cubic', 'hexagonal close-packed']
+        obj.Packing = 'cubic'
+        
+        obj.addProperty("App::PropertyLength","Spacing","Lattice VoxelFill","Size of cubic cell (cubic and bcc), or distance between neighbour placements (hcp).")
+        obj.Spacing = 1.0
+        
+        obj.addProperty("App::PropertyLength","Margin","Lattice VoxelFill","Placements closer than this to the surface of the solid are rejected.")
+        obj.Margin = 0.0
+        
+        obj.addProperty("App::PropertyLength","Deflection","Lattice VoxelFill","Tessellation tolerance. Placements near tessellation crossings are tested against exact shape, but placements closer to the surface than Deflection may still be misclassified, unless Margin exceeds it. Zero = automatic (Spacing/10).")
+        obj.Deflection = 0.0
+        
+        obj.addProperty("App::PropertyInteger","NumExactTests","Lattice VoxelFill","Info: number of placements that were too close to the surface and had to be tested against exact shape.")
+        obj.setEditorMode("NumExactTests", 1) # set read-only
+
+    def derivedExecute(self,obj):
+        if lattice2BaseFeature.isObjectLattice(screen(obj.ShapeLink)):
+            lattice2Executer.warning(obj,"ShapeLink points to a placement/array of placements. A solid is expected.")
+        shape = screen(obj.ShapeLink).Shape
+        if len(shape.Solids) == 0:
+            raise ValueError("Shape to fill has no solids.")
+        
+        s = float(obj.Spacing)
+        if s < DistConfusion:
+            raise ValueError("Spacing must be positive.")
+        margin = float(obj.Margin)
+        deflection = float(obj.Deflection)
+        if deflection < DistConfusion:
+            deflection = s * 0.1
+        
+        bbox = shape.BoundBox
+        rows = makeRows(obj.Packing, s, bbox)
+        caster = RayCaster(shape, deflection, s)
+        distances = BoundaryDistance(caster, s * 0.5) if margin > DistConfusion else None
+        
+        # rays are shifted off the rows a tiny bit, to not hit edges and vertices of tessellation exactly
+        jy = s * 1.234567e-7
+        jz = s * 0.987654e-7
+        
+        n_exact = 0
+        output = []
+        for (y, z, x_offset) in rows:
+            crossings = caster.crossings(y + jy, z + jz)
+            if len(crossings) == 0:
+                continue
+            row_is_sane = len(crossings) % 2 == 0
+            if not row_is_sane:
+                # ray hit a tessellation hole, or an edge. Fall back to exact tests for this row.
+                crossings = [(crossings[0][0], 0.0), (crossings[-1][0], 0.0)]
+            max_band = max([band for (xc, band) in crossings])
+            x_first = crossings[0][0] - max_band
+            x_last = crossings[-1][0] + max_band
+            i_cr = 0 # index of first crossing that is not entirely behind current x
+            inside = False
+            for i in range(int(math.floor((x_first - x_offset)/s)), int(math.ceil((x_last - x_offset)/s)) + 1):
+                x = x_offset + i*s
+                while i_cr < len(crossings) and crossings[i_cr][0] + crossings[i_cr][1] < x:
+                    i_cr += 1
+                    inside = not inside
+                near_boundary = not row_is_sane
+                j = i_cr
+                while not near_boundary and j < len(crossings) and crossings[j][0] - max_band <= x:
+                    near_boundary = abs(crossings[j][0] - x) <= crossings[j][1]
+                    j += 1
+                # classify
+                pnt = App.Vector(x, y, z)
+                if near_boundary:
+                    n_exact += 1
+                    if not shape.isInside(pnt, DistConfusion, True):
+                        continue
+                elif not inside:
+                    continue
+                if distances is not None:
+                    (dmin, dmax) = distances.bounds((x, y, z), margin)
+                    if dmax is not None and dmax < margin:
+                        continue
+                    if dmin < margin:
+                        n_exact += 1
+                        if Part.Vertex(pnt).distToShape(shape)[0] < margin:
+                            continue
+                output.append(App.Placement(pnt, App.Rotation()))
+        obj.NumExactTests = n_exact
+        return output
+
+
+class ViewProviderVoxelFill(lattice2BaseFeature.ViewProviderLatticeFeature):
+        
+    def getIcon(self):
+        return getIconPath('Lattice2_ArrayFromShape.svg')
+    
+    def claimChildren(self):
+        return [screen(self.Object.ShapeLink)]
+
+
+# -------------------------- /document object --------------------------------------------------
+
+# -------------------------- Gui command --------------------------------------------------
+
+def CreateVoxelFill(name):
+    sel = FreeCADGui.Selection.getSelectionEx()
+    FreeCAD.ActiveDocument.openTransaction("Create VoxelFill")
+    FreeCADGui.addModule("lattice2VoxelFill")
+    FreeCADGui.addModule("lattice2Executer")
+    FreeCADGui.doCommand("f = lattice2VoxelFill.makeVoxelFill(name='"+name+"')")
+    FreeCADGui.doCommand("f.ShapeLink = App.ActiveDocument."+sel[0].ObjectName)
+    FreeCADGui.doCommand("f.Spacing = f.ShapeLink.Shape.BoundBox.DiagonalLength / 20")
+    FreeCADGui.doCommand("lattice2Executer.executeFeature(f)")
+    FreeCADGui.doCommand("f = None")
+    FreeCAD.ActiveDocument.commitTransaction()
+
+
+class _CommandVoxelFill:
+    "Command to create VoxelFill feature"
+    def GetResources(self):
+        return {'Pixmap'  : getIconPath("Lattice2_ArrayFromShape.svg"),
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Lattice2_VoxelFill","Fill solid"),
+                'Accel': "",
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Lattice2_VoxelFill","Lattice VoxelFill: fill the inside of a solid with a cubic, bcc or hcp lattice of placements.")}
+        
+    def Activated(self):
+        if len(FreeCADGui.Selection.getSelection()) == 1 :
+            CreateVoxelFill(name = "VoxelFill")
+        else:
+            mb = QtGui.QMessageBox()
+            mb.setIcon(mb.Icon.Warning)
+            mb.setText(translate("Lattice2_VoxelFill", "Please select one object, first. The object must be a solid.", None))
+            mb.setWindowTitle(translate("Lattice2_VoxelFill","Bad selection", None))
+            mb.exec_()
+            
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+            
+if FreeCAD.GuiUp:
+    FreeCADGui.addCommand('Lattice2_VoxelFill', _CommandVoxelFill())
+
+exportedCommands = ['Lattice2_VoxelFill']
+
+# -------------------------- /Gui command --------------------------------------------------
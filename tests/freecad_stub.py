@@ -0,0 +1,56 @@
+# Minimal stand-ins for FreeCAD and Part modules, so that pure-Python algorithms of Lattice2
+# can be tested without FreeCAD. If FreeCAD can be imported, it is used instead.
+
+import math
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Vector(object):
+    def __init__(self, x = 0.0, y = 0.0, z = 0.0):
+        (self.x, self.y, self.z) = (float(x), float(y), float(z))
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, k):
+        return Vector(self.x * k, self.y * k, self.z * k)
+
+    @property
+    def Length(self):
+        return math.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+
+def install():
+    '''install(): puts stub FreeCAD and Part modules into sys.modules, unless FreeCAD is available.'''
+    try:
+        __import__('FreeCAD')
+        return
+    except ImportError:
+        pass
+
+    class FreeCADError(Exception):
+        pass
+
+    def ignore(*args):
+        pass
+
+    App = types.ModuleType('FreeCAD')
+    App.GuiUp = False
+    App.Vector = Vector
+    App.Base = types.ModuleType('Base')
+    App.Base.FreeCADError = FreeCADError
+    App.Base.Vector = Vector
+    App.Console = types.ModuleType('Console')
+    App.Console.PrintMessage = App.Console.PrintWarning = App.Console.PrintError = App.Console.PrintLog = ignore
+    sys.modules['FreeCAD'] = App
+    sys.modules['Part'] = types.ModuleType('Part')
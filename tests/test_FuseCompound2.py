@@ -0,0 +1,184 @@
+# Tests of incremental fusing of FuseCompound. TestFuseByClusters needs FreeCAD's Part module; 
+# run with FreeCAD's python, e.g.:
+#   FreeCADCmd -c "import sys, unittest; sys.path.append('path/to/Lattice2/tests'); unittest.main(module='test_FuseCompound2', argv=['x'], exit=False)"
+# or with pytest, if FreeCAD's lib directory is on PYTHONPATH. TestFuseCache runs without FreeCAD.
+
+import unittest
+
+import freecad_stub
+freecad_stub.install()
+
+import FreeCAD as App
+import Part
+
+import FuseCompound2
+
+
+def makeGrid(nx, ny):
+    '''makeGrid(nx, ny): grid of overlapping boxes, all connected into one cluster.'''
+    return [makeBox(i, nx) for i in range(nx * ny)]
+
+def makeBox(i, nx, height = 2.0):
+    return Part.makeBox(2.0, 2.0, height, App.Vector(1.5 * (i % nx), 1.5 * (i // nx), 0))
+
+def changed(shapes, i, nx):
+    '''changed(shapes, i, nx): copy of list of grid shapes, with box i replaced with a taller one. 
+    Other shapes are the same objects, as they would be on recompute.'''
+    shapes = list(shapes)
+    shapes[i] = makeBox(i, nx, 3.0)
+    return shapes
+
+
+@unittest.skipIf(not hasattr(Part, "makeBox"), "FreeCAD is required")
+class TestFuseByClusters(unittest.TestCase):
+
+    def assertSameSolid(self, a, b):
+        tol = 1e-6 * b.Volume
+        self.assertAlmostEqual(a.Volume, b.Volume, delta= tol)
+        self.assertAlmostEqual(a.Area, b.Area, delta= 1e-6 * b.Area)
+        self.assertLess(a.cut(b).Volume, tol)
+        self.assertLess(b.cut(a).Volume, tol)
+
+    def countFuses(self, func):
+        calls = [0]
+        original = FuseCompound2.fuseShapes
+        def counting(shps, refine):
+            calls[0] += 1
+            return original(shps, refine)
+        FuseCompound2.fuseShapes = counting
+        try:
+            rst = func()
+        finally:
+            FuseCompound2.fuseShapes = original
+        return (rst, calls[0])
+
+    def test_partitioned(self):
+        shapes = makeGrid(10, 10)
+        full = FuseCompound2.fuseShapes(shapes, True)
+        partitioned = FuseCompound2.fuseByClusters(shapes, True, leaf_size= 8)
+        self.assertSameSolid(partitioned, full)
+
+    def test_cached(self):
+        grid = makeGrid(10, 10)
+        cache = {}
+        FuseCompound2.fuseByClusters(grid, True, ({}, cache), leaf_size= 8)
+
+        shapes = changed(grid, 37, 10)
+        (cached, numCached) = self.countFuses(lambda: FuseCompound2.fuseByClusters(shapes, True, (cache, {}), leaf_size= 8))
+        (uncached, numUncached) = self.countFuses(lambda: FuseCompound2.fuseByClusters(shapes, True, leaf_size= 8))
+        full = FuseCompound2.fuseShapes(shapes, True)
+
+        self.assertSameSolid(cached, uncached)
+        self.assertSameSolid(cached, full)
+        # only the partition of the changed box, and merges on the way up, are redone
+        self.assertLess(numCached, numUncached // 3)
+
+    def test_change_nochange_change(self):
+        grid = makeGrid(10, 10)
+        cache = {}
+        FuseCompound2.fuseByClusters(grid, True, ({}, cache), leaf_size= 8)
+        shapes = changed(grid, 37, 10)
+        for step in range(2):
+            new_cache = {}
+            (rst, num) = self.countFuses(lambda: FuseCompound2.fuseByClusters(shapes, True, (cache, new_cache), leaf_size= 8))
+            cache = new_cache
+        self.assertEqual(num, 0)
+        shapes = changed(shapes, 62, 10)
+        (cached, num) = self.countFuses(lambda: FuseCompound2.fuseByClusters(shapes, True, (cache, {}), leaf_size= 8))
+        self.assertLess(num, 10)
+        self.assertSameSolid(cached, FuseCompound2.fuseShapes(shapes, True))
+
+    def test_cache_unchanged(self):
+        shapes = makeGrid(10, 10)
+        cache = {}
+        first = FuseCompound2.fuseByClusters(shapes, True, ({}, cache), leaf_size= 8)
+        (second, num) = self.countFuses(lambda: FuseCompound2.fuseByClusters(shapes, True, (cache, {}), leaf_size= 8))
+        self.assertEqual(num, 0)
+        self.assertTrue(second.isSame(first))
+
+
+
+class FakeShape(object):
+    '''Stands in for a shape in fusing: a set of names of the input shapes it was fused from.'''
+    ShapeType = 'Solid'
+
+    def __init__(self, names, pos = None, height = 2.0):
+        self.names = frozenset(names)
+        if pos is not None:
+            (x, y) = pos
+            self.BoundBox = FakeBoundBox((x, y, 0.0), (x + 2.0, y + 2.0, height))
+
+    def hashCode(self):
+        return hash(self.names)
+
+    def isSame(self, other):
+        return self is other
+
+    def multiFuse(self, others):
+        names = set(self.names)
+        for sh in others:
+            names |= sh.names
+        return FakeShape(names)
+
+    def removeSplitter(self):
+        return self
+
+class FakeBoundBox(object):
+    def __init__(self, lo, hi):
+        (self.XMin, self.YMin, self.ZMin) = lo
+        (self.XMax, self.YMax, self.ZMax) = hi
+        self.DiagonalLength = sum([(hi[k] - lo[k])**2 for k in range(3)]) ** 0.5
+        self.Center = App.Vector(*[(lo[k] + hi[k]) * 0.5 for k in range(3)])
+
+def makeFakeBox(i, nx, height = 2.0):
+    return FakeShape([i], (1.5 * (i % nx), 1.5 * (i // nx)), height)
+
+def makeFakeGrid(nx, ny):
+    return [makeFakeBox(i, nx) for i in range(nx * ny)]
+
+def fakeChanged(shapes, i, nx):
+    shapes = list(shapes)
+    shapes[i] = makeFakeBox(i, nx, 3.0)
+    return shapes
+
+
+class TestFuseCache(unittest.TestCase):
+    '''Tests of which fuses are redone, with fake shapes.'''
+
+    def fuse(self, shapes, cache):
+        '''returns (result, new cache, number of shapes that went into fuse operations)'''
+        inputs = [0]
+        original = FuseCompound2.fuseShapes
+        def counting(shps, refine):
+            inputs[0] += len(shps)
+            return original(shps, refine)
+        FuseCompound2.fuseShapes = counting
+        new_cache = {}
+        try:
+            rst = FuseCompound2.fuseByClusters(shapes, True, (cache, new_cache), leaf_size= 8)
+        finally:
+            FuseCompound2.fuseShapes = original
+        return (rst, new_cache, inputs[0])
+
+    def test_change_nochange_change(self):
+        n = 16
+        grid = makeFakeGrid(n, n)
+        (rst, cache, full) = self.fuse(grid, {})
+        self.assertEqual(rst.names, frozenset(range(n*n)))
+
+        shapes = fakeChanged(grid, 100, n)
+        (rst, cache, num) = self.fuse(shapes, cache)
+        self.assertLess(num, full // 5)
+        self.assertEqual(rst.names, frozenset(range(n*n)))
+
+        # nothing changed: nothing is refused, and the partial results are kept for next time
+        (rst, cache_nochange, num) = self.fuse(shapes, cache)
+        self.assertEqual(num, 0)
+        self.assertEqual(len(cache_nochange), len(cache))
+
+        (rst, cache, num) = self.fuse(fakeChanged(shapes, 5, n), cache_nochange)
+        self.assertLess(num, full // 5)
+        self.assertEqual(rst.names, frozenset(range(n*n)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import random
+import unittest
+
+import freecad_stub
+freecad_stub.install()
+
+import lattice2SpatialHash as SH
+
+
+def randomPoints(rnd, n, extent = 10.0):
+    return [(rnd.uniform(0, extent), rnd.uniform(0, extent), rnd.uniform(0, extent)) for i in range(n)]
+
+def makeHash(points, cellsize):
+    grid = SH.SpatialHash(cellsize)
+    for i in range(len(points)):
+        grid.add(points[i], i)
+    return grid
+
+def bruteForce(points, q):
+    '''sorted list of (squared distance, index) of all points'''
+    return sorted([(SH.dist2(p, q), i) for (i, p) in enumerate(points)])
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(42)
+
+    def check(self, points, queries, cellsize, radius):
+        grid = makeHash(points, cellsize)
+        for q in queries:
+            found = sorted([item for (pnt, item) in grid.query(q, radius)])
+            self.assertEqual(found, [i for (d2, i) in sorted(bruteForce(points, q), key= lambda c: c[1]) if d2 <= radius*radius])
+
+    def test_dense(self):
+        points = randomPoints(self.rnd, 500)
+        self.check(points, randomPoints(self.rnd, 50), 0.5, 1.5)
+
+    def test_sparse(self):
+        # few points, radius much bigger than cells: all occupied cells are scanned instead
+        points = randomPoints(self.rnd, 7, extent= 1000.0)
+        self.check(points, randomPoints(self.rnd, 20, extent= 1000.0), 0.5, 400.0)
+
+    def test_empty(self):
+        self.assertEqual(SH.SpatialHash(1.0).query((0.0, 0.0, 0.0), 10.0), [])
+
+
+class TestGroupCoincident(unittest.TestCase):
+
+    def test_groups(self):
+        rnd = random.Random(7)
+        base = randomPoints(rnd, 100, extent= 100.0)
+        points = []
+        for p in base:
+            for j in range(3):
+                points.append(tuple([c + rnd.uniform(-0.01, 0.01) for c in p]))
+        rnd.shuffle(points)
+        tol = 0.1
+        (reps, owners) = SH.groupCoincident(points, tol)
+        self.assertEqual(len(reps), len(base))
+        self.assertEqual(len(owners), len(points))
+        for i in range(len(points)):
+            self.assertLessEqual(SH.dist2(points[i], points[reps[owners[i]]]), tol*tol)
+        for i in range(len(reps)):
+            self.assertEqual(owners[reps[i]], i)
+            for j in range(i):
+                self.assertGreater(SH.dist2(points[reps[i]], points[reps[j]]), tol*tol)
+
+    def test_rotations(self):
+        points = [(0.0, 0.0, 0.0)] * 4
+        s = 0.5 ** 0.5
+        quats = [(0.0, 0.0, 0.0, 1.0), (0.0, 0.0, 0.0, -1.0), (0.0, 0.0, s, s), (0.0, 0.0, 0.0, 1.0)]
+        (reps, owners) = SH.groupCoincident(points, 0.1, quats, 0.01)
+        # q and -q are the same rotation
+        self.assertEqual(owners, [0, 0, 1, 0])
+        (reps, owners) = SH.groupCoincident(points, 0.1)
+        self.assertEqual(owners, [0, 0, 0, 0])
+
+
+class TestSpaceFillingCurves(unittest.TestCase):
+
+    def allCells(self, bits):
+        n = 1 << bits
+        return [(x, y, z) for x in range(n) for y in range(n) for z in range(n)]
+
+    def test_keys_are_unique(self):
+        bits = 3
+        cells = self.allCells(bits)
+        for keyfunc in (SH.mortonKey, SH.hilbertKey):
+            keys = sorted([keyfunc(c, bits) for c in cells])
+            self.assertEqual(keys, list(range(len(cells))))
+
+    def test_morton(self):
+        self.assertEqual(SH.mortonKey((1, 0, 0), 1), 4)
+        self.assertEqual(SH.mortonKey((0, 1, 0), 1), 2)
+        self.assertEqual(SH.mortonKey((0, 0, 1), 1), 1)
+        self.assertEqual(SH.mortonKey((3, 3, 3), 2), 63)
+
+    def test_hilbert_is_continuous(self):
+        bits = 3
+        cells = self.allCells(bits)
+        cells.sort(key= lambda c: SH.hilbertKey(c, bits))
+        self.assertEqual(cells[0], (0, 0, 0))
+        for i in range(1, len(cells)):
+            step = sum([abs(cells[i][k] - cells[i-1][k]) for k in range(3)])
+            self.assertEqual(step, 1)
+
+    def test_curveOrder(self):
+        rnd = random.Random(3)
+        points = randomPoints(rnd, 64)
+        for curve in ('Hilbert', 'Morton'):
+            order = SH.curveOrder(points, curve)
+            self.assertEqual(sorted(order), list(range(len(points))))
+
+    def test_nearestNeighbourTour(self):
+        points = [(float(i), 0.0, 0.0) for i in (0, 5, 1, 4, 2, 3)]
+        self.assertEqual(SH.nearestNeighbourTour(points), [0, 2, 4, 5, 3, 1])
+
+
+class TestNearest(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(42)
+
+    def check(self, points, queries, cellsize):
+        grid = makeHash(points, cellsize)
+        for q in queries:
+            (pnt, item) = grid.nearest(q)
+            self.assertAlmostEqual(SH.dist2(pnt, q), bruteForce(points, q)[0][0])
+
+    def test_dense(self):
+        points = randomPoints(self.rnd, 500)
+        self.check(points, randomPoints(self.rnd, 50), SH.autoCellSize(points))
+
+    def test_sparse(self):
+        # a few points, far apart compared to cell size: search goes beyond cells near the query
+        points = randomPoints(self.rnd, 7, extent= 1000.0)
+        self.check(points, randomPoints(self.rnd, 20, extent= 1000.0), 0.5)
+
+    def test_far_query(self):
+        points = randomPoints(self.rnd, 200)
+        self.check(points, [(500.0, -300.0, 40.0)], SH.autoCellSize(points))
+
+    def test_empty(self):
+        self.assertIsNone(SH.SpatialHash(1.0).nearest((0.0, 0.0, 0.0)))
+
+    def test_remove(self):
+        points = randomPoints(self.rnd, 50)
+        grid = makeHash(points, 1.0)
+        for i in range(0, 50, 2):
+            grid.remove(points[i], i)
+        self.assertEqual(len(grid), 25)
+        (pnt, item) = grid.nearest(points[10])
+        self.assertEqual(item % 2, 1)
+
+
+class TestKNearest(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(42)
+
+    def check(self, points, queries, cellsize, k = 5):
+        grid = makeHash(points, cellsize)
+        k = min(k, len(points))
+        for q in queries:
+            d2s = bruteForce(points, q)
+            found = grid.kNearest(q, k)
+            self.assertEqual(len(found), k)
+            for j in range(k):
+                self.assertAlmostEqual(found[j][0], d2s[j][0])
+            found = grid.kNearest(q, k, skip= d2s[0][1])
+            self.assertNotIn(d2s[0][1], [rec[1] for (d2, rec) in found])
+
+    def test_dense(self):
+        points = randomPoints(self.rnd, 500)
+        self.check(points, randomPoints(self.rnd, 50), SH.autoCellSize(points))
+
+    def test_sparse(self):
+        points = randomPoints(self.rnd, 7, extent= 1000.0)
+        self.check(points, randomPoints(self.rnd, 20, extent= 1000.0), 0.5)
+
+    def test_more_than_there_is(self):
+        points = randomPoints(self.rnd, 3)
+        self.assertEqual(len(makeHash(points, 1.0).kNearest((0.0, 0.0, 0.0), 10)), 3)
+        self.assertEqual(SH.SpatialHash(1.0).kNearest((0.0, 0.0, 0.0), 3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
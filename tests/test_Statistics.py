@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import freecad_stub
+freecad_stub.install()
+
+from lattice2Statistics import symmetricEigen3
+
+
+def matVec(m, v):
+    return [sum([m[i][k] * v[k] for k in range(3)]) for i in range(3)]
+
+def dot(a, b):
+    return sum([a[k] * b[k] for k in range(3)])
+
+
+class TestSymmetricEigen3(unittest.TestCase):
+
+    def check(self, m):
+        (values, vectors) = symmetricEigen3(m)
+        self.assertEqual(len(values), 3)
+        self.assertGreaterEqual(values[0], values[1])
+        self.assertGreaterEqual(values[1], values[2])
+        scale = max([abs(x) for row in m for x in row] + [1.0])
+        for (val, vec) in zip(values, vectors):
+            mv = matVec(m, vec)
+            for k in range(3):
+                self.assertAlmostEqual(mv[k], val * vec[k], delta= 1e-9 * scale)
+        for i in range(3):
+            for j in range(3):
+                self.assertAlmostEqual(dot(vectors[i], vectors[j]), 1.0 if i == j else 0.0, places= 9)
+        self.assertAlmostEqual(sum(values), m[0][0] + m[1][1] + m[2][2], delta= 1e-9 * scale)
+
+    def test_diagonal(self):
+        (values, vectors) = symmetricEigen3([[1.0, 0.0, 0.0], [0.0, 3.0, 0.0], [0.0, 0.0, 2.0]])
+        self.assertEqual(values, [3.0, 2.0, 1.0])
+        self.assertEqual(vectors, [(0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 0.0)])
+
+    def test_known(self):
+        (values, vectors) = symmetricEigen3([[2.0, 1.0, 0.0], [1.0, 2.0, 0.0], [0.0, 0.0, 0.0]])
+        for (got, expected) in zip(values, [3.0, 1.0, 0.0]):
+            self.assertAlmostEqual(got, expected)
+        self.assertAlmostEqual(abs(vectors[0][0]), 0.5 ** 0.5)
+        self.assertAlmostEqual(abs(vectors[0][1]), 0.5 ** 0.5)
+
+    def test_repeated(self):
+        self.check([[2.0, 0.0, 0.0], [0.0, 2.0, 0.0], [0.0, 0.0, 2.0]])
+        self.check([[1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [1.0, 1.0, 1.0]])
+
+    def test_zero(self):
+        self.check([[0.0] * 3 for i in range(3)])
+
+    def test_random(self):
+        rnd = random.Random(5)
+        for n in range(50):
+            a = [[rnd.uniform(-10, 10) for j in range(3)] for i in range(3)]
+            m = [[a[i][j] + a[j][i] for j in range(3)] for i in range(3)]
+            self.check(m)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import random
+import unittest
+
+import freecad_stub
+freecad_stub.install()
+
+import FuseCompound2
+from lattice2Common import DistConfusion
+
+
+class FakeBoundBox(object):
+    def __init__(self, lo, hi):
+        (self.XMin, self.YMin, self.ZMin) = lo
+        (self.XMax, self.YMax, self.ZMax) = hi
+        self.DiagonalLength = sum([(hi[k] - lo[k])**2 for k in range(3)]) ** 0.5
+
+class FakeShape(object):
+    def __init__(self, lo, hi):
+        self.BoundBox = FakeBoundBox(lo, hi)
+
+def box(x, y, z, size = 1.0):
+    return FakeShape((x, y, z), (x + size, y + size, z + size))
+
+def bruteForceClusters(shapes):
+    # boxes are enlarged slightly, like findClusters does
+    boxes = []
+    for sh in shapes:
+        bb = sh.BoundBox
+        margin = bb.DiagonalLength * 0.01 + DistConfusion
+        boxes.append(((bb.XMin - margin, bb.YMin - margin, bb.ZMin - margin), (bb.XMax + margin, bb.YMax + margin, bb.ZMax + margin)))
+    n = len(shapes)
+    parent = list(range(n))
+    def root(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+    for i in range(n):
+        for j in range(i):
+            (lo_a, hi_a) = boxes[i]
+            (lo_b, hi_b) = boxes[j]
+            if all(lo_a[k] <= hi_b[k] and lo_b[k] <= hi_a[k] for k in range(3)):
+                parent[root(i)] = root(j)
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(root(i), []).append(i)
+    return sorted(clusters.values())
+
+
+class TestFindClusters(unittest.TestCase):
+
+    def test_chain(self):
+        # overlapping in a chain: one cluster, though the ends are far apart
+        shapes = [box(0.8 * i, 0.0, 0.0) for i in range(20)]
+        self.assertEqual(FuseCompound2.findClusters(shapes), [list(range(20))])
+
+    def test_apart(self):
+        shapes = [box(2.0 * i, 0.0, 0.0) for i in range(5)]
+        self.assertEqual(FuseCompound2.findClusters(shapes), [[i] for i in range(5)])
+
+    def test_boxes_overlapping_on_one_axis_only(self):
+        # sweep axis overlaps, other axes don't
+        shapes = [box(0.0, 0.0, 0.0), box(0.5, 5.0, 0.0), box(0.7, 0.0, 5.0)]
+        self.assertEqual(FuseCompound2.findClusters(shapes), [[0], [1], [2]])
+
+    def test_random(self):
+        rnd = random.Random(11)
+        shapes = [box(rnd.uniform(0, 20), rnd.uniform(0, 20), rnd.uniform(0, 5), rnd.uniform(0.5, 2.0)) for i in range(150)]
+        self.assertEqual(FuseCompound2.findClusters(shapes), bruteForceClusters(shapes))
+
+    def test_trivial(self):
+        self.assertEqual(FuseCompound2.findClusters([]), [])
+        self.assertEqual(FuseCompound2.findClusters([box(0.0, 0.0, 0.0)]), [[0]])
+
+
+if __name__ == '__main__':
+    unittest.main()